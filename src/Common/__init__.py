@@ -1,17 +1,19 @@
-from .cstatic import logger
+from .cstatic import fast_startup, logger
 
 try:
     # Import des modules disponibles
+    # (models initialise la base une seule fois, ou à la première connexion en
+    # mode démarrage rapide : voir cstatic.FAST_STARTUP)
     from .models import init_database, dbh,  init_default_superuser, list_admins
-    from .updater import UpdaterInit
 
     logger.info("Initialisation de l'application")
     
-    # Initialisation de la base de données
-    if init_database():
-        logger.info("Base de données initialisée avec succès")
-    else:
-        logger.warning("Impossible d'initialiser la base de données")
+    if not fast_startup():
+        # Initialisation de la base de données (déjà faite au chargement de models)
+        if init_database():
+            logger.info("Base de données initialisée avec succès")
+        else:
+            logger.warning("Impossible d'initialiser la base de données")
     
     # L'updater sera initialisé manuellement par les fenêtres qui en ont besoin
     # pour éviter les problèmes de threads non fermés
@@ -24,3 +26,12 @@ except ImportError as e:
     logger.error(f"Erreur lors de l'importation des modules: {e}")
 except Exception as e:
     logger.error(f"Erreur lors de l'initialisation: {e}")
+
+
+def __getattr__(name):
+    # UpdaterInit importé à la demande : updater tire server, requests et le réseau
+    if name == "UpdaterInit":
+        from .updater import UpdaterInit
+
+        return UpdaterInit
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Sauvegarde de la base SQLite via l’API backup en ligne.
+
+Une copie de fichier (shutil) de ``database.db`` ignore le contenu du ``-wal``
+et peut capturer une page à moitié écrite (``synchronous=0``). L’API backup de
+SQLite lit une image cohérente de la base, WAL compris, par tranches de pages :
+les écritures de l’application ne sont bloquées que le temps d’une tranche.
+
+Deux formes de sauvegarde :
+
+- ``backup_database(dest)`` : fichier ``.db`` autonome ;
+- ``snapshot_database(store_dir)`` : instantané incrémental dans un dépôt où la
+  base est découpée en blocs de pages compressés et adressés par leur
+  empreinte ; un bloc inchangé depuis l’instantané précédent n’est pas réécrit.
+  Les pages sont lues sous une transaction de lecture de la base source, sans
+  copie intermédiaire.
+  Trente instantanés d’une base qui évolue peu occupent à peine plus qu’une
+  copie compressée.
+
+    store_dir/
+        chunks/ab/abcdef….xz   blocs de pages (nom = sha256 du contenu brut,
+                               extension = compression : .zst, .xz ou aucune)
+        snapshots/<date>.json  manifeste : taille de page, liste des blocs
+        .lock                  verrou : instantané et nettoyage ne se chevauchent pas
+
+La rétention (``prune_snapshots``) est de type grand-père / père / fils : le
+dernier instantané de chaque heure, de chaque jour et de chaque semaine est
+conservé sur des fenêtres glissantes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import lzma
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from .cstatic import logger
+
+# Pages copiées par étape de l’API backup (1024 × 4 Kio = 4 Mio).
+BACKUP_PAGES_PER_STEP = 1024
+
+# Pages par bloc dans le dépôt d’instantanés (64 × 4 Kio = 256 Kio) : plus le
+# bloc est petit, moins une modification isolée coûte de place.
+SNAPSHOT_CHUNK_PAGES = 64
+
+# Microsecondes : deux instantanés de la même seconde ne s’écrasent pas
+SNAPSHOT_DATE_FORMAT = "%Y-%m-%d_%Hh%Mm%Ss_%f"
+# Noms des manifestes des dépôts plus anciens (résolution à la seconde)
+_OLD_SNAPSHOT_DATE_FORMATS = ("%Y-%m-%d_%Hh%Mm%Ss",)
+
+# Essais de lecture directe (WAL vide sous une transaction) avant le repli sur une copie
+SNAPSHOT_READ_ATTEMPTS = 3
+
+# Rétention grand-père / père / fils : nombre d’heures, de jours et de semaines
+# pour lesquels le dernier instantané est conservé.
+KEEP_HOURLY = 24
+KEEP_DAILY = 30
+KEEP_WEEKLY = 12
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:  # Python 3.14+
+    from compression import zstd as _zstd
+except ImportError:
+    _zstd = None
+
+# extension -> (compresser, décompresser) ; "" = blocs bruts (anciens dépôts)
+_CODECS = {
+    ".xz": (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+    "": (bytes, bytes),
+}
+if _zstd is not None:
+    _CODECS[".zst"] = (_zstd.compress, _zstd.decompress)
+
+SNAPSHOT_CODEC = ".zst" if _zstd is not None else ".xz"
+
+
+def _default_db_file():
+    from .models import DB_FILE
+
+    return os.path.abspath(DB_FILE)
+
+
+def backup_database(dest_path, src_path=None, pages_per_step=BACKUP_PAGES_PER_STEP, progress=None):
+    """
+    Copie cohérente de ``src_path`` (par défaut DB_FILE) vers ``dest_path``.
+
+    La copie est écrite dans ``dest_path + ".part"`` puis renommée : une
+    sauvegarde interrompue ne remplace jamais un fichier existant. La copie est
+    repassée en journal ``DELETE`` pour tenir dans un seul fichier.
+    ``progress(done, total)`` est appelé après chaque tranche de pages.
+    Lève sqlite3.Error ou OSError en cas d’échec.
+    """
+    src_path = src_path or _default_db_file()
+    tmp_path = f"{dest_path}.part"
+    _unlink(tmp_path)
+
+    def _on_step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+
+    src = sqlite3.connect(src_path)
+    try:
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst, pages=pages_per_step, progress=_on_step)
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+    except BaseException:
+        _unlink(tmp_path)
+        raise
+    finally:
+        src.close()
+    os.replace(tmp_path, dest_path)
+    logger.debug("Sauvegarde SQLite en ligne : %s -> %s", src_path, dest_path)
+    return dest_path
+
+
+def _chunk_path(store_dir, digest, codec=""):
+    return os.path.join(store_dir, "chunks", digest[:2], digest + codec)
+
+
+def _find_chunk(store_dir, digest):
+    """(chemin, extension) du bloc ``digest`` quelle que soit sa compression, ou (None, None)."""
+    for codec in _CODECS:
+        path = _chunk_path(store_dir, digest, codec)
+        if os.path.exists(path):
+            return path, codec
+    return None, None
+
+
+def _read_chunk(store_dir, digest):
+    path, codec = _find_chunk(store_dir, digest)
+    if path is None:
+        raise FileNotFoundError(f"Bloc de sauvegarde manquant : {digest}")
+    with open(path, "rb") as f:
+        data = _CODECS[codec][1](f.read())
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Bloc de sauvegarde corrompu : {digest}")
+    return data
+
+
+@contextmanager
+def _store_lock(store_dir):
+    """
+    Verrou exclusif du dépôt (fichier ``store_dir/.lock``), entre threads comme
+    entre processus : un nettoyage ne doit pas supprimer les blocs qu’un
+    instantané en cours vient d’écrire sans encore les référencer.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, ".lock"), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK abandonne après 10 s : on attend encore
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _snapshots_dir(store_dir):
+    return os.path.join(store_dir, "snapshots")
+
+
+class _PageReader:
+    """
+    Pages de la base source lues dans une transaction de lecture : image
+    cohérente sans copie intermédiaire. Avec la table virtuelle ``sqlite_dbpage``
+    les pages sont lues par SQLite (WAL compris) ; sinon le fichier est lu
+    directement, ce qui n'est cohérent que si le WAL est vide au début de la
+    transaction (il est vidé par un checkpoint). ``open()`` retourne False si
+    aucune des deux méthodes n'est possible.
+    """
+
+    def __init__(self, src_path):
+        self.src_path = src_path
+        self.conn = None
+        self.file = None
+        self.page_size = self.page_count = 0
+
+    def open(self, attempts=SNAPSHOT_READ_ATTEMPTS):
+        self.conn = sqlite3.connect(self.src_path, isolation_level=None)
+        try:
+            self.conn.execute("SELECT pgno FROM sqlite_dbpage LIMIT 1")
+            dbpage = True
+        except sqlite3.Error:
+            dbpage = False
+        wal_path = f"{self.src_path}-wal"
+        for _ in range(attempts):
+            wal = self.conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+            if wal and not dbpage:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("BEGIN")
+            # la transaction de lecture ne démarre qu'à la première lecture
+            self.conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            # WAL vide sous la transaction : aucun checkpoint ne peut plus
+            # modifier le fichier principal tant qu'elle est ouverte
+            if dbpage or not wal or not os.path.exists(wal_path) or os.path.getsize(wal_path) == 0:
+                self.page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+                self.page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+                if not dbpage:
+                    self.file = open(self.src_path, "rb")
+                return True
+            self.conn.execute("ROLLBACK")  # écriture concurrente : nouvel essai
+        return False
+
+    def read(self, first_page, count):
+        """``count`` pages à partir de ``first_page`` (numérotées depuis 1)."""
+        if self.file is None:
+            rows = self.conn.execute(
+                "SELECT data FROM sqlite_dbpage WHERE pgno >= ? AND pgno < ? ORDER BY pgno",
+                (first_page, first_page + count),
+            )
+            return b"".join(row[0] for row in rows)
+        self.file.seek((first_page - 1) * self.page_size)
+        return self.file.read(count * self.page_size)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.conn is not None:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            self.conn.close()
+            self.conn = None
+
+
+def _latest_chunks(store_dir):
+    """Blocs du dernier instantané : ceux-là n'ont pas à être recherchés sur disque."""
+    for path in list_snapshots(store_dir):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return set(json.load(f)["chunks"])
+        except (OSError, ValueError, KeyError):
+            continue
+    return set()
+
+
+def _store_chunks(store_dir, read_chunk, chunk_count, known, progress=None):
+    """
+    Écrit dans le dépôt les blocs ``read_chunk(i)`` absents de ``known`` et du
+    disque. Retourne (empreintes, nombre de blocs écrits).
+    """
+    compress = _CODECS[SNAPSHOT_CODEC][0]
+    chunks = []
+    written = 0
+    for i in range(chunk_count):
+        data = read_chunk(i)
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in known and _find_chunk(store_dir, digest)[0] is None:
+            path = _chunk_path(store_dir, digest, SNAPSHOT_CODEC)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.part", "wb") as out:
+                out.write(compress(data))
+            os.replace(f"{path}.part", path)
+            written += 1
+        known.add(digest)
+        chunks.append(digest)
+        if progress is not None:
+            progress(i + 1, chunk_count)
+    return chunks, written
+
+
+def snapshot_database(store_dir, src_path=None, progress=None):
+    """
+    Instantané incrémental de la base dans le dépôt ``store_dir``.
+
+    Les pages sont lues directement dans la base source, sous une transaction
+    de lecture (voir _PageReader), par blocs de SNAPSHOT_CHUNK_PAGES pages :
+    chaque bloc est haché et seuls les blocs absents du dépôt y sont écrits,
+    compressés avec SNAPSHOT_CODEC. Une base peu modifiée coûte une lecture,
+    pas une copie complète. Si la lecture directe est impossible (écritures
+    continues), repli sur une copie en ligne dans un fichier temporaire.
+    ``progress(done, total)`` compte les blocs. Retourne le chemin du manifeste.
+    """
+    with _store_lock(store_dir):
+        src_path = src_path or _default_db_file()
+        os.makedirs(_snapshots_dir(store_dir), exist_ok=True)
+        known = _latest_chunks(store_dir)
+
+        reader = _PageReader(src_path)
+        try:
+            if reader.open():
+                page_size = reader.page_size
+                size = page_size * reader.page_count
+                chunk_count = -(-reader.page_count // SNAPSHOT_CHUNK_PAGES)
+                chunks, written = _store_chunks(
+                    store_dir,
+                    lambda i: reader.read(i * SNAPSHOT_CHUNK_PAGES + 1, SNAPSHOT_CHUNK_PAGES),
+                    chunk_count,
+                    known,
+                    progress,
+                )
+            else:
+                reader.close()
+                logger.debug("Lecture directe impossible, instantané via une copie : %s", src_path)
+                page_size, size, chunks, written = _snapshot_from_copy(store_dir, src_path, known, progress)
+        finally:
+            reader.close()
+
+        created = datetime.now()
+        manifest_path = _manifest_path(store_dir, created)
+        while os.path.exists(manifest_path):  # horloge trop grossière (Windows)
+            created = datetime.now()
+            manifest_path = _manifest_path(store_dir, created)
+        manifest = {
+            "created": created.isoformat(timespec="seconds"),
+            "page_size": page_size,
+            "chunk_size": page_size * SNAPSHOT_CHUNK_PAGES,
+            "size": size,
+            "chunks": chunks,
+        }
+        with open(f"{manifest_path}.part", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.part", manifest_path)
+        logger.info(
+            "Instantané %s : %d bloc(s) dont %d nouveau(x)",
+            os.path.basename(manifest_path),
+            len(chunks),
+            written,
+        )
+        return manifest_path
+
+
+def _manifest_path(store_dir, created):
+    return os.path.join(_snapshots_dir(store_dir), f"{created.strftime(SNAPSHOT_DATE_FORMAT)}.json")
+
+
+def _snapshot_from_copy(store_dir, src_path, known, progress=None):
+    """Repli : copie en ligne dans un fichier temporaire, découpée ensuite."""
+    fd, tmp_db = tempfile.mkstemp(suffix=".db", prefix="msnapshot_")
+    os.close(fd)
+    try:
+        backup_database(tmp_db, src_path)
+        with sqlite3.connect(tmp_db) as conn:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        chunk_size = page_size * SNAPSHOT_CHUNK_PAGES
+        size = os.path.getsize(tmp_db)
+        with open(tmp_db, "rb") as f:
+
+            def read_chunk(i):
+                f.seek(i * chunk_size)
+                return f.read(chunk_size)
+
+            chunks, written = _store_chunks(
+                store_dir, read_chunk, -(-size // chunk_size), known, progress
+            )
+    finally:
+        _unlink(tmp_db)
+    return page_size, size, chunks, written
+
+
+def list_snapshots(store_dir):
+    """Manifestes du dépôt, du plus récent au plus ancien."""
+    snap_dir = _snapshots_dir(store_dir)
+    try:
+        names = [n for n in os.listdir(snap_dir) if n.endswith(".json")]
+    except OSError:
+        return []
+    return [os.path.join(snap_dir, n) for n in sorted(names, reverse=True)]
+
+
+def snapshot_time(manifest_path):
+    """Date de l’instantané, lue dans le nom du manifeste (None si nom inattendu)."""
+    name = os.path.splitext(os.path.basename(manifest_path))[0]
+    for date_format in (SNAPSHOT_DATE_FORMAT, *_OLD_SNAPSHOT_DATE_FORMATS):
+        try:
+            return datetime.strptime(name, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def restore_snapshot(manifest_path, dest_path):
+    """
+    Reconstitue la base décrite par ``manifest_path`` dans ``dest_path``.
+    Chaque bloc est vérifié contre son empreinte ; lève OSError / ValueError.
+    """
+    store_dir = os.path.dirname(os.path.dirname(os.path.abspath(manifest_path)))
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    tmp_path = f"{dest_path}.part"
+    try:
+        with open(tmp_path, "wb") as out:
+            for digest in manifest["chunks"]:
+                out.write(_read_chunk(store_dir, digest))
+    except BaseException:
+        _unlink(tmp_path)
+        raise
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def _snapshots_to_keep(manifests, hourly, daily, weekly):
+    """Manifestes retenus : le plus récent de chaque heure / jour / semaine (ISO) récents."""
+    keep = set(manifests[:1])
+    buckets = (
+        (hourly, lambda t: (t.date(), t.hour)),
+        (daily, lambda t: t.date()),
+        (weekly, lambda t: t.isocalendar()[:2]),
+    )
+    for count, bucket_of in buckets:
+        seen = []
+        for path in manifests:
+            when = snapshot_time(path)
+            if when is None:
+                keep.add(path)
+                continue
+            bucket = bucket_of(when)
+            if bucket in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.append(bucket)
+            keep.add(path)
+    return keep
+
+
+def prune_snapshots(store_dir, hourly=KEEP_HOURLY, daily=KEEP_DAILY, weekly=KEEP_WEEKLY):
+    """
+    Rétention grand-père / père / fils puis suppression des blocs qui ne sont
+    plus référencés par aucun manifeste conservé. Sous le verrou du dépôt :
+    un instantané concurrent attend la fin du nettoyage, et inversement.
+    """
+    with _store_lock(store_dir):
+        manifests = list_snapshots(store_dir)
+        keep = _snapshots_to_keep(manifests, hourly, daily, weekly)
+        for old in manifests:
+            if old not in keep:
+                _unlink(old)
+        referenced = set()
+        for path in keep:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    referenced.update(json.load(f)["chunks"])
+            except (OSError, ValueError, KeyError) as e:
+                # manifeste illisible : on ne supprime aucun bloc plutôt que de risquer une perte
+                logger.warning("Manifeste de sauvegarde illisible %s : %s", path, e)
+                return
+        chunks_root = os.path.join(store_dir, "chunks")
+        for dirpath, _dirs, files in os.walk(chunks_root):
+            for name in files:
+                digest = name.split(".", 1)[0]
+                if digest not in referenced or name.endswith(".part"):
+                    _unlink(os.path.join(dirpath, name))
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -3,7 +3,14 @@
 # vim: ai ts=4 sts=4 et sw=4 nu
 # maintainer: Fad
 
-from .models import dbh, init_database, BaseModel
+from .models import (
+    dbh,
+    init_database,
+    BaseModel,
+    schema_fingerprint,
+    schema_is_current,
+    store_schema_fingerprint,
+)
 from .cstatic import logger
 
 
@@ -45,9 +52,15 @@ class AdminDatabase:
                     model._meta.database = dbh
                 logger.debug(f"Création de la table pour {model.__name__}")
             
-            # Créer toutes les tables en une seule fois
-            dbh.create_tables(self.LIST_CREAT, safe=True)
-            logger.info("Tables créées avec succès")
+            # Créer toutes les tables en une seule fois, sauf si le schéma
+            # enregistré au lancement précédent est identique
+            fingerprint = schema_fingerprint(self.LIST_CREAT)
+            if schema_is_current("app", fingerprint):
+                logger.debug("Schéma de l'application inchangé, création des tables ignorée")
+            else:
+                dbh.create_tables(self.LIST_CREAT, safe=True)
+                store_schema_fingerprint("app", fingerprint)
+                logger.info("Tables créées avec succès")
         else:
             logger.warning("Aucune table à créer (LIST_CREAT est vide)")
         
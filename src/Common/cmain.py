@@ -23,6 +23,7 @@ if __name__ == "__main__":
 from PyQt6.QtWidgets import QDialog, QApplication
 
 from . import gettext_windows
+from .connections import connection_for_thread
 from .cstatic import CConstants, license_required, logger
 from .models import Organization, Owner, Settings, init_database, dbh
 from .ui.license_view import LicenseViewWidget
@@ -30,7 +31,6 @@ from .ui.login import LoginWidget
 from .ui.organization_add_or_edit import NewOrEditOrganizationViewWidget
 from .ui.restoration_view import RestorationViewWidget
 from .migrations import run_migrations
-from .migrations.migration_tracker import MigrationTracker
 
 from .ui.user_add_or_edit import NewOrEditUserViewWidget
 from .ui.util import is_valide_mac
@@ -104,36 +104,23 @@ def check_and_run_migrations():
         if dbh is None:
             logger.error("❌ La base de données n'est pas initialisée")
             return False
-            
-        if dbh.is_closed():
-            logger.info("🔄 Connexion à la base de données")
-            try:
-                dbh.connect()
-            except Exception as e:
-                logger.error(f"❌ Erreur lors de la connexion à la base de données: {e}")
+
+        # Connexion du thread principal : fermée en sortie seulement si elle
+        # est ouverte ici (une connexion déjà utilisée par l'interface reste ouverte)
+        with connection_for_thread():
+            logger.info("✅ Connexion à la base de données établie")
+
+            # Exécuter les migrations (la table de suivi est créée par run_migrations)
+            if run_migrations():
+                logger.info("✅ Migrations vérifiées et appliquées avec succès")
+                return True
+            else:
+                logger.error("❌ Erreur lors de l'exécution des migrations")
                 return False
-                
-        logger.info("✅ Connexion à la base de données établie")
-        if not MigrationTracker.migrate():
-            logger.error("❌ Échec de la migration du système de suivi")
-            return False
-            
-        # Exécuter les migrations
-        if run_migrations():
-            logger.info("✅ Migrations vérifiées et appliquées avec succès")
-            return True
-        else:
-            logger.error("❌ Erreur lors de l'exécution des migrations")
-            return False
             
     except Exception as e:
         logger.error(f"❌ Erreur lors de la vérification des migrations: {e}")
         return False
-    finally:
-        # Fermer la connexion à la base de données
-        if dbh is not None and not dbh.is_closed():
-            dbh.close()
-            logger.info("✅ Connexion à la base de données fermée")
 
 def initialize_main_window():   
     """Tentative d'initialisation de la fenêtre principale (externe)"""
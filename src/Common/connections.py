@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Connexions SQLite des threads : une par thread, lecteurs en lecture seule.
+
+peewee ouvre une connexion par thread sur ``dbh`` ; ce module rend ce cycle
+explicite pour les threads de travail (synchronisation, serveur, exports) :
+
+- ``connection_for_thread()`` ouvre la connexion du thread courant et la ferme
+  en sortie, seulement si elle l'a ouverte : un appel emboîté, ou le thread
+  principal déjà connecté, ne perd pas sa connexion ;
+- ``connection_for_thread(read_only=True)`` emprunte pour le thread une
+  connexion ``mode=ro`` au groupe de lecture (READ_POOL_SIZE connexions), rendue
+  en sortie. En WAL un lecteur ne bloque pas l'écrivain : un long export lit
+  pendant que l'interface écrit. Toute écriture y lève
+  ``attempt to write a readonly database``.
+
+Avant de remplacer le fichier de base (import d'une sauvegarde),
+``close_for_replace(db)`` ferme toutes ces connexions et vide le WAL : un
+``-wal`` resté ouvert serait rejoué sur le fichier importé.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from .cstatic import logger
+
+# Connexions en lecture seule ouvertes au plus (threads d'export, rapports)
+READ_POOL_SIZE = 4
+
+# Attente d'un verrou d'écriture avant "database is locked" (secondes)
+BUSY_TIMEOUT = 15
+
+_thread_state = threading.local()
+
+
+def thread_read_connection():
+    """Connexion du groupe de lecture réservée par le thread courant, ou None."""
+    return getattr(_thread_state, "read_conn", None)
+
+
+class ReadPool:
+    """Connexions SQLite en lecture seule partagées entre threads, une à la fois."""
+
+    def __init__(self, size=READ_POOL_SIZE):
+        self._size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        # connexion -> fichier de base (dbh.init() peut changer de fichier)
+        self._paths = {}
+
+    def owns(self, conn):
+        return conn in self._paths
+
+    def acquire(self, db):
+        """Connexion pour ``db`` ; attend qu'une place se libère si le groupe est plein."""
+        self._slots.acquire()
+        try:
+            path = os.path.abspath(db.database)
+            with self._lock:
+                while self._idle:
+                    conn = self._idle.pop()
+                    if self._paths[conn] == path:
+                        return conn
+                    self._discard(conn)
+            return self._open(db, path)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+        self._slots.release()
+
+    def close_all(self, timeout=BUSY_TIMEOUT):
+        """
+        Ferme toutes les connexions du groupe. Les connexions empruntées sont
+        attendues (``timeout`` secondes au plus) et aucun nouvel emprunt n'est
+        servi pendant la fermeture. Retourne False si des lectures n'ont pas
+        été rendues à temps (rien n'est alors fermé).
+        """
+        taken = 0
+        try:
+            for _ in range(self._size):
+                if not self._slots.acquire(timeout=timeout):
+                    return False
+                taken += 1
+            with self._lock:
+                while self._idle:
+                    self._discard(self._idle.pop())
+            logger.debug("Connexions en lecture seule fermées")
+            return True
+        finally:
+            for _ in range(taken):
+                self._slots.release()
+
+    def _open(self, db, path):
+        conn = sqlite3.connect(
+            f"file:{quote(path)}?mode=ro",
+            uri=True,
+            timeout=db._timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        try:
+            db._add_conn_hooks(conn)  # mêmes pragmas et fonctions que dbh
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            self._paths[conn] = path
+        logger.debug("Connexion en lecture seule ouverte (%d)", len(self._paths))
+        return conn
+
+    def _discard(self, conn):
+        del self._paths[conn]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+
+def read_pool():
+    """Groupe de lecture partagé du processus."""
+    global _read_pool
+    if _read_pool is None:
+        with _read_pool_lock:
+            if _read_pool is None:
+                _read_pool = ReadPool()
+    return _read_pool
+
+
+def close_for_replace(db, timeout=BUSY_TIMEOUT):
+    """
+    Prépare le remplacement du fichier de ``db`` : ferme le groupe de lecture,
+    reporte tout le WAL dans la base (checkpoint TRUNCATE) puis ferme ``db``.
+    Lève RuntimeError si une lecture ou une autre connexion empêche de vider
+    le WAL : remplacer le fichier ferait alors rejouer d'anciennes pages.
+    """
+    if not read_pool().close_all(timeout):
+        raise RuntimeError("Des lectures en arrière-plan (exports) sont en cours")
+    if db.is_closed():
+        if not os.path.exists(db.database):
+            return
+        db.connect()
+    try:
+        busy, _log, _checkpointed = db.execute_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        db.close()
+    if busy:
+        raise RuntimeError("Le journal WAL n'a pas pu être vidé : base encore utilisée")
+
+
+@contextmanager
+def connection_for_thread(read_only=False):
+    """
+    Connexion de ``dbh`` pour le thread courant, le temps du bloc.
+
+        with connection_for_thread():
+            sync_model(...)
+
+    Si le thread a déjà une connexion ouverte, elle est utilisée telle quelle
+    et laissée ouverte.
+    """
+    from . import models
+
+    db = models.dbh
+    if not db.is_closed():
+        yield db
+        return
+    conn = None
+    if read_only and models._db_ready:  # sinon init_database doit pouvoir écrire
+        # réservée ici : attendre une place en tenant le verrou de connexion
+        # de peewee bloquerait les threads qui veulent rendre la leur
+        conn = read_pool().acquire(db)
+        _thread_state.read_conn = conn
+    try:
+        db.connect()
+        yield db
+    finally:
+        try:
+            if not db.is_closed():
+                db.close()
+        finally:
+            if conn is not None:
+                _thread_state.read_conn = None
+                read_pool().release(conn)
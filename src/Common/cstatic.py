@@ -3,15 +3,17 @@
 # vim: ai ts=4 sts=4 et sw=4 nu
 # Maintainer: Fad
 
+import atexit
+import json
 import logging
 import os
+import queue
 import re
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 # Création du dossier logs s'il n'existe pas
 log_dir = Path(__file__).parent.parent.parent / 'logs'
@@ -34,6 +36,11 @@ class StartupLogFilter(logging.Filter):
         'organisation', 'superuser', 'tables créées', 'connectée',
         'modules', 'chargés', 'fermeture', 'sauvegarde'
     ]
+    # Une seule passe sur le message pour tous les mots-clés
+    STARTUP_PATTERN = re.compile(
+        '|'.join(re.escape(keyword) for keyword in STARTUP_KEYWORDS),
+        re.IGNORECASE,
+    )
     
     def filter(self, record):
         """Filtre les logs pour ne garder que les infos de démarrage et les erreurs"""
@@ -42,8 +49,44 @@ class StartupLogFilter(logging.Filter):
             return True
         
         # Pour les logs INFO et DEBUG, vérifier s'ils contiennent des mots-clés de démarrage
-        message_lower = record.getMessage().lower()
-        return any(keyword in message_lower for keyword in self.STARTUP_KEYWORDS)
+        return self.STARTUP_PATTERN.search(record.getMessage()) is not None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objet JSON par ligne (sink structuré optionnel, voir COMMON_LOG_JSON)"""
+    
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Met l'enregistrement en file sans le formater : seul le message est
+    résolu sur le thread appelant (arguments figés), la mise en forme et
+    l'écriture se font dans le thread du QueueListener.
+    """
+    
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _env_flag(name):
+    v = (os.environ.get(name) or "").strip().lower()
+    return v in ("1", "true", "yes", "on")
 
 
 # Handler pour la console
@@ -62,9 +105,36 @@ file_handler.setLevel(logging.INFO)  # Niveau INFO pour capturer les infos de d
 file_handler.addFilter(StartupLogFilter())  # Filtrer pour ne garder que les logs de démarrage
 file_handler.setFormatter(formatter)
 
-# Ajout des handlers au logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+log_handlers = [console_handler, file_handler]
+
+# Sink JSON lines optionnel (COMMON_LOG_JSON=1) : tous les logs INFO+, non filtrés
+if _env_flag("COMMON_LOG_JSON"):
+    json_handler = RotatingFileHandler(
+        log_dir / 'app.jsonl',
+        maxBytes=5*1024*1024,  # 5MB
+        backupCount=3,
+        encoding='utf-8'
+    )
+    json_handler.setLevel(logging.INFO)
+    json_handler.setFormatter(JsonLinesFormatter())
+    log_handlers.append(json_handler)
+
+# Niveau du logger = niveau le plus bas des handlers : un logger.debug() qui ne
+# serait écrit nulle part est écarté dès l'appel (COMMON_LOG_DEBUG=1 pour le garder)
+if _env_flag("COMMON_LOG_DEBUG"):
+    for handler in log_handlers:
+        if handler is not file_handler:
+            handler.setLevel(logging.DEBUG)
+logger.setLevel(min(handler.level for handler in log_handlers))
+
+# Écriture asynchrone : l'appelant ne fait que mettre l'enregistrement en file,
+# le thread du listener formate et écrit (console, app.log, app.jsonl)
+log_queue = queue.SimpleQueue()
+logger.addHandler(LazyQueueHandler(log_queue))
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+# vide la file avant la sortie du programme
+atexit.register(log_listener.stop)
 
 # Configuration du logger Peewee pour réduire les logs DEBUG SQL
 peewee_logger = logging.getLogger('peewee')
@@ -185,6 +255,21 @@ LICENSE_REQUIRED = True
 # False = copie silencieuse dans le dossier backups/ à côté de database.db (recommandé, exe / atexit).
 BACKUP_TO_USB = False
 
+# True = sauvegarde auto en instantanés incrémentaux compressés (dossier backups/store/),
+# rétention heure / jour / semaine ; restaurables via « Importer ».
+# False = un fichier backup_<date>.db complet par sauvegarde (les max_backups plus récents).
+BACKUP_INCREMENTAL = True
+
+# True = démarrage rapide : `import Common` ne touche pas à la base ; création des
+# tables et enregistrements par défaut à la première connexion.
+# Aussi activable sans recompiler : variable d'environnement COMMON_FAST_STARTUP=1.
+FAST_STARTUP = False
+
+# True = audit des requêtes (développement) : EXPLAIN QUERY PLAN sur chaque forme
+# de requête SQL distincte, les parcours complets de table sont signalés dans le log.
+# Aussi activable par la variable d'environnement COMMON_QUERY_AUDIT=1.
+QUERY_AUDIT = False
+
 
 def license_required():
     """Retourne False si la licence ne doit pas bloquer l'application."""
@@ -194,6 +279,16 @@ def license_required():
     return LICENSE_REQUIRED
 
 
+def fast_startup():
+    """Retourne True si l'initialisation de la base est différée à la première utilisation."""
+    return FAST_STARTUP or _env_flag("COMMON_FAST_STARTUP")
+
+
+def query_audit():
+    """Retourne True si les plans des requêtes SQL doivent être audités."""
+    return QUERY_AUDIT or _env_flag("COMMON_QUERY_AUDIT")
+
+
 class CConstants:
     """Classe contenant les constantes de l'application"""
     
@@ -244,6 +339,7 @@ class CConstants:
     BASE_URL = BASE_URL
     LICENSE_REQUIRED = LICENSE_REQUIRED
     BACKUP_TO_USB = BACKUP_TO_USB
+    BACKUP_INCREMENTAL = BACKUP_INCREMENTAL
 
     def __init__(self):
         pass
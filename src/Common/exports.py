@@ -8,13 +8,21 @@ import os
 import platform
 import shutil
 import sqlite3
+import tempfile
 from datetime import datetime
 
-import psutil
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QWidget
 
+from .backup import (
+    backup_database,
+    prune_snapshots,
+    restore_snapshot,
+    snapshot_database,
+    snapshot_time,
+)
 from .models import DB_FILE, Organization, Version, dbh, init_database
 from .ui.util import get_lcse_file, raise_error, raise_success, uopen_file
+from .connections import close_for_replace
 from .cstatic import logger
 
 DATETIME = f"{datetime.now().strftime('%m-%d-%Y_%Hh%Mm%Ss')}"
@@ -25,21 +33,21 @@ def export_database_as_file():
     file_path, _ = file_dialog.getSaveFileName(
         QWidget(),
         "Sauvegarder la base de Donnée.",
-        "Sauvegarde du {} {}.db".format(DATETIME, Organization.get(id=1).name_orga),
+        "Sauvegarde du {} {}.db".format(DATETIME, Organization.cached().name_orga),
         "*.db",
     )
     if not file_path:  # Check if the user canceled the dialog
         return None
 
     try:
-        shutil.copyfile(DB_FILE, file_path)
+        backup_database(file_path, DB_FILE)
         Version().get(id=1).update_v()
         raise_success(
             "Les données ont été exportées correctement.",
             "Conservez ce fichier précieusement car il contient toutes vos données.\n"
             "Exportez vos données régulièrement.",
         )
-    except IOError:
+    except (IOError, sqlite3.Error):
         raise_error(
             "La base de données n'a pas pu être exportée.",
             "Vérifiez le chemin de destination puis re-essayez.\n\n                   "
@@ -53,16 +61,16 @@ def export_backup(folder=None, dst_folder=None):
     path_backup = "{path}-{date}-{name}".format(
         path=os.path.join(directory, "BACKUP"),
         date=DATETIME,
-        name=Organization.get(id=1).name_orga,
+        name=Organization.cached().name_orga,
     )
 
     if not directory:
         return None
     try:
-        # TODO Savegarde version incremat de in db
-        shutil.copyfile(DB_FILE, os.path.join(path_backup, DB_FILE))
+        os.makedirs(path_backup, exist_ok=True)
+        backup_database(os.path.join(path_backup, os.path.basename(DB_FILE)), DB_FILE)
         Version().get(id=1).update_v()
-    except IOError:
+    except (IOError, sqlite3.Error):
         print("Error of copy database file")
     except Exception as e:
         print(e)
@@ -212,11 +220,13 @@ def get_database_info(db_path):
 def import_backup(folder=None, dst_folder=None):
     """
     Importe une sauvegarde de base de données avec validation et vérification d'intégrité.
+    Accepte un fichier .db ou un manifeste d'instantané (backups/store/snapshots/*.json).
     
     Args:
         folder: Dossier source (non utilisé actuellement)
         dst_folder: Dossier de destination (non utilisé actuellement)
     """
+    snapshot_tmp = None
     try:
         # Déterminer le chemin absolu du fichier de base de données actuel
         # Utiliser DB_FILE directement qui devrait être un chemin absolu ou relatif
@@ -240,7 +250,9 @@ def import_backup(folder=None, dst_folder=None):
             QWidget(), 
             "📂 Sélectionner le fichier de sauvegarde à importer", 
             "", 
-            "Fichiers de base de données (*.db);;Tous les fichiers (*)"
+            "Fichiers de base de données (*.db);;"
+            "Instantanés de sauvegarde (*.json);;"
+            "Tous les fichiers (*)"
         )
 
         # Si l'utilisateur n'a pas sélectionné de fichier
@@ -249,7 +261,26 @@ def import_backup(folder=None, dst_folder=None):
             return
 
         logger.info(f"Fichier sélectionné pour l'import: {name_select_f}")
-        
+        source_name = os.path.basename(name_select_f)
+        source_date = None
+
+        # Instantané incrémental : reconstituer la base dans un fichier temporaire
+        if name_select_f.lower().endswith(".json"):
+            source_date = snapshot_time(name_select_f)
+            fd, snapshot_tmp = tempfile.mkstemp(suffix=".db", prefix="mrestore_")
+            os.close(fd)
+            try:
+                restore_snapshot(name_select_f, snapshot_tmp)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Restauration de l'instantané impossible: {e}")
+                raise_error(
+                    "❌ Instantané illisible",
+                    f"L'instantané sélectionné n'a pas pu être reconstitué.\n\n"
+                    f"Erreur: {str(e)}"
+                )
+                return
+            name_select_f = snapshot_tmp
+
         # Valider le fichier sélectionné
         is_valid, integrity_check, error_msg = validate_sqlite_database(name_select_f)
         
@@ -266,6 +297,8 @@ def import_backup(folder=None, dst_folder=None):
         
         # Récupérer les informations sur la base de données à importer
         db_info = get_database_info(name_select_f)
+        if source_date is not None:
+            db_info['modified'] = source_date
         
         # Récupérer les informations sur la base de données actuelle (si elle existe)
         current_db_info = None
@@ -274,7 +307,7 @@ def import_backup(folder=None, dst_folder=None):
         
         # Préparer le message de confirmation avec les informations
         confirm_message = f"📊 Informations sur la sauvegarde à importer:\n\n"
-        confirm_message += f"📁 Fichier: {os.path.basename(name_select_f)}\n"
+        confirm_message += f"📁 Fichier: {source_name}\n"
         confirm_message += f"💾 Taille: {db_info['size_mb']} MB\n"
         if db_info['modified']:
             confirm_message += f"📅 Date de modification: {db_info['modified'].strftime('%d/%m/%Y %H:%M:%S')}\n"
@@ -309,13 +342,22 @@ def import_backup(folder=None, dst_folder=None):
             logger.info("Import annulé par l'utilisateur")
             return
         
-        # Fermer la connexion à la base de données actuelle si elle est ouverte
-        if dbh is not None and not dbh.is_closed():
+        # Fermer toutes les connexions à la base actuelle (lectures des exports
+        # comprises) et vider le WAL : sinon l'ancien -wal serait rejoué sur le
+        # fichier importé à la prochaine ouverture
+        if dbh is not None:
             logger.info("Fermeture de la connexion à la base de données actuelle")
             try:
-                dbh.close()
+                close_for_replace(dbh)
             except Exception as e:
-                logger.warning(f"Erreur lors de la fermeture de la base de données: {e}")
+                logger.error(f"Base de données encore utilisée: {e}")
+                raise_error(
+                    "❌ Base de données occupée",
+                    f"La base de données actuelle est encore utilisée.\n\n"
+                    f"Erreur: {str(e)}\n\n"
+                    f"Attendez la fin des exports en cours puis réessayez."
+                )
+                return
         
         # Créer une sauvegarde de la base de données actuelle (si elle existe)
         backup_file_path = None
@@ -329,7 +371,7 @@ def import_backup(folder=None, dst_folder=None):
                 backup_file_path = os.path.join(backup_dir, backup_file_name)
                 
                 logger.info(f"Création d'une sauvegarde: {backup_file_path}")
-                shutil.copy2(path_db_file, backup_file_path)
+                backup_database(backup_file_path, path_db_file)
                 logger.info("✅ Sauvegarde créée avec succès")
             except Exception as e:
                 logger.error(f"Erreur lors de la création de la sauvegarde: {e}")
@@ -373,8 +415,8 @@ def import_backup(folder=None, dst_folder=None):
         # Réinitialiser la connexion à la base de données
         try:
             logger.info("Réinitialisation de la connexion à la base de données")
-            # Réinitialiser la variable globale dbh
-            init_database()
+            # Nouveau fichier : refaire les vérifications (tables, valeurs par défaut)
+            init_database(force=True)
             logger.info("✅ Base de données réinitialisée")
         except Exception as e:
             logger.error(f"Erreur lors de la réinitialisation de la base de données: {e}")
@@ -429,6 +471,12 @@ def import_backup(folder=None, dst_folder=None):
             f"Erreur: {str(e)}\n\n"
             f"Veuillez contacter le support si le problème persiste."
         )
+    finally:
+        if snapshot_tmp:
+            try:
+                os.unlink(snapshot_tmp)
+            except OSError:
+                pass
 
 
 def upload_file(folder=None, dst_folder=None, type_f=None):
@@ -476,6 +524,8 @@ def get_usb_drives():
     
     usb_drives = []
     try:
+        import psutil  # import différé : inutile au démarrage
+
         partitions = psutil.disk_partitions(all=True)
         
         for partition in partitions:
@@ -556,6 +606,8 @@ def select_usb_drive(parent=None):
     Returns:
         str: Chemin de la clé USB sélectionnée, ou None si aucune sélection
     """
+    import psutil  # import différé : inutile au démarrage
+
     from .cstatic import logger
     
     usb_drives = get_usb_drives()
@@ -698,6 +750,27 @@ def _prune_backup_dir(backup_dir, max_backups):
         logger.warning("Erreur lors du nettoyage des anciennes sauvegardes: %s", e)
 
 
+def _backup_into_dir(db_file_abs, backup_dir, max_backups):
+    """
+    Sauvegarde en ligne dans ``backup_dir`` : instantané incrémental dans
+    ``backup_dir/store`` si BACKUP_INCREMENTAL (rétention heure / jour / semaine),
+    sinon fichier ``backup_<date>.db`` (les ``max_backups`` plus récents gardés).
+    Lève sqlite3.Error / OSError en cas d’échec.
+    """
+    from . import cstatic
+
+    if cstatic.BACKUP_INCREMENTAL:
+        store_dir = os.path.join(backup_dir, "store")
+        manifest = snapshot_database(store_dir, db_file_abs)
+        prune_snapshots(store_dir)
+        return manifest
+    backup_filename = f"backup_{datetime.now().strftime('%Y-%m-%d_%Hh%Mm%Ss')}.db"
+    backup_path = os.path.join(backup_dir, backup_filename)
+    backup_database(backup_path, db_file_abs)
+    _prune_backup_dir(backup_dir, max_backups)
+    return backup_path
+
+
 def _save_database_local(max_backups=10):
     """Sauvegarde silencieuse vers le dossier backups/ à côté de database.db (pas de dialogue)."""
     db_file_abs = os.path.abspath(DB_FILE)
@@ -710,15 +783,12 @@ def _save_database_local(max_backups=10):
     except OSError as e:
         logger.warning("Sauvegarde locale: impossible de créer %s : %s", backup_dir, e)
         return False
-    backup_filename = f"backup_{datetime.now().strftime('%Y-%m-%d_%Hh%Mm%Ss')}.db"
-    backup_path = os.path.join(backup_dir, backup_filename)
     try:
-        shutil.copy2(db_file_abs, backup_path)
+        backup_path = _backup_into_dir(db_file_abs, backup_dir, max_backups)
         logger.info("Sauvegarde locale: %s", backup_path)
-    except (OSError, IOError) as e:
+    except (OSError, IOError, sqlite3.Error) as e:
         logger.warning("Sauvegarde locale échouée: %s", e)
         return False
-    _prune_backup_dir(backup_dir, max_backups)
     return True
 
 
@@ -749,15 +819,12 @@ def _save_database_on_usb(max_backups=10, parent=None):
             )
             return False
 
-        backup_filename = f"backup_{datetime.now().strftime('%Y-%m-%d_%Hh%Mm%Ss')}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
-
         try:
-            shutil.copy2(db_file_abs, backup_path)
+            backup_path = _backup_into_dir(db_file_abs, backup_dir, max_backups)
             logger.info(
                 "Sauvegarde de la base de données sur clé USB: %s", backup_path
             )
-        except (IOError, OSError) as e:
+        except (IOError, OSError, sqlite3.Error) as e:
             logger.error("Erreur lors de la copie vers la clé USB: %s", e)
             raise_error(
                 "Erreur de sauvegarde",
@@ -769,8 +836,6 @@ def _save_database_on_usb(max_backups=10, parent=None):
             )
             return False
 
-        _prune_backup_dir(backup_dir, max_backups)
-
         return True
 
     except Exception as e:
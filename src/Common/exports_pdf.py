@@ -12,6 +12,7 @@ import tempfile
 from datetime import datetime
 from html import escape
 from io import BytesIO
+from itertools import chain, islice
 from pathlib import Path
 
 from reportlab.lib import colors
@@ -20,15 +21,26 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import Image as RLImage
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-from reportlab.platypus.tables import Table, TableStyle
+from reportlab.platypus.tables import LongTable, Table, TableStyle
 
 from .cstatic import CConstants, logger
-from .models import Organization
-from .org_logo import decode_org_logo_bytes
+from .org_logo import org_letterhead
 from .ui.util import openFile
 
+# Au-delà de LONG_TABLE_THRESHOLD lignes, le tableau est découpé en
+# sous-tableaux de LONG_TABLE_CHUNK_ROWS lignes (une dizaine de pages A4).
+LONG_TABLE_THRESHOLD = 2000
+LONG_TABLE_CHUNK_ROWS = 500
+
+# Résolution maximale du logo embarqué (1,45 pouce à 300 dpi).
+PDF_LOGO_MAX_PX = 435
+
+_CELL_FONT = "Helvetica"
+_CELL_PADDING = 4
+
 
 def _rp(text) -> str:
     """Texte sûr pour ReportLab Paragraph (sous-ensemble HTML)."""
@@ -37,24 +49,17 @@ def _rp(text) -> str:
     return escape(str(text), quote=False).replace("\n", "<br/>")
 
 
-def _build_org_logo_flowable(logo_field, max_width: float) -> RLImage | None:
+def _build_org_logo_flowable(letterhead, max_width: float) -> RLImage | None:
     """Image ReportLab redimensionnée (ratio conservé si Pillow disponible)."""
-    raw = decode_org_logo_bytes(logo_field)
-    if not raw:
+    logo = letterhead.logo_png(PDF_LOGO_MAX_PX, PDF_LOGO_MAX_PX)
+    if not logo:
         return None
+    png, wi, hi = logo
     try:
-        from PIL import Image as PILImage
-
-        pil = PILImage.open(BytesIO(raw))
-        pil.load()
-        wi, hi = pil.size
-        if wi > 0 and hi > 0:
+        if wi and hi:
             h = max_width * hi / float(wi)
-            return RLImage(BytesIO(raw), width=max_width, height=h)
-    except Exception:
-        pass
-    try:
-        return RLImage(BytesIO(raw), width=max_width, height=max_width)
+            return RLImage(BytesIO(png), width=max_width, height=h)
+        return RLImage(BytesIO(png), width=max_width, height=max_width)
     except Exception:
         # logger.debug("Logo organisation non utilisable dans le PDF: %s", e)
         return None
@@ -84,9 +89,10 @@ def _compose_pdf_story(dict_data: dict) -> tuple[list, str]:
     period = dict_data.get("period") or ""
 
     try:
-        org = Organization.get(id=1)
+        letterhead = org_letterhead()
+        org = letterhead.org
     except Exception:
-        org = None
+        letterhead = org = None
 
     style_sheet = getSampleStyleSheet()
     style_cell = ParagraphStyle(
@@ -131,7 +137,7 @@ def _compose_pdf_story(dict_data: dict) -> tuple[list, str]:
 
     if org:
         logo_max = 1.45 * inch
-        logo_img = _build_org_logo_flowable(getattr(org, "logo_orga", None), logo_max)
+        logo_img = _build_org_logo_flowable(letterhead, logo_max)
         if logo_img:
             logo_wrap = Table(
                 [[logo_img]],
@@ -190,18 +196,60 @@ def _compose_pdf_story(dict_data: dict) -> tuple[list, str]:
             pass
         return story, title
 
-    ldata = [[Paragraph(_rp(h), style_cell) for h in headers]]
-    for r in rows:
-        row_table = []
-        for cell in r:
-            row_table.append(Paragraph(_rp(cell), style_cell))
-        ldata.append(row_table)
-
     ncols = len(headers)
     usable_w = 6.35 * inch
     col_widths = _default_col_widths(ncols, float(usable_w))
+    header_row = [Paragraph(_rp(h), style_cell) for h in headers]
+
+    rows = iter(rows)
+    head = list(islice(rows, LONG_TABLE_THRESHOLD + 1))
+    if len(head) <= LONG_TABLE_THRESHOLD:
+        # rapport ordinaire : un seul tableau, en-tête répété à chaque page
+        body = [_pdf_row(r, col_widths, style_cell) for r in head]
+        story.append(_build_pdf_table([header_row] + body, col_widths, True))
+        return story, title
+
+    # Mode « long tableau » : ReportLab recalcule toutes les lignes restantes à
+    # chaque coupure de page, d’où un coût quadratique sur un seul Table. On
+    # produit des sous-tableaux de LONG_TABLE_CHUNK_ROWS lignes qui se suivent
+    # sans saut de page ; repeatRows remet l’en-tête en haut de chaque page.
+    chunk = []
+    for r in chain(head, rows):
+        if len(chunk) == LONG_TABLE_CHUNK_ROWS:
+            story.append(
+                _build_pdf_table([header_row] + chunk, col_widths, False)
+            )
+            chunk = []
+        chunk.append(_pdf_row(r, col_widths, style_cell))
+    story.append(_build_pdf_table([header_row] + chunk, col_widths, True))
+
+    return story, title
 
-    btable = Table(ldata, colWidths=col_widths, repeatRows=1)
+
+def _pdf_row(row, col_widths: list[float], style_cell) -> list:
+    """
+    Cellules d’une ligne : chaîne brute si le texte tient sur une ligne,
+    Paragraph (retour à la ligne) sinon — bien moins coûteux à mettre en page.
+    """
+    cells = []
+    for i, cell in enumerate(row):
+        text = "" if cell is None else str(cell)
+        width = col_widths[i] if i < len(col_widths) else col_widths[-1]
+        if "\n" in text or stringWidth(
+            text, _CELL_FONT, style_cell.fontSize
+        ) > width - 2 * _CELL_PADDING:
+            cells.append(Paragraph(_rp(text), style_cell))
+        else:
+            cells.append(text)
+    return cells
+
+
+def _build_pdf_table(ldata: list, col_widths: list[float], last_is_total: bool):
+    """
+    Tableau de données stylé ; ``ldata[0]`` est l’en-tête. La dernière ligne
+    est mise en forme comme ligne de total si ``last_is_total``.
+    """
+    btable = LongTable(ldata, colWidths=col_widths, repeatRows=1)
     btable.hAlign = "LEFT"
 
     nrows = len(ldata)
@@ -210,23 +258,28 @@ def _compose_pdf_story(dict_data: dict) -> tuple[list, str]:
         ("TEXTCOLOR", (0, 0), (-1, 0), HexColor("#1a237e")),
         ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
         ("FONTSIZE", (0, 0), (-1, 0), 9),
+        # cellules en chaîne brute : même rendu que le style Paragraph « Cell »
+        ("FONTNAME", (0, 1), (-1, -1), _CELL_FONT),
+        ("FONTSIZE", (0, 1), (-1, -1), 8),
+        ("LEADING", (0, 1), (-1, -1), 10),
         ("GRID", (0, 0), (-1, -1), 0.5, HexColor("#BDBDBD")),
         ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 4),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+        ("LEFTPADDING", (0, 0), (-1, -1), _CELL_PADDING),
+        ("RIGHTPADDING", (0, 0), (-1, -1), _CELL_PADDING),
         ("TOPPADDING", (0, 0), (-1, -1), 3),
         ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
     ]
+    last_body = -2 if last_is_total else -1
     if nrows > 2:
         ts.append(
             (
                 "ROWBACKGROUNDS",
                 (0, 1),
-                (-1, -2),
+                (-1, last_body),
                 [colors.white, HexColor("#FAFAFA")],
             )
         )
-    if nrows >= 2:
+    if last_is_total and nrows >= 2:
         ts += [
             ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
             ("FONTSIZE", (0, -1), (-1, -1), 9),
@@ -235,12 +288,12 @@ def _compose_pdf_story(dict_data: dict) -> tuple[list, str]:
         ]
 
     btable.setStyle(TableStyle(ts))
-    story.append(btable)
-
-    return story, title
+    return btable
 
 
-def _render_pdf_bytes(dict_data: dict) -> bytes:
+def _render_pdf_bytes(dict_data: dict, progress=None) -> bytes:
+    """PDF complet en mémoire. ``progress(pages, total)`` est appelé à chaque page
+    (``total`` vaut None jusqu’à la fin) ; une exception levée l’interrompt."""
     story, doc_title = _compose_pdf_story(dict_data)
     buf = BytesIO()
     doc = SimpleDocTemplate(
@@ -253,6 +306,17 @@ def _render_pdf_bytes(dict_data: dict) -> bytes:
         title=str(doc_title)[:120],
         author=str(CConstants.APP_NAME),
     )
+    if progress is not None:
+        pages = [0]
+
+        def _on_progress(typ, value):
+            if typ == "PAGE":
+                pages[0] = value
+                progress(value, None)
+            elif typ == "FINISHED":
+                progress(pages[0], pages[0])
+
+        doc.setProgressCallBack(_on_progress)
     doc.build(story)
     return buf.getvalue()
 
@@ -348,6 +412,54 @@ def _show_pdf_preview_dialog(temp_path: str, file_base: str) -> str | None:
     return chosen[0]
 
 
+def _show_pdf_error(e) -> None:
+    """Boîte d’erreur si une application Qt tourne (génération PDF échouée)."""
+    try:
+        from PyQt6.QtWidgets import QApplication, QMessageBox
+
+        if QApplication.instance() is not None:
+            QMessageBox.critical(
+                None,
+                "Export PDF",
+                "La génération du PDF a échoué.\n\n"
+                f"Détail : {e!s}",
+            )
+    except Exception:
+        pass
+
+
+def _finish_pdf_export(tmp_path: str, file_base: str) -> str | None:
+    """
+    Aperçu puis « Enregistrer sous… » du PDF ``tmp_path`` et ouverture du fichier final.
+    Retourne le chemin enregistré ou None (annulé). ``tmp_path`` reste à la charge de l’appelant.
+    """
+    dest = _show_pdf_preview_dialog(tmp_path, str(file_base))
+    if not dest:
+        logger.info("Export PDF : enregistrement annulé après aperçu")
+        return None
+
+    shutil.copy2(tmp_path, dest)
+    logger.info("PDF enregistré : %s", dest)
+    abs_dest = os.path.abspath(os.path.normpath(dest))
+    opened = False
+    try:
+        from PyQt6.QtCore import QUrl
+        from PyQt6.QtGui import QDesktopServices
+        from PyQt6.QtWidgets import QApplication
+
+        if QApplication.instance() is not None:
+            opened = bool(
+                QDesktopServices.openUrl(QUrl.fromLocalFile(abs_dest))
+            )
+    except Exception as e:
+        logger.debug("QDesktopServices.openUrl PDF: %s", e)
+    if not opened and openFile(abs_dest) != 0:
+        logger.warning(
+            "Impossible d’ouvrir le PDF automatiquement : %s", abs_dest
+        )
+    return dest
+
+
 def export_dynamic_data(dict_data):
     """
     Génère le PDF, affiche l’aperçu, puis enregistre au chemin choisi.
@@ -359,18 +471,7 @@ def export_dynamic_data(dict_data):
         pdf_bytes = _render_pdf_bytes(dict_data)
     except Exception as e:
         logger.exception("Erreur génération PDF: %s", e)
-        try:
-            from PyQt6.QtWidgets import QApplication, QMessageBox
-
-            if QApplication.instance() is not None:
-                QMessageBox.critical(
-                    None,
-                    "Export PDF",
-                    "La génération du PDF a échoué.\n\n"
-                    f"Détail : {e!s}",
-                )
-        except Exception:
-            pass
+        _show_pdf_error(e)
         return
 
     fd, tmp_path = tempfile.mkstemp(suffix=".pdf", prefix="mpreview_")
@@ -379,30 +480,7 @@ def export_dynamic_data(dict_data):
         with open(tmp_path, "wb") as f:
             f.write(pdf_bytes)
 
-        dest = _show_pdf_preview_dialog(tmp_path, str(file_base))
-        if not dest:
-            logger.info("Export PDF : enregistrement annulé après aperçu")
-            return
-
-        shutil.copy2(tmp_path, dest)
-        logger.info("PDF enregistré : %s", dest)
-        abs_dest = os.path.abspath(os.path.normpath(dest))
-        opened = False
-        try:
-            from PyQt6.QtCore import QUrl
-            from PyQt6.QtGui import QDesktopServices
-            from PyQt6.QtWidgets import QApplication
-
-            if QApplication.instance() is not None:
-                opened = bool(
-                    QDesktopServices.openUrl(QUrl.fromLocalFile(abs_dest))
-                )
-        except Exception as e:
-            logger.debug("QDesktopServices.openUrl PDF: %s", e)
-        if not opened and openFile(abs_dest) != 0:
-            logger.warning(
-                "Impossible d’ouvrir le PDF automatiquement : %s", abs_dest
-            )
+        _finish_pdf_export(tmp_path, str(file_base))
     finally:
         try:
             os.unlink(tmp_path)
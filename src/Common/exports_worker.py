@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Exports PDF / XLSX en arrière-plan (QThreadPool) — l’interface reste réactive.
+
+Chaque export est un ``ExportJob`` : la génération se fait dans un thread du
+pool, puis le fichier temporaire est remis sur le thread GUI aux mêmes
+dialogues que l’export synchrone (aperçu PDF, « Enregistrer sous… » Excel).
+
+    from Common.exports_worker import submit_export
+
+    job = submit_export("xlsx", dict_data)
+    job.signals.progress.connect(lambda job, done, total: ...)
+    job.cancel()
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from threading import Event
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from .connections import connection_for_thread
+from .cstatic import logger
+
+PDF = "pdf"
+XLSX = "xlsx"
+
+# Exports simultanés au maximum ; les suivants attendent dans la file du pool.
+MAX_CONCURRENT_EXPORTS = 2
+
+
+class ExportCancelled(Exception):
+    """Levée dans le thread d’export quand le job a été annulé."""
+
+
+class ExportJobSignals(QObject):
+    # (job, fait, total) — total vaut None tant qu’il est inconnu
+    progress = pyqtSignal(object, int, object)
+    # (job, fichier temporaire généré)
+    finished = pyqtSignal(object, str)
+    # (job, message d’erreur)
+    failed = pyqtSignal(object, str)
+    cancelled = pyqtSignal(object)
+
+
+class ExportJob(QRunnable):
+    """Génère un export dans un fichier temporaire, hors du thread GUI."""
+
+    def __init__(self, kind, dict_data):
+        super().__init__()
+        if kind not in (PDF, XLSX):
+            raise ValueError(f"Type d'export inconnu : {kind}")
+        self.kind = kind
+        self.dict_data = dict_data
+        self.file_base = str(dict_data.get("file_name") or "export")
+        self.signals = ExportJobSignals()
+        self._cancel = Event()
+        # le service garde la référence Python : pas de suppression côté Qt
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def _progress(self, done, total):
+        if self._cancel.is_set():
+            raise ExportCancelled()
+        self.signals.progress.emit(self, int(done), total)
+
+    def run(self):
+        if self._cancel.is_set():
+            self.signals.cancelled.emit(self)
+            return
+        fd, tmp_path = tempfile.mkstemp(suffix=f".{self.kind}", prefix="mexport_")
+        os.close(fd)
+        try:
+            # lecture seule : l'export ne bloque pas les écritures de l'interface
+            with connection_for_thread(read_only=True):
+                self._render(tmp_path)
+        except ExportCancelled:
+            logger.info("Export %s annulé : %s", self.kind, self.file_base)
+            _unlink(tmp_path)
+            self.signals.cancelled.emit(self)
+            return
+        except Exception as e:
+            logger.exception("Erreur génération %s: %s", self.kind, e)
+            _unlink(tmp_path)
+            self.signals.failed.emit(self, str(e))
+            return
+        self.signals.finished.emit(self, tmp_path)
+
+    def _render(self, tmp_path):
+        if self.kind == PDF:
+            from .exports_pdf import _render_pdf_bytes
+
+            pdf_bytes = _render_pdf_bytes(self.dict_data, self._progress)
+            with open(tmp_path, "wb") as f:
+                f.write(pdf_bytes)
+        else:
+            from .exports_xlsx import _write_xlsx_to_path
+
+            _write_xlsx_to_path(self.dict_data, tmp_path, self._progress)
+
+
+class ExportService(QObject):
+    """File d’exports exécutés par un QThreadPool dédié.
+
+    Les signaux sont relayés sur le thread GUI ; quand ``preview`` est vrai,
+    le fichier généré passe par le dialogue habituel puis est supprimé.
+    """
+
+    job_started = pyqtSignal(object)
+    job_finished = pyqtSignal(object, str)
+    job_failed = pyqtSignal(object, str)
+    job_cancelled = pyqtSignal(object)
+
+    def __init__(self, parent=None, max_threads=MAX_CONCURRENT_EXPORTS):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._jobs = {}
+
+    def submit(self, kind, dict_data, preview=True):
+        """Met un export en file et retourne le ``ExportJob``."""
+        job = ExportJob(kind, dict_data)
+        job.preview = preview
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.cancelled.connect(self._on_cancelled)
+        self._jobs[id(job)] = job
+        self.pool.start(job)
+        self.job_started.emit(job)
+        return job
+
+    def cancel(self, job):
+        job.cancel()
+        # pas encore démarré : on le retire directement de la file
+        if self.pool.tryTake(job):
+            self._on_cancelled(job)
+
+    def cancel_all(self):
+        for job in list(self._jobs.values()):
+            self.cancel(job)
+
+    def pending_jobs(self):
+        return list(self._jobs.values())
+
+    def wait_for_done(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def _on_finished(self, job, tmp_path):
+        self._jobs.pop(id(job), None)
+        self.job_finished.emit(job, tmp_path)
+        if not getattr(job, "preview", True):
+            return
+        try:
+            if job.kind == PDF:
+                from .exports_pdf import _finish_pdf_export
+
+                _finish_pdf_export(tmp_path, job.file_base)
+            else:
+                from .exports_xlsx import _finish_xlsx_export
+
+                _finish_xlsx_export(tmp_path, job.file_base)
+        finally:
+            _unlink(tmp_path)
+
+    def _on_failed(self, job, message):
+        self._jobs.pop(id(job), None)
+        self.job_failed.emit(job, message)
+        if getattr(job, "preview", True):
+            if job.kind == PDF:
+                from .exports_pdf import _show_pdf_error
+
+                _show_pdf_error(message)
+            else:
+                from .exports_xlsx import _show_xlsx_error
+
+                _show_xlsx_error(message)
+
+    def _on_cancelled(self, job):
+        if self._jobs.pop(id(job), None) is not None:
+            self.job_cancelled.emit(job)
+
+
+_service = None
+
+
+def export_service():
+    """Service partagé (créé au premier appel, une QApplication doit exister)."""
+    global _service
+    if _service is None:
+        _service = ExportService()
+    return _service
+
+
+def submit_export(kind, dict_data, preview=True):
+    """Équivalent non bloquant de ``exports_pdf/exports_xlsx.export_dynamic_data``."""
+    return export_service().submit(kind, dict_data, preview)
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -10,13 +10,14 @@ import os
 import shutil
 import tempfile
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 
 import xlsxwriter
 
 from .cstatic import CConstants, logger
 from .models import Organization
-from .org_logo import write_org_logo_temp_file
+from .org_logo import image_suffix_from_bytes, org_letterhead
 from .ui.util import openFile
 
 style_org = {
@@ -39,6 +40,9 @@ style_headers = {"border": 1}
 ORG_LOGO_XLSX_WIDTH_PX = 200
 ORG_LOGO_XLSX_HEIGHT_PX = 72
 
+# Export en flux : fréquence (en lignes) des appels au callback de progression.
+PROGRESS_EVERY = 1000
+
 
 def _sanitize_excel_sheet_name(name: str) -> str:
     """Excel / xlsxwriter : pas de [] : * ? / \\, longueur <= 31, pas d’apostrophe en tête/fin."""
@@ -49,10 +53,18 @@ def _sanitize_excel_sheet_name(name: str) -> str:
     return s or "Feuil1"
 
 
-def _org_logo_xlsx_image_options(image_path: str) -> dict:
-    """Échelle xlsxwriter pour afficher le logo dans une zone de taille fixe (ratio conservé)."""
+def _xlsx_logo_scale(nw, nh) -> dict:
+    """Échelle xlsxwriter pour afficher une image ``nw`` × ``nh`` dans la zone du logo."""
     opts = {"x_offset": 2, "y_offset": 2}
+    if not nw or not nh or nw < 1 or nh < 1:
+        return {**opts, "x_scale": 1.0, "y_scale": 1.0}
     tw, th = ORG_LOGO_XLSX_WIDTH_PX, ORG_LOGO_XLSX_HEIGHT_PX
+    scale = min(tw / float(nw), th / float(nh))
+    return {**opts, "x_scale": scale, "y_scale": scale}
+
+
+def _org_logo_xlsx_image_options(image_path: str) -> dict:
+    """Échelle xlsxwriter pour afficher le logo dans une zone de taille fixe (ratio conservé)."""
     try:
         from PIL import Image
 
@@ -60,23 +72,75 @@ def _org_logo_xlsx_image_options(image_path: str) -> dict:
             im.load()
             nw, nh = im.size
     except Exception:
-        return {**opts, "x_scale": 1.0, "y_scale": 1.0}
-    if nw < 1 or nh < 1:
-        return {**opts, "x_scale": 1.0, "y_scale": 1.0}
-    scale = min(tw / float(nw), th / float(nh))
-    return {**opts, "x_scale": scale, "y_scale": scale}
+        return _xlsx_logo_scale(None, None)
+    return _xlsx_logo_scale(nw, nh)
+
+
+def _xlsx_logo_image(letterhead):
+    """
+    (chemin, options insert_image) du logo : celui de l’organisation, pris dans
+    l’en-tête ``letterhead`` et passé en mémoire (``image_data``), sinon APP_LOGO.
+    (None, None) s’il n’y en a aucun.
+    """
+    # rendu à 2× la zone d’affichage pour rester net une fois réduit par Excel
+    logo = letterhead.logo_png(
+        2 * ORG_LOGO_XLSX_WIDTH_PX, 2 * ORG_LOGO_XLSX_HEIGHT_PX
+    )
+    if logo:
+        data, nw, nh = logo
+        options = _xlsx_logo_scale(nw, nh)
+        options["image_data"] = BytesIO(data)
+        return "logo_organisation" + image_suffix_from_bytes(data), options
+    if CConstants.APP_LOGO:
+        app_logo_p = Path(str(CConstants.APP_LOGO))
+        if app_logo_p.is_file():
+            return str(app_logo_p), _org_logo_xlsx_image_options(str(app_logo_p))
+    return None, None
+
+
+def _is_streamed(data) -> bool:
+    """Les listes/tuples passent par add_table ; tout autre itérable est écrit en flux."""
+    return not isinstance(data, (list, tuple))
+
+
+def _write_table_rows(worksheet, first_row: int, headers, data, header_format, progress=None) -> int:
+    """
+    Écrit l’en-tête puis les lignes une à une (mode ``constant_memory``).
+    Retourne le nombre de lignes de données écrites.
+    """
+    worksheet.write_row(first_row, 0, headers, header_format)
+    count = 0
+    for row in data:
+        worksheet.write_row(first_row + 1 + count, 0, row)
+        count += 1
+        if progress is not None and count % PROGRESS_EVERY == 0:
+            progress(count, None)
+    if progress is not None:
+        progress(count, count)
+    return count
 
 
-def _write_xlsx_to_path(dict_data: dict, output_path: str) -> None:
+def _write_xlsx_to_path(dict_data: dict, output_path: str, progress=None) -> None:
     """
     Écrit le classeur à ``output_path`` (fichier ou chemin pour xlsxwriter).
     Même logique qu’historiquement, sans dialogue ni ouverture.
+
+    ``dict_data["data"]`` peut être une liste (tableau Excel via add_table) ou
+    un itérable quelconque — générateur, ``query.tuples().iterator()`` peewee —
+    écrit ligne par ligne en mode ``constant_memory`` : la mémoire reste
+    constante quel que soit le nombre de lignes. ``progress(done, total)`` est
+    appelé pendant l’écriture (``total`` vaut None tant qu’il est inconnu) ;
+    une exception levée par le callback interrompt l’export.
     """
-    organization = Organization.get(id=1)
+    letterhead = org_letterhead()
+    organization = letterhead.org
 
     headers = dict_data.get("headers") or []
     sheet_name = _sanitize_excel_sheet_name(str(dict_data.get("sheet") or "Feuil1"))
-    data = dict_data.get("data") or []
+    data = dict_data.get("data")
+    if data is None:
+        data = []
+    streamed = _is_streamed(data)
     widths = dict_data.get("widths")
     date_ = str(dict_data.get("date"))
     extend_rows = dict_data.get("extend_rows")
@@ -98,124 +162,127 @@ def _write_xlsx_to_path(dict_data: dict, output_path: str) -> None:
     if date_ == "None":
         date_ = datetime.now()
 
-    logo_tmp: str | None = None
+    image_path, image_options = _xlsx_logo_image(letterhead)
+    workbook = xlsxwriter.Workbook(
+        output_path,
+        {"default_date_format": "dd/mm/yy", "constant_memory": streamed},
+    )
     try:
-        logo_tmp = write_org_logo_temp_file(getattr(organization, "logo_orga", None))
-        image_path: str | None = logo_tmp
-        if not image_path and CConstants.APP_LOGO:
-            app_logo_p = Path(str(CConstants.APP_LOGO))
-            if app_logo_p.is_file():
-                image_path = str(app_logo_p)
-
-        workbook = xlsxwriter.Workbook(output_path, {"default_date_format": "dd/mm/yy"})
-        try:
-            worksheet = workbook.add_worksheet(sheet_name)
-
-            date_format = workbook.add_format({"num_format": "d-mmm-yy"})
-            format1 = workbook.add_format()
-            format1.set_num_format("0.000")
-            money = workbook.add_format({"num_format": "#,## "})
-            style_def = workbook.add_format({})
-            rowx = 1
-            end_colx = len(headers) - 1
-            if image_path:
-                worksheet.insert_image(
-                    0,
-                    0,
-                    image_path,
-                    _org_logo_xlsx_image_options(image_path),
-                )
-                rowx += 6
-            else:
-                worksheet.merge_range(
-                    "A{}:E{}".format(rowx, rowx),
-                    organization.name_orga,
-                    workbook.add_format(style_org),
-                )
-                rowx += 1
-                worksheet.merge_range(
-                    "A{}:E{}".format(rowx, rowx),
-                    "Adresse : {}".format(organization.adress_org),
-                    style_def,
-                )
-                rowx += 1
-                worksheet.merge_range(
-                    "A{}:B{}".format(rowx, rowx),
-                    "BP : {}".format(organization.bp),
-                    style_def,
-                )
-                worksheet.merge_range(
-                    "{}{}:{}{}".format(
-                        dict_alph.get(end_colx - 1), rowx, dict_alph.get(end_colx), rowx
-                    ),
-                    "E-mail : {}".format(organization.email_org),
-                    style_def,
-                )
-                rowx += 1
-                worksheet.merge_range(
-                    "A{}:{}{}".format(rowx, dict_alph.get(end_colx - 1), rowx),
-                    "Tel : {}".format(organization.phone),
-                    style_def,
-                )
-                rowx += 2
-            if widths:
-                for col in widths:
-                    w = 120 / len(headers) if headers else 15
-                    worksheet.set_column(col, col, w)
-            columns = [({"header": item}) for item in headers]
-            end_row_table = len(data) + rowx + 3
-            if format_money:
-                for col_str in format_money:
-                    worksheet.set_column(col_str, 18, money)
+        worksheet = workbook.add_worksheet(sheet_name)
+
+        date_format = workbook.add_format({"num_format": "d-mmm-yy"})
+        format1 = workbook.add_format()
+        format1.set_num_format("0.000")
+        money = workbook.add_format({"num_format": "#,## "})
+        style_def = workbook.add_format({})
+        rowx = 1
+        end_colx = len(headers) - 1
+        if image_path:
+            worksheet.insert_image(
+                0,
+                0,
+                image_path,
+                image_options,
+            )
+            rowx += 6
+        else:
+            worksheet.merge_range(
+                "A{}:E{}".format(rowx, rowx),
+                organization.name_orga,
+                workbook.add_format(style_org),
+            )
+            rowx += 1
+            worksheet.merge_range(
+                "A{}:E{}".format(rowx, rowx),
+                "Adresse : {}".format(organization.adress_org),
+                style_def,
+            )
+            rowx += 1
+            worksheet.merge_range(
+                "A{}:B{}".format(rowx, rowx),
+                "BP : {}".format(organization.bp),
+                style_def,
+            )
+            worksheet.merge_range(
+                "{}{}:{}{}".format(
+                    dict_alph.get(end_colx - 1), rowx, dict_alph.get(end_colx), rowx
+                ),
+                "E-mail : {}".format(organization.email_org),
+                style_def,
+            )
             rowx += 1
             worksheet.merge_range(
-                "D{}:{}{}".format(rowx, dict_alph.get(end_colx), rowx),
-                date_,
-                date_format,
+                "A{}:{}{}".format(rowx, dict_alph.get(end_colx - 1), rowx),
+                "Tel : {}".format(organization.phone),
+                style_def,
             )
             rowx += 2
+        if widths:
+            for col in widths:
+                w = 120 / len(headers) if headers else 15
+                worksheet.set_column(col, col, w)
+        columns = [({"header": item}) for item in headers]
+        if format_money:
+            for col_str in format_money:
+                worksheet.set_column(col_str, 18, money)
+        rowx += 1
+        worksheet.merge_range(
+            "D{}:{}{}".format(rowx, dict_alph.get(end_colx), rowx),
+            date_,
+            date_format,
+        )
+        rowx += 2
+        if streamed:
+            # add_table() n’existe pas en constant_memory : en-tête mis en forme
+            count = _write_table_rows(
+                worksheet,
+                rowx - 1,
+                headers,
+                data,
+                workbook.add_format({**style_headers, "bold": True}),
+                progress,
+            )
+            end_row_table = count + rowx
+        else:
+            end_row_table = len(data) + rowx
             worksheet.add_table(
                 "A{}:{}{}".format(rowx, dict_alph.get(end_colx), end_row_table),
                 {"autofilter": 0, "data": data, "columns": columns},
             )
-            rowx = end_row_table
-            if extend_rows:
-                for elt in extend_rows:
-                    col, val = elt
-                    worksheet.write(rowx, col, val, money)
-                rowx += 1
-            if footers:
-                rowx += 1
-                for s_col, e_col, val in footers:
-                    worksheet.merge_range(
-                        "{}{}:{}{}".format(s_col, rowx, e_col, rowx),
-                        val,
-                        workbook.add_format(style_label),
-                    )
-                    rowx += 1
+            if progress is not None:
+                progress(len(data), len(data))
+        rowx = end_row_table
+        if extend_rows:
+            for elt in extend_rows:
+                col, val = elt
+                worksheet.write(rowx, col, val, money)
+            rowx += 1
+        if footers:
+            rowx += 1
+            for s_col, e_col, val in footers:
+                worksheet.merge_range(
+                    "{}{}:{}{}".format(s_col, rowx, e_col, rowx),
+                    val,
+                    workbook.add_format(style_label),
+                )
                 rowx += 1
-            if others:
+            rowx += 1
+        if others:
+            rowx += 1
+            for _pos, _pos2, val in others:
+                if val is None or str(val).strip() == "":
+                    continue
+                worksheet.merge_range(
+                    rowx,
+                    0,
+                    rowx,
+                    end_colx,
+                    str(val),
+                    workbook.add_format(style_label),
+                )
                 rowx += 1
-                for _pos, _pos2, val in others:
-                    if val is None or str(val).strip() == "":
-                        continue
-                    worksheet.merge_range(
-                        rowx,
-                        0,
-                        rowx,
-                        end_colx,
-                        str(val),
-                        workbook.add_format(style_label),
-                    )
-                    rowx += 1
-        finally:
-            workbook.close()
     finally:
-        if logo_tmp:
-            try:
-                os.unlink(logo_tmp)
-            except OSError:
-                pass
+        workbook.close()
 
 
 def _show_xlsx_export_dialog(temp_path: str, file_base: str) -> str | None:
@@ -296,10 +363,61 @@ def _show_xlsx_export_dialog(temp_path: str, file_base: str) -> str | None:
     return chosen[0]
 
 
-def export_dynamic_data(dict_data):
+def _show_xlsx_error(e) -> None:
+    """Boîte d’erreur si une application Qt tourne (génération Excel échouée)."""
+    try:
+        from PyQt6.QtWidgets import QApplication, QMessageBox
+
+        if QApplication.instance() is not None:
+            QMessageBox.critical(
+                None,
+                "Export Excel",
+                "La génération du classeur Excel a échoué.\n\n"
+                f"Détail : {e!s}",
+            )
+    except Exception:
+        pass
+
+
+def _finish_xlsx_export(tmp_path: str, file_base: str) -> str | None:
+    """
+    Dialogue « Enregistrer sous… » du classeur ``tmp_path`` et ouverture du fichier final.
+    Retourne le chemin enregistré ou None (annulé). ``tmp_path`` reste à la charge de l’appelant.
+    """
+    dest = _show_xlsx_export_dialog(tmp_path, str(file_base))
+    if not dest:
+        logger.info("Export Excel : enregistrement annulé après le dialogue")
+        return None
+
+    shutil.copy2(tmp_path, dest)
+    logger.info("Excel enregistré : %s", dest)
+    abs_dest = os.path.abspath(os.path.normpath(dest))
+    opened = False
+    try:
+        from PyQt6.QtCore import QUrl
+        from PyQt6.QtGui import QDesktopServices
+        from PyQt6.QtWidgets import QApplication
+
+        if QApplication.instance() is not None:
+            opened = bool(
+                QDesktopServices.openUrl(QUrl.fromLocalFile(abs_dest))
+            )
+    except Exception as e:
+        logger.debug("QDesktopServices.openUrl Excel: %s", e)
+    if not opened and openFile(abs_dest) != 0:
+        logger.warning(
+            "Impossible d’ouvrir le classeur automatiquement : %s", abs_dest
+        )
+    return dest
+
+
+def export_dynamic_data(dict_data, progress=None):
     """
     Génère le XLSX dans un fichier temporaire, affiche le dialogue (comme le PDF),
     enregistre au chemin choisi puis ouvre le fichier final.
+
+    ``dict_data["data"]`` peut être un itérable (export en flux, voir
+    ``_write_xlsx_to_path``) ; ``progress(done, total)`` suit l’écriture.
     """
     file_base = dict_data.get("file_name") or "export"
 
@@ -307,47 +425,13 @@ def export_dynamic_data(dict_data):
     try:
         os.close(fd)
         try:
-            _write_xlsx_to_path(dict_data, tmp_path)
+            _write_xlsx_to_path(dict_data, tmp_path, progress)
         except Exception as e:
             logger.exception("Erreur génération Excel: %s", e)
-            try:
-                from PyQt6.QtWidgets import QApplication, QMessageBox
-
-                if QApplication.instance() is not None:
-                    QMessageBox.critical(
-                        None,
-                        "Export Excel",
-                        "La génération du classeur Excel a échoué.\n\n"
-                        f"Détail : {e!s}",
-                    )
-            except Exception:
-                pass
-            return
-
-        dest = _show_xlsx_export_dialog(tmp_path, str(file_base))
-        if not dest:
-            logger.info("Export Excel : enregistrement annulé après le dialogue")
+            _show_xlsx_error(e)
             return
 
-        shutil.copy2(tmp_path, dest)
-        logger.info("Excel enregistré : %s", dest)
-        abs_dest = os.path.abspath(os.path.normpath(dest))
-        opened = False
-        try:
-            from PyQt6.QtCore import QUrl
-            from PyQt6.QtGui import QDesktopServices
-            from PyQt6.QtWidgets import QApplication
-
-            if QApplication.instance() is not None:
-                opened = bool(
-                    QDesktopServices.openUrl(QUrl.fromLocalFile(abs_dest))
-                )
-        except Exception as e:
-            logger.debug("QDesktopServices.openUrl Excel: %s", e)
-        if not opened and openFile(abs_dest) != 0:
-            logger.warning(
-                "Impossible d’ouvrir le classeur automatiquement : %s", abs_dest
-            )
+        _finish_xlsx_export(tmp_path, str(file_base))
     finally:
         try:
             os.unlink(tmp_path)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# vim: ai ts=4 sts=4 et sw=4 nu
+# maintainer: Fad
+
+"""Dates et fichiers joints : fonctions sans Qt, utilisables par models.
+
+Réexportées par ``ui.util`` pour les écrans qui les importaient de là.
+"""
+
+import os
+from datetime import datetime
+from time import mktime, strptime
+
+
+def date_to_str(date):
+    if not date:
+        return None
+    if isinstance(date, str):
+        d, m, y = date.split("/")
+        if len(y) == 4:
+            return "{}-{}-{}".format(y, m, d)
+        else:
+            return date.replace("/", "-")
+    return date.strftime("%Y-%m-%d")
+
+
+def datetime_to_str(date):
+    return mktime(strptime(date.strftime("%Y-%m-%d %H:%M:%S"), "%Y-%m-%d %H:%M:%S"))
+
+
+def to_jstimestamp(adate):
+    if not adate:
+        return int(to_timestamp(adate)) * 1000
+
+
+def to_timestamp(dt):
+    """
+    Return a timestamp for the given datetime object.
+    """
+    if not dt:
+        return (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+def copy_file(dest, path_filename):
+    """Copy the file, rename file in banc and return new name of the doc
+    created folder banc doc if not existe
+    """
+    import shutil
+
+    dest = os.path.join(os.path.dirname(os.path.abspath("__file__")), dest)
+    filename = os.path.basename(path_filename)
+    if not os.path.exists(dest):
+        os.makedirs(dest)
+    shutil.copyfile(path_filename, get_path(dest, filename))
+
+    return rename_file(dest, filename, slug_mane_file(filename))
+
+
+def rename_file(path, old_filename, new_filename):
+    """Rename file in banc docs  params: old_filename, new_filename
+    return newname"""
+    os.rename(get_path(path, old_filename), get_path(path, new_filename))
+    return new_filename
+
+
+def get_path(path, filename):
+    return os.path.join(path, filename)
+
+
+def slug_mane_file(file_name):
+    return "{timestamp}_{fname}".format(
+        fname=file_name.replace(" ", "_"), timestamp=to_jstimestamp(datetime.now())
+    )
+
+
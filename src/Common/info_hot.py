@@ -5,10 +5,10 @@ import re
 import socket
 import uuid
 
-import psutil
-
 
 def getSystemInfo():
+    import psutil  # import différé : inutile au démarrage
+
     try:
         hdd = psutil.disk_usage("/")
         info = {
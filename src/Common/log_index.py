@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Index des fichiers de log (``app.log`` et ses rotations ``app.log.N``).
+
+Chaque fichier est parcouru une fois (via mmap) pour relever, par ligne :
+l’offset de début, la date (entier AAAAMMJJ, lue à position fixe en tête de
+ligne) et le niveau. L’index est conservé sur disque dans ``logs/.index`` et
+prolongé quand le fichier grandit : seules les lignes ajoutées sont lues.
+L’accès à une page de lignes coûte O(page), quelle que soit la taille du log.
+
+    index = LogIndex(log_dir / "app.log")
+    index.refresh()
+    lines = index.lines(0, 200)
+
+Les fichiers sont identifiés par le hachage de leur première ligne, qui ne
+change pas quand ``RotatingFileHandler`` renomme ``app.log`` en ``app.log.1`` :
+l’index d’un fichier survit à la rotation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from pathlib import Path
+
+from .cstatic import logger
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+# code de niveau stocké par ligne ; 0 = ligne sans niveau (suite de traceback…)
+LEVEL_CODES = {name: code for code, name in enumerate(LEVELS, start=1)}
+LEVEL_NAMES = (None,) + LEVELS
+
+INDEX_VERSION = 1
+
+# une ligne : date « AAAA-MM-JJ » éventuelle en tête, niveau « - NIVEAU - » éventuel
+_LINE_RE = re.compile(
+    rb"(\d{4}-\d\d-\d\d)?(?:[^\n]*? - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - )?[^\n]*\n"
+)
+_LEVEL_BYTES = {name.encode(): code for name, code in LEVEL_CODES.items()}
+
+# Longueur maximale de la première ligne utilisée pour identifier un fichier.
+_HEAD_BYTES = 4096
+
+
+def date_key(d) -> int:
+    """Date -> entier AAAAMMJJ comparable aux dates de l’index."""
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def _file_key(path):
+    """Empreinte de la première ligne complète, ou None si le fichier n’en a pas encore."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEAD_BYTES)
+    except OSError:
+        return None
+    nl = head.find(b"\n")
+    if nl < 0:
+        if len(head) < _HEAD_BYTES:
+            return None
+        nl = len(head)
+    return hashlib.sha1(head[: nl + 1]).hexdigest()[:20]
+
+
+class LogFileIndex:
+    """Index d’un seul fichier : offsets, dates et niveaux de chaque ligne."""
+
+    def __init__(self, path, key, cache_dir=None):
+        self.path = Path(path)
+        self.key = key
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._reset()
+        self._dirty = False
+        self._load()
+
+    def _reset(self):
+        self.offsets = array("Q")
+        self.dates = array("I")
+        self.levels = array("B")
+        # octets indexés : fin de la dernière ligne complète
+        self.size = 0
+        self.counts = Counter()
+        self._last_date = 0
+        # incrémenté à chaque reconstruction : les numéros de ligne ont changé
+        self.resets = getattr(self, "resets", -1) + 1
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def _cache_file(self):
+        return self.cache_dir / f"{self.key}.idx" if self.cache_dir else None
+
+    def _load(self):
+        cache = self._cache_file
+        if cache is None or not cache.exists():
+            return
+        try:
+            with open(cache, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != INDEX_VERSION:
+                    return
+                count = int(header["count"])
+                offsets, dates, levels = array("Q"), array("I"), array("B")
+                offsets.frombytes(f.read(count * offsets.itemsize))
+                dates.frombytes(f.read(count * dates.itemsize))
+                levels.frombytes(f.read(count * levels.itemsize))
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug("Index de log ignoré %s: %s", cache, e)
+            return
+        if not (len(offsets) == len(dates) == len(levels) == count):
+            return
+        self.offsets, self.dates, self.levels = offsets, dates, levels
+        self.size = int(header["size"])
+        self.counts = Counter(
+            {LEVEL_NAMES[int(code)]: n for code, n in header["counts"].items()}
+        )
+        self._last_date = dates[-1] if count else 0
+
+    def save(self):
+        """Écrit l’index sur disque s’il a changé depuis le dernier enregistrement."""
+        cache = self._cache_file
+        if cache is None or not self._dirty:
+            return
+        header = {
+            "version": INDEX_VERSION,
+            "count": len(self.offsets),
+            "size": self.size,
+            "counts": {LEVEL_CODES[name]: n for name, n in self.counts.items()},
+        }
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_suffix(".part")
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                f.write(self.offsets.tobytes())
+                f.write(self.dates.tobytes())
+                f.write(self.levels.tobytes())
+            os.replace(tmp, cache)
+            self._dirty = False
+        except OSError as e:
+            logger.debug("Enregistrement de l’index de log impossible %s: %s", cache, e)
+
+    def update(self, path=None):
+        """
+        Indexe les lignes ajoutées depuis le dernier passage ; ``path`` suit un
+        renommage (rotation). Retourne le nombre de nouvelles lignes.
+        """
+        if path is not None:
+            self.path = Path(path)
+        try:
+            file_size = self.path.stat().st_size
+        except OSError:
+            return 0
+        if file_size < self.size:
+            # fichier tronqué : l’index ne correspond plus
+            self._reset()
+        if file_size == self.size:
+            return 0
+        before = len(self.offsets)
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return 0  # supprimé ou renommé depuis le stat() : passage suivant
+        with f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # vidé depuis le stat() (mmap refuse un fichier vide)
+                if self.size:
+                    self._reset()
+                    self._dirty = True
+                return 0
+            except OSError:
+                return 0
+            with mm:
+                end = mm.rfind(b"\n", self.size) + 1
+                if end <= self.size:
+                    return 0
+                self._scan(mm, self.size, end)
+        self._dirty = True
+        return len(self.offsets) - before
+
+    def _scan(self, mm, start, end):
+        offsets, dates, levels = self.offsets, self.dates, self.levels
+        counts = self.counts
+        last_date = self._last_date
+        for m in _LINE_RE.finditer(mm, start, end):
+            offsets.append(m.start())
+            d = m.group(1)
+            if d is not None:
+                last_date = int(d[0:4] + d[5:7] + d[8:10])
+            # une ligne sans date (traceback) hérite de la date de la précédente
+            dates.append(last_date)
+            lvl = m.group(2)
+            if lvl is not None:
+                code = _LEVEL_BYTES[lvl]
+                counts[LEVEL_NAMES[code]] += 1
+                levels.append(code)
+            else:
+                levels.append(0)
+        self._last_date = last_date
+        self.size = end
+
+    def read_lines(self, start, stop):
+        """Lignes ``[start, stop)`` lues directement à leur offset."""
+        stop = min(stop, len(self.offsets))
+        if start >= stop:
+            return []
+        begin = self.offsets[start]
+        end = self.offsets[stop] if stop < len(self.offsets) else self.size
+        with open(self.path, "rb") as f:
+            f.seek(begin)
+            raw = f.read(end - begin)
+        lines = raw.decode("utf-8", errors="replace").split("\n")
+        return [line.rstrip("\r") for line in lines[: stop - start]]
+
+
+class LogIndex:
+    """
+    Index de ``app.log`` et de ses rotations, vus comme une seule suite de
+    lignes (de la plus ancienne à la plus récente). ``siblings=False`` limite
+    l’index au seul fichier donné.
+    """
+
+    def __init__(self, path, cache_dir=None, siblings=True):
+        self.path = Path(path)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.path.parent / ".index"
+        self.siblings = siblings
+        self.files: list[LogFileIndex] = []
+        # _starts[i] = numéro global de la première ligne de files[i]
+        self._starts = [0]
+        self._by_key = {}
+        # (inode, taille, date de modification) du fichier suivi au dernier poll()
+        self._signature = None
+
+    def _discover(self):
+        """Fichiers à indexer, du plus ancien au plus récent."""
+        if not self.siblings:
+            return [self.path] if self.path.exists() else []
+        rotated = []
+        prefix = self.path.name + "."
+        for p in self.path.parent.glob(self.path.name + ".*"):
+            suffix = p.name[len(prefix):]
+            if suffix.isdigit() and p.is_file():
+                rotated.append((int(suffix), p))
+        paths = [p for _n, p in sorted(rotated, reverse=True)]
+        if self.path.exists():
+            paths.append(self.path)
+        return paths
+
+    def refresh(self):
+        """
+        Suit les rotations et indexe les lignes nouvelles ; retourne le nombre
+        de lignes ajoutées (négatif ou nul si des rotations ont supprimé des lignes).
+        """
+        before = len(self)
+        files = []
+        for p in self._discover():
+            key = _file_key(p)
+            if key is None:
+                continue
+            idx = self._by_key.get(key)
+            if idx is None:
+                idx = LogFileIndex(p, key, self.cache_dir)
+                self._by_key[key] = idx
+            idx.update(p)
+            files.append(idx)
+        live = {idx.key for idx in files}
+        for key in list(self._by_key):
+            if key not in live:
+                del self._by_key[key]
+        self.files = files
+        starts = [0]
+        for idx in files:
+            starts.append(starts[-1] + len(idx))
+        self._starts = starts
+        return len(self) - before
+
+    def poll(self):
+        """
+        Vrai si le fichier suivi a changé (écriture ou rotation) depuis l’appel
+        précédent ; un seul ``stat`` : coût négligeable quand rien n’est écrit.
+        """
+        try:
+            st = self.path.stat()
+            signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        except OSError:
+            signature = None
+        changed = signature != self._signature
+        self._signature = signature
+        return changed
+
+    def tail(self):
+        """
+        Prolonge l’index comme ``refresh`` et décrit le changement par rapport
+        aux numéros de ligne précédents : ``(première ligne nouvelle, lignes
+        retirées en tête)``. Les rotations ne font que retirer les fichiers les
+        plus anciens ; None si un fichier a été tronqué ou réécrit (les numéros
+        précédents ne sont plus valables).
+        """
+        old = [(idx, len(idx), idx.resets) for idx in self.files]
+        self.refresh()
+        live = {id(idx) for idx in self.files}
+        dropped = 0
+        kept = []
+        for idx, count, resets in old:
+            if id(idx) in live:
+                kept.append((idx, count, resets))
+            elif kept:
+                return None  # fichier disparu au milieu de l’historique
+            else:
+                dropped += count
+        for i, (idx, count, resets) in enumerate(kept):
+            if self.files[i] is not idx or idx.resets != resets or len(idx) < count:
+                return None
+        return sum(count for _idx, count, _r in kept), dropped
+
+    def save(self):
+        """Enregistre les index modifiés et supprime ceux des fichiers disparus."""
+        for idx in self.files:
+            idx.save()
+        if not self.siblings:
+            return
+        live = {f"{idx.key}.idx" for idx in self.files}
+        try:
+            stale = [p for p in self.cache_dir.glob("*.idx") if p.name not in live]
+        except OSError:
+            return
+        for p in stale:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def _locate(self, i):
+        """(index de fichier, ligne locale) de la ligne globale ``i``."""
+        f = bisect_right(self._starts, i) - 1
+        return f, i - self._starts[f]
+
+    def lines(self, start, stop):
+        """Lignes globales ``[start, stop)``, en O(stop - start)."""
+        return [line for _code, line in self.entries(start, stop)]
+
+    def entries(self, start, stop):
+        """``(code de niveau, ligne)`` pour les lignes ``[start, stop)``."""
+        start = max(0, start)
+        stop = min(stop, len(self))
+        out = []
+        while start < stop:
+            f, local = self._locate(start)
+            idx = self.files[f]
+            chunk = idx.read_lines(local, local + (stop - start))
+            if not chunk:
+                break
+            out.extend(zip(idx.levels[local:local + len(chunk)], chunk))
+            start += len(chunk)
+        return out
+
+    def entries_at(self, numbers):
+        """
+        ``(code de niveau, ligne)`` des lignes globales ``numbers`` (croissantes) ;
+        chaque suite de numéros consécutifs est lue d’un seul bloc.
+        """
+        out = []
+        run_start = prev = None
+        for n in numbers:
+            if prev is not None and n == prev + 1:
+                prev = n
+                continue
+            if run_start is not None:
+                out.extend(self.entries(run_start, prev + 1))
+            run_start = prev = n
+        if run_start is not None:
+            out.extend(self.entries(run_start, prev + 1))
+        return out
+
+    def matching_lines(self, start=0, level=None, text=None, page=2000, cancel=None):
+        """
+        Numéros des lignes à partir de ``start`` de niveau ``level`` (code, None =
+        tous) et contenant ``text`` (déjà en minuscules). Sans ``text``, seul le
+        tableau des niveaux est consulté : le fichier n’est pas relu.
+        Générateur : s’arrête entre deux pages si l’appelant cesse d’itérer ou
+        dès que ``cancel`` (``threading.Event``) est levé.
+        """
+        total = len(self)
+        while start < total:
+            if cancel is not None and cancel.is_set():
+                return
+            stop = min(start + page, total)
+            if text:
+                for n, (code, line) in enumerate(self.entries(start, stop), start):
+                    if (level is None or code == level) and text in line.lower():
+                        yield n
+            elif level is None:
+                yield from range(start, stop)
+            else:
+                f, local = self._locate(start)
+                idx = self.files[f]
+                stop = min(stop, self._starts[f + 1])
+                levels = idx.levels[local:local + (stop - start)]
+                for n, code in enumerate(levels, start):
+                    if code == level:
+                        yield n
+            start = stop
+
+    def level(self, i):
+        """Nom du niveau de la ligne ``i`` (None si la ligne n’en porte pas)."""
+        f, local = self._locate(i)
+        return LEVEL_NAMES[self.files[f].levels[local]]
+
+    def date(self, i):
+        """Date AAAAMMJJ de la ligne ``i`` (0 si inconnue)."""
+        f, local = self._locate(i)
+        return self.files[f].dates[local]
+
+    def first_line_since(self, d):
+        """Première ligne datée du jour ``d`` ou après (recherche dichotomique)."""
+        key = date_key(d)
+        for f, idx in enumerate(self.files):
+            if idx.dates and idx.dates[-1] >= key:
+                return self._starts[f] + bisect_left(idx.dates, key)
+        return len(self)
+
+    def stats(self):
+        """Nombre de lignes par niveau, plus ``TOTAL``."""
+        counts = Counter()
+        for idx in self.files:
+            counts.update(idx.counts)
+        stats = dict(counts)
+        stats["TOTAL"] = len(self)
+        return stats
@@ -3,9 +3,9 @@
 # maintainer: Fad
 
 from .migration_tracker import MigrationTracker
-from .run_migrations import run_migrations
+from .run_migrations import dry_run_migrations, run_migrations
 
-__all__ = ['MigrationTracker', 'run_migrations']
+__all__ = ['MigrationTracker', 'run_migrations', 'dry_run_migrations']
 
 """
 Package de gestion des migrations de la base de données.
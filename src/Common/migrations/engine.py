@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Moteur de migrations : dépendances déclarées, DDL groupé, reconstruction en ligne.
+
+Un fichier ``migration_*.py`` expose toujours ``migrate()`` (retourne un
+booléen) et peut déclarer :
+
+- ``DEPENDS`` : noms des migrations à appliquer avant. Sans ``DEPENDS``, une
+  migration dépend de toutes celles qui la précèdent dans l'ordre des noms
+  (comportement historique) ; ``DEPENDS = []`` la déclare indépendante.
+- ``TRANSACTIONAL = False`` : migration qui gère ses propres transactions
+  (``rebuild_table`` sur une grosse table) ; elle est exécutée seule.
+
+Les migrations sont rangées par niveaux (tri topologique). SQLite n'a qu'un
+écrivain à la fois : les migrations indépendantes d'un même niveau ne sont pas
+exécutées en parallèle mais groupées dans une seule transaction, chacune dans
+son point de sauvegarde, soit un seul commit (et une seule synchronisation du
+WAL) par niveau.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from Common.cstatic import logger
+
+# Lignes copiées par transaction lors d'une reconstruction de table
+REBUILD_CHUNK_ROWS = 5000
+
+
+class MigrationFailed(Exception):
+    """Annule le point de sauvegarde d'une migration en échec."""
+
+
+class Migration:
+    """Un fichier de migration chargé."""
+
+    def __init__(self, name, module, depends):
+        self.name = name
+        self.module = module
+        self.depends = list(depends)
+        self.transactional = getattr(module, "TRANSACTIONAL", True)
+
+    def __repr__(self):
+        return f"<Migration {self.name}>"
+
+    def run(self):
+        return bool(self.module.migrate())
+
+
+def load_migrations(directory):
+    """Charge les ``migration_*.py`` de ``directory``, triés par nom."""
+    migrations = []
+    previous = []
+    for path in sorted(Path(directory).glob("migration_*.py")):
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        depends = getattr(module, "DEPENDS", None)
+        if depends is None:
+            depends = list(previous)
+        migrations.append(Migration(path.stem, module, depends))
+        previous.append(path.stem)
+    return migrations
+
+
+def plan_levels(migrations, applied=()):
+    """
+    Niveaux d'exécution des migrations non appliquées : chaque migration ne
+    dépend que de migrations appliquées ou des niveaux précédents.
+    Lève ValueError pour une dépendance inconnue ou un cycle.
+    """
+    applied = set(applied)
+    by_name = {m.name: m for m in migrations}
+    pending = {m.name: m for m in migrations if m.name not in applied}
+    for m in pending.values():
+        for dep in m.depends:
+            if dep not in by_name:
+                raise ValueError(f"{m.name} : dépendance inconnue {dep}")
+
+    levels = []
+    done = set(applied)
+    while pending:
+        ready = [m for m in pending.values() if all(d in done for d in m.depends)]
+        if not ready:
+            raise ValueError(f"Dépendances circulaires : {', '.join(sorted(pending))}")
+        ready.sort(key=lambda m: m.name)
+        levels.append(ready)
+        for m in ready:
+            done.add(m.name)
+            del pending[m.name]
+    return levels
+
+
+def _batches(level):
+    """Migrations transactionnelles du niveau groupées ensemble, les autres seules."""
+    grouped = [m for m in level if m.transactional]
+    if grouped:
+        yield grouped
+    for m in level:
+        if not m.transactional:
+            yield [m]
+
+
+def _run_one(migration, timings):
+    """Exécute une migration ; retourne (succès, message d'erreur)."""
+    started = time.perf_counter()
+    try:
+        ok = migration.run()
+        error = None if ok else "La migration a échoué"
+    except Exception as e:
+        ok, error = False, str(e)
+    timings.append((migration.name, time.perf_counter() - started, ok))
+    return ok, error
+
+
+def apply_migrations(db, migrations, tracker):
+    """
+    Applique les migrations en attente niveau par niveau.
+
+    Une migration en échec est annulée (point de sauvegarde) et marquée
+    ``failed`` ; les autres migrations de son lot sont validées, puis
+    l'exécution s'arrête avant le niveau suivant.
+    Retourne ``(succès, [(nom, secondes, ok), ...])``.
+    """
+    applied = {m.name for m in migrations} - set(
+        tracker.get_pending_migrations([m.name for m in migrations])
+    )
+    timings = []
+    for level in plan_levels(migrations, applied):
+        failed = False
+        for batch in _batches(level):
+            if batch[0].transactional:
+                with db.atomic():
+                    for migration in batch:
+                        logger.info(f"🔄 Exécution de la migration: {migration.name}")
+                        try:
+                            with db.atomic():  # point de sauvegarde
+                                ok, error = _run_one(migration, timings)
+                                if not ok:
+                                    raise MigrationFailed(error)
+                        except MigrationFailed:
+                            pass
+                        failed |= not _record(tracker, migration, ok, error)
+            else:
+                migration = batch[0]
+                logger.info(f"🔄 Exécution de la migration: {migration.name}")
+                ok, error = _run_one(migration, timings)
+                failed |= not _record(tracker, migration, ok, error)
+        if failed:
+            return False, timings
+    return True, timings
+
+
+def _record(tracker, migration, ok, error):
+    if ok:
+        tracker.mark_migration_applied(migration.name)
+        logger.info(f"✅ Migration {migration.name} terminée avec succès")
+    else:
+        tracker.mark_migration_applied(migration.name, status="failed", error_message=error)
+        logger.error(f"❌ Échec de la migration {migration.name}: {error}")
+    return ok
+
+
+def dry_run(db, migrations, tracker, source_path=None):
+    """
+    Applique les migrations en attente à une copie de la base et mesure la
+    durée de chacune : estimation du temps de migration sur les données réelles.
+    La base de production n'est pas modifiée. ``db`` est redirigée vers la copie
+    le temps de l'exécution : à lancer quand l'application n'écrit pas.
+    Retourne ``(succès, [(nom, secondes, ok), ...])``.
+    """
+    from Common.backup import backup_database
+
+    database_path = db.database
+    # init() remet le délai d'attente à sa valeur par défaut : on garde celui de db
+    init_params = {"timeout": db._timeout, "pragmas": db._pragmas}
+    source_path = source_path or database_path
+    fd, copy_path = tempfile.mkstemp(suffix=".db", prefix="mmigration_")
+    os.close(fd)
+    try:
+        backup_database(copy_path, source_path)
+        db.close()
+        db.init(copy_path, **init_params)
+        try:
+            db.connect()
+            tracker.migrate()
+            ok, timings = apply_migrations(db, migrations, tracker)
+        finally:
+            db.close()
+            db.init(database_path, **init_params)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(copy_path + suffix)
+            except OSError:
+                pass
+    for name, seconds, success in timings:
+        logger.info(
+            f"⏱️ {name}: {seconds:.2f} s{'' if success else ' (échec)'}"
+        )
+    return ok, timings
+
+
+def rebuild_table(db, table, create_sql, columns, select_exprs=None,
+                  index_sql=(), chunk_rows=REBUILD_CHUNK_ROWS):
+    """
+    Reconstruit ``table`` selon ``create_sql`` sans la bloquer pendant la copie.
+
+    ``create_sql`` crée la nouvelle table sous le nom ``{table}__new`` ;
+    ``columns`` liste ses colonnes et ``select_exprs`` les expressions SQL
+    correspondantes sur l'ancienne table (par défaut les mêmes noms). La copie
+    se fait par tranches de ``chunk_rows`` lignes, une transaction chacune ; des
+    triggers reportent pendant ce temps les écritures de l'application. Seul
+    l'échange final (suppression, renommage, ``index_sql``) verrouille la table.
+    Les clés étrangères sont désactivées pendant l'échange (sinon ``DROP TABLE``
+    supprimerait ou refuserait les lignes qui la référencent) et vérifiées par
+    ``PRAGMA foreign_key_check`` avant la validation.
+    À appeler depuis une migration ``TRANSACTIONAL = False``.
+    """
+    if db.in_transaction():
+        raise RuntimeError(f"rebuild_table({table}) : à appeler hors transaction (TRANSACTIONAL = False)")
+    new = f"{table}__new"
+    select_exprs = list(select_exprs or columns)
+    cols = ", ".join(["rowid"] + list(columns))
+    exprs = ", ".join(["rowid"] + select_exprs)
+    triggers = {
+        f"{new}_ins": f"AFTER INSERT ON {table} BEGIN "
+        f"INSERT OR REPLACE INTO {new} ({cols}) SELECT {exprs} FROM {table} WHERE rowid = NEW.rowid; END",
+        f"{new}_upd": f"AFTER UPDATE ON {table} BEGIN "
+        f"DELETE FROM {new} WHERE rowid = OLD.rowid; "
+        f"INSERT OR REPLACE INTO {new} ({cols}) SELECT {exprs} FROM {table} WHERE rowid = NEW.rowid; END",
+        f"{new}_del": f"AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {new} WHERE rowid = OLD.rowid; END",
+    }
+
+    with db.atomic():
+        db.execute_sql(f"DROP TABLE IF EXISTS {new}")
+        db.execute_sql(create_sql)
+        for name, body in triggers.items():
+            db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")  # reconstruction interrompue
+            db.execute_sql(f"CREATE TRIGGER {name} {body}")
+        last_rowid = db.execute_sql(f"SELECT max(rowid) FROM {table}").fetchone()[0] or 0
+
+    copied = 0
+    position = 0
+    while position < last_rowid:
+        with db.atomic():
+            upper = db.execute_sql(
+                f"SELECT max(rowid) FROM (SELECT rowid FROM {table} "
+                f"WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                (position, chunk_rows),
+            ).fetchone()[0]
+            if upper is None:
+                break
+            upper = min(upper, last_rowid)
+            cursor = db.execute_sql(
+                f"INSERT OR REPLACE INTO {new} ({cols}) SELECT {exprs} FROM {table} "
+                f"WHERE rowid > ? AND rowid <= ?",
+                (position, upper),
+            )
+            copied += cursor.rowcount
+            position = upper
+        logger.debug(f"Reconstruction de {table} : {copied} ligne(s) copiée(s)")
+
+    # sans effet dans une transaction : à changer avant l'échange
+    foreign_keys = db.execute_sql("PRAGMA foreign_keys").fetchone()[0]
+    if foreign_keys:
+        db.execute_sql("PRAGMA foreign_keys = OFF")
+    try:
+        with db.atomic():
+            for name in triggers:
+                db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+            db.execute_sql(f"DROP TABLE {table}")
+            db.execute_sql(f"ALTER TABLE {new} RENAME TO {table}")
+            for sql in index_sql:
+                db.execute_sql(sql)
+            if foreign_keys:
+                violations = db.execute_sql("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    # annule l'échange : l'ancienne table et ses lignes sont conservées
+                    raise ValueError(
+                        f"Reconstruction de {table} : {len(violations)} clé(s) étrangère(s) "
+                        f"invalide(s), ex. {violations[0]}"
+                    )
+    except BaseException:
+        # échange annulé : les triggers ne doivent plus alimenter la copie
+        with db.atomic():
+            for name in triggers:
+                db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+            db.execute_sql(f"DROP TABLE IF EXISTS {new}")
+        raise
+    finally:
+        if foreign_keys:
+            db.execute_sql("PRAGMA foreign_keys = ON")
+    logger.info(f"✅ Table {table} reconstruite ({copied} ligne(s))")
+    return copied
@@ -19,6 +19,8 @@ class MigrationTracker(peewee.Model):
     class Meta:
         database = dbh
         table_name = 'migration_tracker'
+        # get_pending_migrations / is_migration_applied : status puis nom
+        indexes = ((('status', 'migration_name'), False),)
 
     migration_name = peewee.CharField(unique=True)
     applied_at = peewee.DateTimeField(default=datetime.now)
@@ -31,6 +33,7 @@ class MigrationTracker(peewee.Model):
         try:
             # Vérifier si la table existe déjà
             if cls.table_exists():
+                cls._schema.create_indexes(safe=True)  # tables créées avant l'index
                 logger.info("✅ Table de suivi des migrations existe déjà")
                 return True
                 
@@ -4,7 +4,6 @@
 
 import os
 import sys
-import importlib.util
 from pathlib import Path
 
 # Ajouter le répertoire parent au chemin Python
@@ -12,10 +11,23 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from Common.cstatic import logger
 from Common.models import dbh
+from Common.migrations.engine import apply_migrations, dry_run, load_migrations
 from Common.migrations.migration_tracker import MigrationTracker
 
+MIGRATIONS_DIR = Path(__file__).parent
+
+
+def _load():
+    """Migrations du dossier, ou None si l'une d'elles ne peut être chargée"""
+    try:
+        return load_migrations(MIGRATIONS_DIR)
+    except Exception as e:
+        logger.error(f"❌ Erreur lors du chargement des migrations: {e}")
+        return None
+
+
 def run_migrations():
-    """Exécute toutes les migrations dans l'ordre"""
+    """Exécute les migrations en attente, dans l'ordre de leurs dépendances"""
     try:
         # Vérifier la connexion à la base de données
         if dbh is None or dbh.is_closed():
@@ -29,70 +41,21 @@ def run_migrations():
             return False
         logger.info("✅ Migration du système de suivi terminée avec succès")
         
-        # Obtenir le répertoire des migrations
-        migrations_dir = Path(__file__).parent
-        
-        # Trouver tous les fichiers de migration
-        migration_files = sorted([
-            f for f in migrations_dir.glob("migration_*.py")
-            if f.name not in ["__init__.py", "run_migrations.py", "migration_tracker.py"]
-        ])
-        
-        if not migration_files:
+        migrations = _load()
+        if migrations is None:
+            return False
+        if not migrations:
             logger.info("✅ Aucune migration à exécuter")
             return True
             
-        logger.info(f"🔍 {len(migration_files)} migration(s) trouvée(s)")
-        
-        # Récupérer les migrations en attente
-        pending_migrations = MigrationTracker.get_pending_migrations([f.stem for f in migration_files])
+        logger.info(f"🔍 {len(migrations)} migration(s) trouvée(s)")
         
-        if not pending_migrations:
+        ok, timings = apply_migrations(dbh, migrations, MigrationTracker)
+        if not ok:
+            return False
+        if not timings:
             logger.info("✅ Toutes les migrations sont à jour")
             return True
-            
-        logger.info(f"🔄 {len(pending_migrations)} migration(s) en attente")
-        
-        # Exécuter chaque migration en attente
-        for migration_file in migration_files:
-            if migration_file.stem not in pending_migrations:
-                continue
-                
-            try:
-                # Importer le module de migration
-                spec = importlib.util.spec_from_file_location(
-                    migration_file.stem, 
-                    migration_file
-                )
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
-                # Exécuter la migration
-                logger.info(f"🔄 Exécution de la migration: {migration_file.name}")
-                try:
-                    if module.migrate():
-                        MigrationTracker.mark_migration_applied(migration_file.stem)
-                        logger.info(f"✅ Migration {migration_file.name} terminée avec succès")
-                    else:
-                        MigrationTracker.mark_migration_applied(
-                            migration_file.stem,
-                            status='failed',
-                            error_message="La migration a échoué"
-                        )
-                        logger.error(f"❌ Échec de la migration {migration_file.name}")
-                        return False
-                except Exception as e:
-                    MigrationTracker.mark_migration_applied(
-                        migration_file.stem,
-                        status='failed',
-                        error_message=str(e)
-                    )
-                    logger.error(f"❌ Erreur lors de l'exécution de -- {migration_file.name}: {e}")
-                    return False
-                    
-            except Exception as e:
-                logger.error(f"❌ Erreur lors du chargement de {migration_file.name}: {e}")
-                return False
                 
         logger.info("🎉 Toutes les migrations ont été exécutées avec succès")
         return True
@@ -101,5 +64,26 @@ def run_migrations():
         logger.error(f"❌ Erreur lors de l'exécution des migrations: {e}")
         return False
 
+
+def dry_run_migrations(source_path=None):
+    """
+    Exécute les migrations en attente sur une copie de la base (par défaut la
+    base de production) et retourne la durée de chacune : [(nom, secondes, ok)].
+    """
+    migrations = _load()
+    if not migrations:
+        return []
+    try:
+        _ok, timings = dry_run(dbh, migrations, MigrationTracker, source_path)
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la simulation des migrations: {e}")
+        return []
+    return timings
+
+
 if __name__ == "__main__":
-    run_migrations() 
\ No newline at end of file
+    if "--dry-run" in sys.argv:
+        for name, seconds, ok in dry_run_migrations():
+            print(f"{name:50} {seconds:8.2f} s  {'ok' if ok else 'échec'}")
+    else:
+        run_migrations()
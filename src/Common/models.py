@@ -3,20 +3,23 @@
 # vim: ai ts=4 sts=4 et sw=4 nu
 # maintainer: Fad
 
+import hashlib
 import os
 import sys
+import threading
 import time
 import bcrypt
 import re
 import peewee
 from datetime import datetime, timedelta
 
-from peewee_migrate import Router
 from playhouse.migrate import DateTimeField, BooleanField
 from peewee import SqliteDatabase
 
-from .cstatic import logger
-from .ui.util import copy_file, date_to_str, datetime_to_str
+from .connections import BUSY_TIMEOUT, read_pool, thread_read_connection
+from .cstatic import fast_startup, logger, query_audit
+from .org_logo import invalidate_letterhead
+from .helpers import copy_file, date_to_str, datetime_to_str
 
 
 def _resolve_db_file(name="database.db"):
@@ -49,18 +52,81 @@ logger.info(f"Utilisation de la base de données: {DB_FILE}")
 
 logger.info(f"Version de Peewee: {peewee.__version__}")
 
+# Date d'import du module : ne plus l'utiliser comme valeur par défaut (figée
+# pour toute la session), voir write_clock()
 NOW = datetime.now()
 
+_clock_lock = threading.Lock()
+_last_write = datetime.min
+
+
+def write_clock():
+    """
+    Horodatage d'une écriture : l'heure courante, strictement croissante dans
+    le processus (deux appels de la même microseconde reçoivent des dates
+    distinctes). Une écriture groupée partage une seule date entre ses lignes :
+    reprendre avec ``changed_since(date, id)``, pas avec la date seule.
+    """
+    global _last_write
+    now = datetime.now()
+    with _clock_lock:
+        if now <= _last_write:
+            now = _last_write + timedelta(microseconds=1)
+        _last_write = now
+    return now
+
+
 # Variables globales pour la base de données et les migrations
 dbh = None
 router = None
 
+# Vrai une fois les tables et enregistrements par défaut vérifiés pour ce processus
+_db_ready = False
+_db_setup_running = False
+_db_lock = threading.RLock()
+
+
+class _AppDatabase(SqliteDatabase):
+    """SqliteDatabase qui termine l'initialisation à la première connexion
+    (mode démarrage rapide : rien n'est fait à l'import du module) et prend
+    ses connexions au groupe de lecture dans un thread en lecture seule
+    (voir connections.connection_for_thread)."""
+
+    def connect(self, reuse_if_open=False):
+        opened = super().connect(reuse_if_open)
+        if not _db_ready:
+            init_database()
+        return opened
+
+    def _connect(self):
+        conn = thread_read_connection()
+        if conn is not None:
+            return conn
+        return super()._connect()
+
+    def _close(self, conn):
+        # connexion du groupe de lecture : rendue par connection_for_thread
+        if not read_pool().owns(conn):
+            super()._close(conn)
+
+# Variables liées au maximum par requête (SQLITE_MAX_VARIABLE_NUMBER des
+# SQLite antérieurs à 3.32) : taille des lots des écritures groupées
+SQLITE_MAX_VARIABLES = 999
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 def get_router():
     """Retourne l'instance du router pour les migrations"""
     global router
     if router is None:
         if dbh is None:
             init_database()
+        from peewee_migrate import Router  # import différé : inutile au démarrage
+
         router = Router(dbh, migrate_dir='migrations')
     return router
 
@@ -68,17 +134,17 @@ class BaseModel(peewee.Model):
     class Meta:
         database = None  # Sera défini après l'initialisation de dbh
 
-    is_syncro = BooleanField(default=False)
-    last_update_date = DateTimeField(default=NOW)
+    # index : chaque passe de synchronisation filtre is_syncro sur chaque modèle
+    is_syncro = BooleanField(default=False, index=True)
+    last_update_date = DateTimeField(default=write_clock, index=True)
 
     def updated(self):
-        logger.debug(f"Mise à jour de l'enregistrement {self.__class__.__name__} (id: {self.id})")
+        logger.debug("Mise à jour de l'enregistrement %s (id: %s)", self.__class__.__name__, self.id)
         self.is_syncro = True
-        self.last_update_date = NOW
         self.save()
 
     def save_(self):
-        logger.info(f"Sauvegarde de l'enregistrement {self.__class__.__name__} (id: {self.id})")
+        logger.debug("Sauvegarde de l'enregistrement %s (id: %s)", self.__class__.__name__, self.id)
         self.is_syncro = False
         self.save()
 
@@ -90,18 +156,247 @@ class BaseModel(peewee.Model):
 
     @classmethod
     def all(cls):
-        logger.info(f"Récupération de tous les enregistrements de {cls.__name__}")
+        logger.debug("Récupération de tous les enregistrements de %s", cls.__name__)
         return list(cls.select())
 
+    @classmethod
+    def changed_since(cls, since=None, after_id=None):
+        """
+        Lignes écrites après le point de reprise ``(since, after_id)`` (toutes
+        si ``since`` est None), dans l'ordre ``(last_update_date, id)`` : la
+        date et l'id de la dernière ligne lue forment le point suivant.
+        Sans ``after_id``, toutes les lignes datées de ``since`` sont exclues —
+        à éviter après une écriture groupée, dont les lignes partagent une date.
+        Utilise l'index sur ``last_update_date`` (qui contient l'id).
+
+        Les dates sont prises avant la validation : deux threads qui écrivent en
+        même temps peuvent valider dans l'ordre inverse de leurs dates ; les
+        écritures groupées prennent leur date sous le verrou d'écriture. Les
+        ``Model.update(...)`` en SQL direct ne sont vus que s'ils fixent
+        eux-mêmes ``last_update_date``.
+        """
+        query = cls.select()
+        if since is not None:
+            if after_id is None:
+                query = query.where(cls.last_update_date > since)
+            else:
+                query = query.where(
+                    peewee.Tuple(cls.last_update_date, cls._meta.primary_key)
+                    > peewee.Tuple(since, after_id)
+                )
+        return query.order_by(cls.last_update_date, cls._meta.primary_key)
+
+    # --- Écritures groupées : une transaction, des lots à la limite de variables SQLite
+
+    @classmethod
+    def _bulk_rows(cls, rows):
+        """Dicts de champs prêts à insérer ; marqués à synchroniser comme par ``save_``."""
+        fields = cls._meta.fields
+        prepared = []
+        for row in rows:
+            if isinstance(row, peewee.Model):
+                row = row.__data__
+            # clés Field : un nom de champ peut être masqué par une méthode (History.data)
+            row = {fields[k] if isinstance(k, str) else k: v for k, v in row.items()}
+            row.setdefault(cls.is_syncro, False)
+            if cls.last_update_date not in row:
+                row[cls.last_update_date] = write_clock()
+            prepared.append(row)
+        return prepared
+
+    @classmethod
+    def _bulk_batch_size(cls):
+        return max(1, SQLITE_MAX_VARIABLES // len(cls._meta.fields))
+
+    @classmethod
+    def bulk_save(cls, rows):
+        """
+        Insère ``rows`` (dicts de champs ou instances non enregistrées) en
+        quelques INSERT multi-lignes dans une seule transaction, au lieu d'un
+        ``save()`` (et d'un commit) par ligne. Retourne le nombre de lignes.
+        """
+        rows = cls._bulk_rows(rows)
+        with cls._meta.database.atomic():
+            for batch in _chunks(rows, cls._bulk_batch_size()):
+                cls.insert_many(batch).execute()
+        logger.debug("Insertion groupée %s : %d ligne(s)", cls.__name__, len(rows))
+        return len(rows)
+
+    @classmethod
+    def bulk_upsert(cls, rows, conflict_target=None):
+        """
+        Insère ou met à jour ``rows`` : en cas de conflit sur
+        ``conflict_target`` (champs, par défaut la clé primaire), les colonnes
+        fournies remplacent celles de la ligne existante. Retourne le nombre de lignes.
+        """
+        rows = cls._bulk_rows(rows)
+        if not rows:
+            return 0
+        target = list(conflict_target or [cls._meta.primary_key])
+        target = [cls._meta.fields[f] if isinstance(f, str) else f for f in target]
+        target_names = {f.name for f in target}  # Field == construit une expression
+        preserve = [f for f in rows[0] if f.name not in target_names]
+        with cls._meta.database.atomic():
+            for batch in _chunks(rows, cls._bulk_batch_size()):
+                cls.insert_many(batch).on_conflict(
+                    conflict_target=target, preserve=preserve
+                ).execute()
+        logger.debug("Upsert groupé %s : %d ligne(s)", cls.__name__, len(rows))
+        return len(rows)
+
+    @classmethod
+    def bulk_mark_synced(cls, ids, sent_versions=None):
+        """
+        Équivalent groupé de ``updated()`` : un UPDATE ... WHERE id IN (...) par
+        lot. ``sent_versions`` ({id: last_update_date envoyée}) limite
+        l'acquittement aux lignes encore dans la version envoyée : une ligne
+        réécrite depuis sa lecture, même par une écriture validée après, n'est
+        pas marquée et reste à synchroniser.
+        """
+        pk = cls._meta.primary_key
+        count = 0
+        # verrou d'écriture pris avant la date : ordre des dates = ordre des validations
+        with cls._meta.database.atomic("IMMEDIATE"):
+            now = write_clock()
+            if sent_versions is None:
+                for batch in _chunks(list(ids), SQLITE_MAX_VARIABLES - 3):
+                    count += (
+                        cls.update(is_syncro=True, last_update_date=now)
+                        .where(pk.in_(batch))
+                        .execute()
+                    )
+                return count
+            date_value = cls.last_update_date.db_value
+            pairs = [(i, date_value(sent_versions[i])) for i in ids if i in sent_versions]
+            for batch in _chunks(pairs, (SQLITE_MAX_VARIABLES - 3) // 2):
+                count += (
+                    cls.update(is_syncro=True, last_update_date=now)
+                    .where(peewee.Tuple(pk, cls.last_update_date).in_(peewee.ValuesList(batch)))
+                    .execute()
+                )
+        return count
+
+    @classmethod
+    def bulk_delete(cls, query):
+        """
+        Supprime en une transaction les lignes désignées par ``query`` : une
+        requête select du modèle, une condition (``Model.champ == valeur``) ou
+        une liste d'id. Retourne le nombre de lignes supprimées.
+        """
+        pk = cls._meta.primary_key
+        with cls._meta.database.atomic():
+            if isinstance(query, peewee.SelectBase):
+                return cls.delete().where(pk.in_(query.select(pk))).execute()
+            if isinstance(query, peewee.Node):
+                return cls.delete().where(query).execute()
+            count = 0
+            for batch in _chunks(list(query), SQLITE_MAX_VARIABLES):
+                count += cls.delete().where(pk.in_(batch)).execute()
+            return count
+
     def save(self, *args, **kwargs):
-        logger.debug(f"Sauvegarde de l'enregistrement {self.__class__.__name__} (id: {getattr(self, 'id', 'new')})")
+        # appelé en boucle lors des écritures en masse : formatage différé,
+        # rien n'est construit quand DEBUG est désactivé
+        logger.debug(
+            "Sauvegarde de l'enregistrement %s (id: %s)", self.__class__.__name__, getattr(self, 'id', 'new')
+        )
+        # chaque écriture est horodatée : base de changed_since()
+        self.last_update_date = write_clock()
+        only = kwargs.get("only")
+        if only:
+            kwargs["only"] = list(only) + [type(self).last_update_date]
         return super().save(*args, **kwargs)
 
     def delete_instance(self, *args, **kwargs):
-        logger.info(f"Suppression de l'enregistrement {self.__class__.__name__} (id: {self.id})")
+        logger.debug("Suppression de l'enregistrement %s (id: %s)", self.__class__.__name__, self.id)
         return super().delete_instance(*args, **kwargs)
 
 
+# Abonnés aux modifications des lignes uniques : callback(classe du modèle)
+_singleton_listeners = []
+
+
+def add_singleton_listener(callback):
+    """``callback(model)`` est appelé après chaque save()/delete_instance() d'une ligne unique."""
+    if callback not in _singleton_listeners:
+        _singleton_listeners.append(callback)
+
+
+def remove_singleton_listener(callback):
+    if callback in _singleton_listeners:
+        _singleton_listeners.remove(callback)
+
+
+class SingletonModel(BaseModel):
+    """
+    Modèle à ligne unique (id=1) : paramètres, organisation, version.
+
+    ``cached()`` lit la ligne une fois puis la garde en mémoire pour le
+    processus ; save() et delete_instance() invalident le cache et préviennent
+    les abonnés (voir add_singleton_listener). L'instance partagée est en
+    lecture seule : pour modifier, relire la ligne avec get(id=1).
+    """
+
+    SINGLETON_ID = 1
+
+    # Instance partagée (par sous-classe) ; la génération évite de remettre en
+    # cache une lecture commencée avant une invalidation
+    _cached = None
+    _cache_generation = 0
+
+    @classmethod
+    def cached(cls):
+        """Ligne unique, lue une seule fois ; lève DoesNotExist si elle manque."""
+        row = cls._cached
+        if row is None:
+            generation = cls._cache_generation
+            row = cls.get(cls._meta.primary_key == cls.SINGLETON_ID)
+            if generation == cls._cache_generation:
+                cls._cached = row
+        return row
+
+    @classmethod
+    def cached_or_none(cls):
+        try:
+            return cls.cached()
+        except cls.DoesNotExist:
+            return None
+
+    @classmethod
+    def clear_cache(cls):
+        cls._cache_generation += 1
+        cls._cached = None
+
+    @classmethod
+    def singleton_changed(cls):
+        """Invalide le cache et prévient les abonnés (après une écriture en SQL direct)."""
+        cls.clear_cache()
+        for callback in list(_singleton_listeners):
+            try:
+                callback(cls)
+            except Exception as e:
+                logger.warning("Abonné aux modifications de %s en échec : %s", cls.__name__, e)
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        type(self).singleton_changed()
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        result = super().delete_instance(*args, **kwargs)
+        type(self).singleton_changed()
+        return result
+
+
+def clear_singleton_caches():
+    """Vide le cache de toutes les lignes uniques (fichier de base remplacé)."""
+    pending = [SingletonModel]
+    while pending:
+        model = pending.pop()
+        model.clear_cache()
+        pending.extend(model.__subclasses__())
+
+
 class FileJoin(BaseModel):
     DEST_FILES = "Files"
 
@@ -111,7 +406,7 @@ class FileJoin(BaseModel):
 
     file_name = peewee.CharField(max_length=200, null=True)
     file_slug = peewee.CharField(max_length=200, null=True, unique=True)
-    on_created = peewee.DateTimeField(default=NOW)
+    on_created = peewee.DateTimeField(default=datetime.now)
 
     def data(self):
         return {
@@ -209,7 +504,7 @@ class Owner(BaseModel):
     phone = peewee.CharField(max_length=30, null=True, verbose_name="Telephone")
     password = peewee.CharField(max_length=150)
     isactive = peewee.BooleanField(default=True)
-    last_login = peewee.DateTimeField(default=NOW)
+    last_login = peewee.DateTimeField(default=datetime.now)
     login_count = peewee.IntegerField(default=0)
     reset_token = peewee.CharField(max_length=64, null=True)
     reset_token_expiry = peewee.DateTimeField(null=True)
@@ -406,7 +701,14 @@ class Owner(BaseModel):
         return True, "Mot de passe réinitialisé avec succès"
 
 
-class Organization(BaseModel):
+# Utilisateur connecté (check_session à chaque tic, barre de menus) : index
+# partiel, il ne contient que la ligne connectée, déjà triée par connexion
+Owner.add_index(Owner.last_login, where=(Owner.is_identified == True))
+# Listes d'utilisateurs par état et par groupe
+Owner.add_index(Owner.isactive, Owner.group)
+
+
+class Organization(SingletonModel):
     logo_orga = peewee.TextField(verbose_name="", null=True)
     name_orga = peewee.CharField(verbose_name="")
     phone = peewee.IntegerField(null=True, verbose_name="")
@@ -421,6 +723,16 @@ class Organization(BaseModel):
     def display_name(self):
         return "{}/{}/{}".format(self.name_orga, self.phone, self.email_org)
 
+    def save(self, *args, **kwargs):
+        result = super(Organization, self).save(*args, **kwargs)
+        invalidate_letterhead()
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        result = super(Organization, self).delete_instance(*args, **kwargs)
+        invalidate_letterhead()
+        return result
+
     @classmethod
     def get_or_create(cls, name_orga, typ):
         try:
@@ -447,12 +759,12 @@ class License(BaseModel):
     # organization = peewee.ForeignKeyField(Organization, backref='organizations')
     code = peewee.CharField(unique=True)
     isactivated = peewee.BooleanField(default=False)
-    activation_date = peewee.DateTimeField(default=NOW)
+    activation_date = peewee.DateTimeField(default=datetime.now)
     can_expired = peewee.BooleanField(default=False)
     evaluation = peewee.BooleanField(default=False)
     expiration_date = peewee.DateTimeField(null=True)
     owner = peewee.CharField(default="USER")
-    update_date = peewee.DateTimeField(default=NOW)
+    update_date = peewee.DateTimeField(default=datetime.now)
 
     def __str__(self):
         return self.code
@@ -477,7 +789,7 @@ class License(BaseModel):
 
     @property
     def is_expired(self):
-        return NOW > self.expiration_date if self.expiration_date else True
+        return datetime.now() > self.expiration_date if self.expiration_date else True
 
     def can_use(self):
         from .cstatic import CConstants
@@ -546,8 +858,8 @@ class License(BaseModel):
         return 0 < remaining.total_seconds() <= timedelta(days=days_threshold).total_seconds()
 
 
-class Version(BaseModel):
-    date = peewee.DateTimeField(default=NOW, verbose_name="Date de Version")
+class Version(SingletonModel):
+    date = peewee.DateTimeField(default=datetime.now, verbose_name="Date de Version")
     number = peewee.IntegerField(default=1, verbose_name="Numéro de Version")
 
     def __str__(self):
@@ -567,7 +879,7 @@ class Version(BaseModel):
 
     def update_v(self):
         self.number += 1
-        self.date = NOW
+        self.date = datetime.now()
         # print(self.number)
         self.save()
 
@@ -576,12 +888,12 @@ class Version(BaseModel):
         try:
             ctct = cls.get(number=number)
         except cls.DoesNotExist:
-            ctct = cls.create(number=number, date=NOW)
+            ctct = cls.create(number=number)
         return ctct
 
 
 class History(BaseModel):
-    date = peewee.DateTimeField(default=NOW)
+    date = peewee.DateTimeField(default=datetime.now)
     data = peewee.CharField()
     action = peewee.CharField()
 
@@ -598,7 +910,7 @@ class History(BaseModel):
         }
 
 
-class Settings(BaseModel):
+class Settings(SingletonModel):
     """docstring for Settings"""
 
     PREV = 0
@@ -652,7 +964,7 @@ class Settings(BaseModel):
                 query = """
                 INSERT OR REPLACE INTO settings 
                 (id, is_syncro, last_update_date, slug, auth_required, after_cam, toolbar, toolbar_position, url, theme, devise, font_scale)
-                VALUES (1, 0, datetime('now'), ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (1, 0, datetime('now', 'localtime'), ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """
                 dbh.execute_sql(query, [
                     cls.DEFAULT,      # slug
@@ -688,7 +1000,8 @@ class Settings(BaseModel):
                 )
                 settings.save()
                 logger.debug("Paramètres créés avec succès via fallback")
-                
+
+        cls.clear_cache()
         return settings
 
     def data(self):
@@ -744,7 +1057,7 @@ def init_default_version():
                 query = """
                 INSERT OR REPLACE INTO version 
                 (id, is_syncro, last_update_date, date, number)
-                VALUES (1, 0, datetime('now'), datetime('now'), 1)
+                VALUES (1, 0, datetime('now', 'localtime'), datetime('now', 'localtime'), 1)
                 """
                 dbh.execute_sql(query)
                 logger.info("✅ Version par défaut créée avec succès (id=1, number=1)")
@@ -793,7 +1106,7 @@ def init_default_organization():
                 query = """
                 INSERT OR REPLACE INTO organization 
                 (id, is_syncro, last_update_date, logo_orga, name_orga, phone, bp, email_org, adress_org, slug)
-                VALUES (1, 0, datetime('now'), NULL, ?, 0, ?, ?, ?, ?)
+                VALUES (1, 0, datetime('now', 'localtime'), NULL, ?, 0, ?, ?, ?, ?)
                 """
                 dbh.execute_sql(query, [
                     "Organisation par défaut",
@@ -922,6 +1235,22 @@ def list_owners_by_group(exclude_superuser=True):
         logger.error(f"Erreur lors du groupement des propriétaires: {e}")
         return {}
 
+# Colonnes ajoutées aux modèles après la création des premières bases
+_LEGACY_COLUMNS = {
+    "settings": [
+        ("auth_required", "INTEGER NOT NULL DEFAULT 1"),
+        ("font_scale", "REAL NOT NULL DEFAULT 1.0"),
+    ],
+    "owner": [
+        ("islog", "INTEGER NOT NULL DEFAULT 0"),
+        ("is_identified", "INTEGER NOT NULL DEFAULT 0"),
+        ("login_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("reset_token", "VARCHAR(64)"),
+        ("reset_token_expiry", "DATETIME"),
+    ],
+}
+
+
 def _ensure_legacy_sqlite_columns():
     """Ajoute les colonnes manquantes (BD créées avant l’évolution des modèles Common).
 
@@ -929,21 +1258,8 @@ def _ensure_legacy_sqlite_columns():
     SQLite provoquent alors des erreurs du type « no such column: t1.auth_required »
     ou « no such column: t1.islog ».
     """
-    specs = {
-        "settings": [
-            ("auth_required", "INTEGER NOT NULL DEFAULT 1"),
-            ("font_scale", "REAL NOT NULL DEFAULT 1.0"),
-        ],
-        "owner": [
-            ("islog", "INTEGER NOT NULL DEFAULT 0"),
-            ("is_identified", "INTEGER NOT NULL DEFAULT 0"),
-            ("login_count", "INTEGER NOT NULL DEFAULT 0"),
-            ("reset_token", "VARCHAR(64)"),
-            ("reset_token_expiry", "DATETIME"),
-        ],
-    }
     try:
-        for table, columns in specs.items():
+        for table, columns in _LEGACY_COLUMNS.items():
             row = dbh.execute_sql(
                 "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
                 (table,),
@@ -965,71 +1281,174 @@ def _ensure_legacy_sqlite_columns():
         logger.warning("Migration schéma legacy SQLite: %s", e)
 
 
-def init_database():
-    """Initialise la base de données et crée les tables si nécessaire"""
-    global dbh, router
-    try:
-        logger.info("Initialisation de la base de données")
-        
-        # Liste des modèles à créer
-        models = [
-            BaseModel,
-            FileJoin,
-            Owner,
-            Organization,
-            License,
-            Version,
-            History,
-            Settings
-        ]
-        
-        if dbh is None:
-            logger.info("Création de la connexion à la base de données")
-            dbh = SqliteDatabase(
-                DB_FILE,
-                pragmas={
-                    'journal_mode': 'wal',  # Write-Ahead Logging
-                    'cache_size': -64 * 1000,  # 64MB cache
-                    'foreign_keys': 1,
-                    'ignore_check_constraints': 0,
-                    'synchronous': 0,  # Let the OS handle syncing
-                    'temp_store': 2,  # Store temp tables and indices in memory
-                }
-            )
-            
-            # Initialisation du router pour les migrations
-            router = Router(dbh, migrate_dir='migrations')
-            
-            # Définir la base de données pour tous les modèles
-            for model in models:
-                model._meta.database = dbh
-
-        # Vérification si la base de données est déjà connectée
-        if dbh.is_closed():
-            logger.info("Connexion à la base de données")
-            dbh.connect()
-        logger.info("Base de données connectée")
-        
-        # Création des tables
-        dbh.create_tables(models, safe=True)
-        logger.info("Tables créées avec succès")
+# Table des empreintes de schéma : une ligne par groupe de modèles
+# ("common" pour ce module, "app" pour AdminDatabase)
+SCHEMA_FINGERPRINT_TABLE = "schema_fingerprint"
+
+# Empreintes lues dans la base (None = pas encore lues)
+_schema_fingerprints = None
+
+
+def schema_fingerprint(models, extra=None):
+    """Empreinte des tables, colonnes et index déclarés par ``models``."""
+    digest = hashlib.sha1()
+    for model in sorted(models, key=lambda m: m._meta.table_name):
+        meta = model._meta
+        digest.update(meta.table_name.encode())
+        for field in meta.sorted_fields:
+            rel_model = getattr(field, "rel_model", None)
+            digest.update(repr((
+                field.column_name,
+                field.field_type,
+                field.null,
+                field.unique,
+                field.index,
+                field.primary_key,
+                rel_model._meta.table_name if rel_model is not None else None,
+            )).encode())
+        for index in model._schema._create_indexes(safe=True):
+            digest.update(repr(index.query()).encode())
+    if extra is not None:
+        digest.update(repr(extra).encode())
+    return digest.hexdigest()
+
+
+def schema_is_current(name, fingerprint):
+    """
+    Vrai si ``fingerprint`` est l'empreinte enregistrée pour ``name`` : les
+    tables existent déjà dans cette forme. Une seule lecture par processus.
+    """
+    global _schema_fingerprints
+    if _schema_fingerprints is None:
+        try:
+            rows = dbh.execute_sql(
+                f"SELECT name, fingerprint FROM {SCHEMA_FINGERPRINT_TABLE}"
+            ).fetchall()
+        except peewee.DatabaseError:
+            rows = []  # base antérieure aux empreintes
+        _schema_fingerprints = dict(rows)
+    return _schema_fingerprints.get(name) == fingerprint
+
+
+def store_schema_fingerprint(name, fingerprint):
+    """Enregistre l'empreinte de ``name`` une fois ses tables créées / mises à jour."""
+    dbh.execute_sql(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_FINGERPRINT_TABLE} "
+        "(name VARCHAR(64) PRIMARY KEY, fingerprint VARCHAR(40) NOT NULL)"
+    )
+    dbh.execute_sql(
+        f"INSERT OR REPLACE INTO {SCHEMA_FINGERPRINT_TABLE} (name, fingerprint) VALUES (?, ?)",
+        (name, fingerprint),
+    )
+    if _schema_fingerprints is not None:
+        _schema_fingerprints[name] = fingerprint
+
+
+def _create_database():
+    """Crée ``dbh`` (sans ouvrir de connexion) et l'attache aux modèles."""
+    global dbh
+    if dbh is not None:
+        return dbh
+    logger.info("Création de la connexion à la base de données")
+    dbh = _AppDatabase(
+        DB_FILE,
+        timeout=BUSY_TIMEOUT,
+        pragmas={
+            'journal_mode': 'wal',  # Write-Ahead Logging
+            'cache_size': -64 * 1000,  # 64MB cache
+            'foreign_keys': 1,
+            'ignore_check_constraints': 0,
+            'synchronous': 0,  # Let the OS handle syncing
+            'temp_store': 2,  # Store temp tables and indices in memory
+        }
+    )
+    # Définir la base de données pour tous les modèles
+    for model in _MODELS:
+        model._meta.database = dbh
+    if query_audit():
+        from .query_audit import auditor
 
-        _ensure_legacy_sqlite_columns()
-        
-        # Initialisation des paramètres par défaut
-        Settings.init_settings()
-        logger.info("Paramètres par défaut initialisés")
-        
-        # Initialisation des enregistrements par défaut
-        # IMPORTANT: L'ordre est crucial - l'organisation doit être créée avant l'utilisateur
-        init_default_version()
-        init_default_organization()  # Créer l'organisation en premier
-        init_default_superuser()  # Créer l'utilisateur après l'organisation
-        
-        return True
-    except Exception as e:
-        logger.error(f"Erreur lors de l'initialisation de la base de données: {e}")
-        return False
+        auditor().attach(dbh)
+    return dbh
+
+
+def init_database(force=False):
+    """
+    Initialise la base de données et crée les tables si nécessaire.
 
-# Initialisation de la base de données au chargement du module
-init_database()
+    Les vérifications (tables, colonnes legacy, enregistrements par défaut) ne
+    sont faites qu'une fois par processus ; ``force=True`` les refait, par
+    exemple après le remplacement du fichier de base (import d'une sauvegarde).
+    """
+    global _db_ready, _db_setup_running, _schema_fingerprints
+    if _db_ready and not force:
+        return True
+    with _db_lock:
+        if _db_setup_running:
+            # appel réentrant depuis la connexion ouverte ci-dessous
+            return True
+        if _db_ready and not force:
+            return True
+        _db_setup_running = True
+        try:
+            logger.info("Initialisation de la base de données")
+            _create_database()
+            if force:
+                _schema_fingerprints = None  # le fichier a pu être remplacé
+                # lecteurs ouverts sur l'ancien fichier (et son -wal)
+                read_pool().close_all()
+
+            # Vérification si la base de données est déjà connectée
+            if dbh.is_closed():
+                logger.info("Connexion à la base de données")
+                dbh.connect()
+            logger.info("Base de données connectée")
+            
+            # Création des tables : seulement si le schéma a changé depuis
+            # le dernier lancement (sinon une seule lecture)
+            fingerprint = schema_fingerprint(_MODELS, _LEGACY_COLUMNS)
+            if schema_is_current("common", fingerprint):
+                logger.debug("Schéma inchangé, création des tables ignorée")
+            else:
+                dbh.create_tables(_MODELS, safe=True)
+                _ensure_legacy_sqlite_columns()
+                store_schema_fingerprint("common", fingerprint)
+                logger.info("Tables créées avec succès")
+            
+            # Initialisation des paramètres par défaut
+            Settings.init_settings()
+            logger.info("Paramètres par défaut initialisés")
+            
+            # Initialisation des enregistrements par défaut
+            # IMPORTANT: L'ordre est crucial - l'organisation doit être créée avant l'utilisateur
+            init_default_version()
+            init_default_organization()  # Créer l'organisation en premier
+            init_default_superuser()  # Créer l'utilisateur après l'organisation
+            # lignes uniques éventuellement insérées en SQL direct ci-dessus
+            clear_singleton_caches()
+            
+            _db_ready = True
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation de la base de données: {e}")
+            return False
+        finally:
+            _db_setup_running = False
+
+# Modèles dont les tables sont créées par init_database
+_MODELS = [
+    BaseModel,
+    FileJoin,
+    Owner,
+    Organization,
+    License,
+    Version,
+    History,
+    Settings
+]
+
+# La connexion est créée au chargement du module (sans être ouverte) ; en mode
+# démarrage rapide, les tables sont vérifiées à la première connexion seulement
+_create_database()
+if not fast_startup():
+    init_database()
@@ -3,10 +3,9 @@
 from __future__ import annotations
 
 import base64
-import os
-import tempfile
 from io import BytesIO
 from pathlib import Path
+from threading import Lock
 
 
 def decode_org_logo_bytes(logo_field) -> bytes | None:
@@ -51,30 +50,78 @@ def image_suffix_from_bytes(raw: bytes) -> str:
     return ".png"
 
 
-def write_org_logo_temp_file(logo_field) -> str | None:
-    """
-    Écrit le logo sur disque (PNG via Pillow si possible, sinon octets bruts).
-    L’appelant doit supprimer le fichier après usage (xlsxwriter lit le chemin).
-    """
-    raw = decode_org_logo_bytes(logo_field)
-    if not raw:
-        return None
+def _scale_logo(raw: bytes, max_width: int, max_height: int):
+    """(PNG, largeur, hauteur) réduit pour tenir dans la boîte ; octets bruts sans Pillow."""
     try:
         from PIL import Image
 
         pil = Image.open(BytesIO(raw))
         pil.load()
-        fd, path = tempfile.mkstemp(suffix=".png", prefix="orglogo_")
-        os.close(fd)
-        pil.save(path, format="PNG")
-        return path
-    except Exception:
-        pass
-    suf = image_suffix_from_bytes(raw)
-    try:
-        fd, path = tempfile.mkstemp(suffix=suf, prefix="orglogo_")
-        with os.fdopen(fd, "wb") as f:
-            f.write(raw)
-        return path
+        if pil.mode not in ("RGB", "RGBA", "L", "LA"):
+            pil = pil.convert("RGBA")
+        pil.thumbnail((max_width, max_height))
+        out = BytesIO()
+        pil.save(out, format="PNG")
+        return out.getvalue(), pil.size[0], pil.size[1]
     except Exception:
-        return None
+        return raw, None, None
+
+
+class Letterhead:
+    """En-tête organisation pour les exports : ligne Organization + logo décodé une fois."""
+
+    def __init__(self, org, raw_logo: bytes | None):
+        self.org = org
+        self._raw = raw_logo
+        self._scaled = {}
+        # exports PDF / XLSX lancés depuis plusieurs threads
+        self._scaled_lock = Lock()
+
+    @property
+    def has_logo(self) -> bool:
+        return bool(self._raw)
+
+    def logo_png(self, max_width: int, max_height: int):
+        """
+        Logo réduit (jamais agrandi) pour tenir dans ``max_width`` × ``max_height`` pixels :
+        tuple (octets, largeur, hauteur), dimensions None si Pillow est absent ; None sans logo.
+        Chaque taille demandée n’est calculée qu’une fois.
+        """
+        if not self._raw:
+            return None
+        key = (int(max_width), int(max_height))
+        with self._scaled_lock:
+            scaled = self._scaled.get(key)
+            if scaled is None:
+                scaled = _scale_logo(self._raw, *key)
+                self._scaled[key] = scaled
+        return scaled
+
+
+_letterhead: Letterhead | None = None
+_letterhead_lock = Lock()
+
+
+def org_letterhead() -> Letterhead:
+    """
+    En-tête de l’organisation id=1, partagé par tous les exports (threads compris).
+    Aucune requête tant que la ligne est en cache : reconstruit après
+    ``invalidate_letterhead()`` (appelé par Organization.save / delete_instance) ou
+    quand ``Organization.cached()`` a été vidé et relu. Lève Organization.DoesNotExist.
+    """
+    global _letterhead
+    from .models import Organization
+
+    org = Organization.cached()
+    with _letterhead_lock:
+        if _letterhead is not None and _letterhead.org is org:
+            return _letterhead
+        letterhead = Letterhead(org, decode_org_logo_bytes(getattr(org, "logo_orga", None)))
+        _letterhead = letterhead
+        return letterhead
+
+
+def invalidate_letterhead() -> None:
+    global _letterhead
+    with _letterhead_lock:
+        _letterhead = None
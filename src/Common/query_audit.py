@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Audit des plans de requêtes SQLite (mode développement).
+
+Chaque forme de requête distincte (SQL paramétré, listes ``IN (?, ?, …)``
+ramenées à une seule forme) passe une fois par ``EXPLAIN QUERY PLAN`` ; un
+parcours complet de table (``SCAN table`` sans index) est signalé dans le log
+avec une estimation du nombre de lignes parcourues.
+
+Activé pour ``dbh`` par ``QUERY_AUDIT`` / ``COMMON_QUERY_AUDIT=1`` ; une base
+propre à l'application s'audite avec ``auditor().attach(db)``.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+
+from .cstatic import logger
+
+# Instructions auditées (les autres n'ont pas de plan de lecture utile)
+_AUDITED = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+# "SCAN owner" (SQLite >= 3.36) ou "SCAN TABLE owner" ; "USING INDEX" = pas un parcours de table
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?: AS \w+)?$')
+# Le plan nomme la table par son alias peewee ("t1") : alias -> table
+_TABLE_ALIAS = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE
+)
+
+# Au-delà, un parcours complet est signalé en avertissement (sinon en info)
+SCAN_WARN_ROWS = 1000
+
+
+def query_shape(sql):
+    """Forme de la requête : les listes de paramètres de longueur variable sont fusionnées."""
+    return _PARAM_LIST.sub("?…", " ".join(sql.split()))
+
+
+class QueryAuditor:
+    """Plans des requêtes exécutées, une analyse par forme de requête."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._row_counts = {}
+        # [(forme, table, lignes estimées)]
+        self.full_scans = []
+
+    def attach(self, db):
+        """Audite toutes les requêtes passant par ``db.execute_sql``."""
+        if getattr(db, "_query_auditor", None) is self:
+            return db
+        execute_sql = db.execute_sql
+
+        def audited_execute_sql(sql, params=None, *args, **kwargs):
+            self.observe(db, sql, params)
+            return execute_sql(sql, params, *args, **kwargs)
+
+        db.execute_sql = audited_execute_sql
+        db._query_auditor = self
+        return db
+
+    def observe(self, db, sql, params=None):
+        if not _AUDITED.match(sql):
+            return
+        shape = query_shape(sql)
+        with self._lock:
+            if shape in self._seen:
+                return
+            self._seen.add(shape)
+        try:
+            plan = db.cursor().execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        except Exception as e:
+            logger.debug("Plan de requête indisponible (%s) : %s", e, shape)
+            return
+        aliases = {alias or table: table for table, alias in _TABLE_ALIAS.findall(sql)}
+        for row in plan:
+            match = _FULL_SCAN.match(row[-1])
+            if match:
+                table = aliases.get(match.group(1), match.group(1))
+                if not table.startswith("sqlite_"):
+                    self._report(db, shape, table)
+
+    def _report(self, db, shape, table):
+        rows = self._estimate_rows(db, table)
+        with self._lock:
+            self.full_scans.append((shape, table, rows))
+        level = logger.warning if rows is None or rows >= SCAN_WARN_ROWS else logger.info
+        level(
+            "🐢 Parcours complet de %s (~%s ligne(s)) : %s",
+            table,
+            "?" if rows is None else rows,
+            shape,
+        )
+
+    def _estimate_rows(self, db, table):
+        """Lignes de ``table`` : sqlite_stat1 (après ANALYZE) sinon count(*), mémorisé."""
+        if table in self._row_counts:
+            return self._row_counts[table]
+        rows = None
+        cursor = db.cursor()
+        try:
+            stat = cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)
+            ).fetchone()
+            if stat:
+                rows = int(stat[0].split()[0])
+        except Exception:
+            pass  # pas de sqlite_stat1 tant qu'ANALYZE n'a pas été lancé
+        if rows is None:
+            try:
+                rows = cursor.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+            except Exception:
+                rows = None
+        self._row_counts[table] = rows
+        return rows
+
+    def summary(self):
+        """Parcours complets relevés, du plus coûteux au moins coûteux."""
+        with self._lock:
+            scans = list(self.full_scans)
+        return sorted(scans, key=lambda s: -(s[2] or 0))
+
+
+_auditor = None
+
+
+def auditor():
+    """Auditeur partagé du processus."""
+    global _auditor
+    if _auditor is None:
+        _auditor = QueryAuditor()
+    return _auditor
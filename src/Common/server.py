@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 
+import gzip
 import json
+import time
+from threading import Event, Lock, Thread
 
-import requests
-from PyQt6.QtCore import QObject
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 
 from .cstatic import logger
 from .info_hot import getSystemInfo
@@ -16,38 +18,277 @@ except Exception as exc:
     logger.error(f"Erreur lors de l'importation de CConstants: {exc}")
 
 
+# Délai maximal d'une requête de synchronisation (connexion, réponse), en secondes
+HTTP_TIMEOUT = (5, 60)
+
+# Vérification de la connexion au serveur : délai court, puis en arrière-plan
+# toutes les CONNECTIVITY_INTERVAL s ; hors ligne, intervalle doublé à chaque
+# échec de CONNECTIVITY_BACKOFF_MIN à CONNECTIVITY_BACKOFF_MAX s.
+CONNECTIVITY_TIMEOUT = (2, 3)
+CONNECTIVITY_INTERVAL = 60
+CONNECTIVITY_BACKOFF_MIN = 5
+CONNECTIVITY_BACKOFF_MAX = 300
+
+# Requêtes asynchrones simultanées au maximum (submit_async)
+MAX_CONCURRENT_REQUESTS = 4
+
+_session = None
+_session_lock = Lock()
+
+
+def http_session():
+    """Session HTTP partagée : connexions keep-alive réutilisées d'une requête à l'autre."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests  # import différé : inutile au démarrage
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+class ConnectivityMonitor:
+    """
+    État de la connexion au serveur, gardé en cache.
+
+    La première question fait une vérification (une requête sur la session
+    partagée) ; ensuite un thread la rafraîchit en arrière-plan, avec un
+    intervalle croissant tant que le serveur est injoignable. Chaque requête
+    normale met aussi l'état à jour (``report``) : ``access_server()`` ne coûte
+    plus de connexion.
+    """
+
+    def __init__(self, url_getter):
+        self._url_getter = url_getter
+        self.online = None
+        self.checked_at = 0.0
+        self._delay = CONNECTIVITY_BACKOFF_MIN
+        self._lock = Lock()
+        self._wake = Event()
+        self._thread = None
+
+    def check(self):
+        """Vérification immédiate ; retourne le nouvel état."""
+        try:
+            response = http_session().get(
+                self._url_getter(), timeout=CONNECTIVITY_TIMEOUT, stream=True
+            )
+            response.close()
+            online = response.status_code < 400
+        except Exception as e:
+            logger.debug(f"Serveur injoignable: {e}")
+            online = False
+        self.report(online)
+        return online
+
+    def report(self, online):
+        """Enregistre l'état constaté et recalcule l'intervalle de vérification."""
+        was_online = self.online
+        if online:
+            self._delay = CONNECTIVITY_INTERVAL
+        elif was_online is False:
+            self._delay = min(self._delay * 2, CONNECTIVITY_BACKOFF_MAX)
+        else:
+            self._delay = CONNECTIVITY_BACKOFF_MIN
+        if was_online is not None and online != was_online:
+            logger.info("Connexion au serveur %s", "rétablie" if online else "perdue")
+        self.online = online
+        self.checked_at = time.monotonic()
+
+    def is_online(self):
+        if self.online is None:
+            with self._lock:
+                if self.online is None:
+                    self.check()
+        self._start()
+        return self.online
+
+    def refresh_soon(self):
+        """Demande une vérification sans attendre la fin de l'intervalle."""
+        self._wake.set()
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = Thread(
+                        target=self._run, name="connectivity", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._delay)
+            self._wake.clear()
+            self.check()
+
+
+_connectivity = None
+
+
+def connectivity():
+    """Moniteur de connexion au serveur (créé à la première utilisation)."""
+    global _connectivity
+    if _connectivity is None:
+        with _session_lock:
+            if _connectivity is None:
+                _connectivity = ConnectivityMonitor(lambda: get_server_url(""))
+    return _connectivity
+
+
+class BatchNotSupported(Exception):
+    """Le serveur ne connaît pas le point d'entrée d'envoi groupé."""
+
+
+def post_json(full_url, data, timeout=HTTP_TIMEOUT):
+    """
+    POST ``data`` en JSON compressé gzip sur la session partagée.
+    Retourne la réponse décodée ; lève BatchNotSupported (404) ou les erreurs
+    réseau de requests.
+    """
+    body = gzip.compress(
+        json.dumps(data, separators=(",", ":")).encode("utf-8"), compresslevel=5
+    )
+    response = http_session().post(
+        full_url,
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Accept-Encoding": "gzip",
+        },
+        timeout=timeout,
+    )
+    if response.status_code == 404:
+        raise BatchNotSupported(full_url)
+    response.raise_for_status()
+    return response.json()
+
+
+class NetworkRequestSignals(QObject):
+    # (requête, réponse décodée ou None)
+    finished = pyqtSignal(object, object)
+
+
+class NetworkRequest(QRunnable):
+    """Appel ``Network.submit`` exécuté dans le pool : le thread GUI n'attend pas le réseau."""
+
+    def __init__(self, url, data):
+        super().__init__()
+        self.url = url
+        self.data = data
+        self.signals = NetworkRequestSignals()
+        # la référence Python est gardée jusqu'au signal finished
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            resp = submit(self.url, self.data)
+        except Exception as e:
+            logger.error(f"Erreur lors de la requête {self.url}: {e}")
+            resp = None
+        self.signals.finished.emit(self, resp)
+
+
+_request_pool = None
+_pending_requests = set()
+
+
+def _pool():
+    global _request_pool
+    if _request_pool is None:
+        _request_pool = QThreadPool()
+        _request_pool.setMaxThreadCount(MAX_CONCURRENT_REQUESTS)
+    return _request_pool
+
+
+def submit_async(url, data, callback=None):
+    """
+    Envoie ``data`` sans bloquer ; ``callback(réponse)`` est appelé sur le
+    thread qui a fait l'appel (thread GUI) quand la réponse arrive.
+    """
+    request = NetworkRequest(url, data)
+    _pending_requests.add(request)
+
+    def _done(req, resp):
+        _pending_requests.discard(req)
+        if callback is not None:
+            callback(resp)
+
+    request.signals.finished.connect(_done)
+    _pool().start(request)
+    return request
+
+
+def submit(url, data):
+    """Requête au serveur sur la session partagée ; réponse décodée, ou None."""
+    logger.debug(f"Envoi de données au serveur - URL: {url}, Données: {data}")
+    resp_dict = {"response": {"message": "-"}}
+    if access_server():
+        client = http_session()
+        try:
+            logger.info(f"Tentative de connexion à {get_server_url(url)}")
+            response = client.get(
+                get_server_url(url), data=json.dumps(data), timeout=HTTP_TIMEOUT
+            )
+            connectivity().report(True)
+            logger.info(f"Réponse du serveur - Status: {response.status_code}")
+            if response.status_code == 200:
+                logger.debug(f"Réponse du serveur - Contenu: {response.content}")
+                try:
+                    return json.loads(response.content.decode("UTF-8"))
+                except Exception as e:
+                    logger.error(f"Erreur lors du décodage de la réponse: {e}")
+                    return {"response": e}
+        except Exception as e:
+            logger.error(f"Erreur de connexion au serveur: {e}")
+            connectivity().report(False)
+            return resp_dict.update({"response": "Serveur non disponible"})
+    else:
+        logger.warning("Pas de connexion internet")
+        return resp_dict.update({"response": "Pas d'internet"})
+
+
 class Network(QObject):
     def __init__(self):
         QObject.__init__(self)
         logger.info("Initialisation de la connexion serveur")
 
     def submit(self, url, data):
-        logger.debug(f"Envoi de données au serveur - URL: {url}, Données: {data}")
-        resp_dict = {"response": {"message": "-"}}
-        if access_server():
-            client = requests.session()
-            try:
-                logger.info(f"Tentative de connexion à {get_server_url(url)}")
-                response = client.get(get_server_url(url), data=json.dumps(data))
-                logger.info(f"Réponse du serveur - Status: {response.status_code}")
-                if response.status_code == 200:
-                    logger.debug(f"Réponse du serveur - Contenu: {response.content}")
-                    try:
-                        return json.loads(response.content.decode("UTF-8"))
-                    except Exception as e:
-                        logger.error(f"Erreur lors du décodage de la réponse: {e}")
-                        return {"response": e}
-            except Exception as e:
-                logger.error(f"Erreur de connexion au serveur: {e}")
-                return resp_dict.update({"response": "Serveur non disponible"})
-        else:
-            logger.warning("Pas de connexion internet")
-            return resp_dict.update({"response": "Pas d'internet"})
+        return submit(url, data)
+
+    def submit_async(self, url, data, callback=None):
+        """Version non bloquante de ``submit`` (voir ``submit_async``)."""
+        return submit_async(url, data, callback)
+
+    def submit_batch(self, url, data):
+        """
+        Envoi groupé (corps gzip) pour la synchronisation ; la disponibilité du
+        serveur est vérifiée une fois par l'appelant, pas à chaque page.
+        Retourne la réponse décodée, ou None en cas d'erreur ; lève
+        BatchNotSupported si le serveur n'a pas ce point d'entrée.
+        """
+        try:
+            resp = post_json(get_server_url(url), data)
+        except BatchNotSupported:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors de l'envoi groupé vers {url}: {e}")
+            connectivity().report(False)
+            return None
+        connectivity().report(True)
+        return resp
 
     def update_version_checher(self):
         # logger.debug("update_version_checher")
 
-        orga = Organization.get(id=1)
+        orga = Organization.cached()
         vm_lcse, _ = is_valide_mac()
         data = {
             "org_slug": orga.slug,
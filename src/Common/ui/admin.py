@@ -147,6 +147,8 @@ class TrashTableWidget(FTableWidget):
         self.ecart = -5
         self.display_vheaders = False
         self.display_fixed = True
+        # les lignes d'historique sont des tuples : la ligne sert de clé
+        self.row_key = tuple
 
         self.refresh_()
 
@@ -137,7 +137,7 @@ class FMainWindow(QMainWindow):
     def exit(self):   
         print("Fermeture de l'application")
         from ..models import Settings
-        settings = Settings.select().where(Settings.id == 1).first()
+        settings = Settings.cached_or_none()
         print(settings.auth_required)
         if settings.auth_required:
             print("logout")
@@ -402,7 +402,7 @@ class CommonMainWindow(QMainWindow, FWindow):
         from ..models import Owner
         try:
             # Mise à jour atomique de tous les utilisateurs connectés
-            Owner.update(is_identified=False).where(Owner.is_identified).execute()
+            Owner.update(is_identified=False).where(Owner.is_identified == True).execute()
             logger.info("Déconnexion réussie de tous les utilisateurs")
         except Exception as e:
             logger.error(f"Erreur lors de la déconnexion: {e}")
@@ -412,7 +412,7 @@ class CommonMainWindow(QMainWindow, FWindow):
         import sys
         logger.info("Fermeture de l'application")
         try:
-            settings = Settings.select().where(Settings.id == 1).first()
+            settings = Settings.cached_or_none()
             if settings and settings.auth_required:
                 logger.info("Déconnexion avant fermeture")
                 self.logout()
@@ -425,10 +425,10 @@ class CommonMainWindow(QMainWindow, FWindow):
     def check_session(self):
         """Vérifie la validité de la session active"""
         from ..models import Owner, Settings
-        settings = Settings.select().where(Settings.id == 1).first()
+        settings = Settings.cached_or_none()
         
         if settings and settings.auth_required:
-            connected_owner = Owner.select().where(Owner.is_identified).first()
+            connected_owner = Owner.select().where(Owner.is_identified == True).first()
             if connected_owner and not connected_owner.is_session_valid():
                 logger.warning(f"Session expirée pour l'utilisateur: {connected_owner.username}")
                 self.logout()
@@ -3,16 +3,17 @@
 # vim: ai ts=4 sts=4 et sw=4 nu
 # maintainer: Fad
 
-import re
+from array import array
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from collections import Counter
+from threading import Event
 
-from PyQt6.QtCore import Qt, QTimer, QDate, QRegularExpression
-from PyQt6.QtGui import (
-    QTextCharFormat, QColor, QTextCursor, QFont,
-    QSyntaxHighlighter
+from PyQt6.QtCore import (
+    Qt, QTimer, QDate, QAbstractListModel, QModelIndex, QRect, QSize,
+    QObject, QRunnable, QThreadPool, pyqtSignal,
 )
+from PyQt6.QtGui import QColor, QFont, QFontMetrics
 from PyQt6.QtWidgets import (
     QDialog,
     QVBoxLayout,
@@ -20,67 +21,246 @@ from PyQt6.QtWidgets import (
     QComboBox,
     QLineEdit,
     QLabel,
-    QTextEdit,
+    QListView,
     QCheckBox,
     QMessageBox,
     QDateEdit,
     QSpinBox,
     QGroupBox,
     QFileDialog,
+    QStyle,
+    QStyledItemDelegate,
 )
 
 from .common import FWidget, Button
 from ..cstatic import logger
+from ..log_index import LEVEL_CODES, LEVEL_NAMES, LogIndex
 
 
-class LogHighlighter(QSyntaxHighlighter):
-    """Highlighter pour mettre en évidence les termes de recherche"""
-    
+class LogListModel(QAbstractListModel):
+    """Modèle des lignes de log affichées.
+
+    Seuls les numéros de ligne (``range`` ou ``array``) sont gardés ; le texte
+    est lu dans l'index au moment de l'affichage, par pages mises en cache.
+    Le coût d'un filtre ou d'un défilement ne dépend donc pas de la taille du log.
+    """
+
+    LevelRole = Qt.ItemDataRole.UserRole + 1
+    PAGE_ROWS = 256
+    MAX_CACHED_PAGES = 64
+
     def __init__(self, parent=None):
-        super().__init__(parent)
-        self.search_pattern = None
-        self.regex = None  # Initialiser regex pour éviter AttributeError
-        self.highlight_format = QTextCharFormat()
-        self.highlight_format.setBackground(QColor(255, 255, 0, 100))  # Jaune transparent
-        self.highlight_format.setForeground(QColor(0, 0, 0))
-        
-    def set_search_pattern(self, pattern):
-        """Définit le motif de recherche à mettre en évidence"""
-        self.search_pattern = pattern
-        if pattern:
-            try:
-                self.regex = QRegularExpression(
-                    QRegularExpression.escape(pattern),
-                    QRegularExpression.PatternOption.CaseInsensitiveOption
-                )
-            except Exception as e:
-                from ..cstatic import logger
-                logger.error(f"Erreur lors de la création de la regex: {e}")
-                self.regex = None
+        QAbstractListModel.__init__(self, parent)
+        self.log_index = None
+        self._rows = range(0)
+        self._pages = OrderedDict()
+
+    def set_rows(self, log_index, rows):
+        self.beginResetModel()
+        self.log_index = log_index
+        self._rows = rows
+        self._pages.clear()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_rows(self.log_index, range(0))
+
+    def append_rows(self, rows):
+        """Ajoute des numéros de ligne en fin de liste (résultats partiels d'un filtre)."""
+        if not rows:
+            return
+        if isinstance(self._rows, range):
+            self._rows = array('Q', self._rows)
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        # la dernière page en cache était peut-être incomplète
+        self._pages.pop(first // self.PAGE_ROWS, None)
+        self.endInsertRows()
+
+    def remove_first_rows(self, count):
+        """Retire les ``count`` premières lignes (fenêtre glissante du suivi en direct)."""
+        count = min(count, len(self._rows))
+        if count <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, count - 1)
+        self._rows = self._rows[count:]
+        self._pages.clear()
+        self.endRemoveRows()
+
+    def shift_rows(self, dropped):
+        """Renumérote après la suppression de ``dropped`` lignes en tête de l'index (rotation)."""
+        self.set_rows(self.log_index, array('Q', (n - dropped for n in self._rows if n >= dropped)))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def entries(self, start, stop):
+        """``(code de niveau, ligne)`` des lignes affichées ``[start, stop)``."""
+        if self.log_index is None:
+            return []
+        return self.log_index.entries_at(self._rows[start:stop])
+
+    def entry(self, row):
+        page_no = row // self.PAGE_ROWS
+        page = self._pages.get(page_no)
+        if page is None:
+            start = page_no * self.PAGE_ROWS
+            page = self.entries(start, start + self.PAGE_ROWS)
+            self._pages[page_no] = page
+            if len(self._pages) > self.MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
         else:
-            self.regex = None
+            self._pages.move_to_end(page_no)
         try:
-            self.rehighlight()
+            return page[row % self.PAGE_ROWS]
+        except IndexError:
+            return 0, ""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.entry(index.row())[1]
+        if role == self.LevelRole:
+            return LEVEL_NAMES[self.entry(index.row())[0]]
+        return None
+
+
+class LogFilterSignals(QObject):
+    # (génération, numéros de ligne trouvés depuis le dernier envoi)
+    rows = pyqtSignal(int, object)
+    # (génération, limite atteinte)
+    finished = pyqtSignal(int, bool)
+    # (génération, message d'erreur)
+    failed = pyqtSignal(int, str)
+
+
+class LogFilterJob(QRunnable):
+    """Filtre niveau / texte exécuté hors du thread GUI.
+
+    Les résultats sont envoyés par lots au fil du parcours ; ``cancel()`` arrête
+    le parcours à la page suivante. La génération permet au widget d'ignorer
+    les lots d'une recherche déjà remplacée. ``finished`` ou ``failed`` est
+    toujours émis, même après une annulation : le widget sait ainsi quand le
+    parcours a cessé de lire l'index.
+    """
+
+    # Lignes trouvées par lot envoyé à la vue
+    BATCH_ROWS = 1000
+
+    def __init__(self, generation, log_index, start, level, text, limit, page):
+        super().__init__()
+        self.generation = generation
+        self.log_index = log_index
+        self.start = start
+        self.level = level
+        self.text = text
+        self.limit = limit
+        self.page = page
+        self.signals = LogFilterSignals()
+        self._cancel = Event()
+        # le widget garde la référence Python : pas de suppression côté Qt
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        found = 0
+        batch = array('Q')
+        try:
+            for n in self.log_index.matching_lines(
+                self.start, self.level, self.text, page=self.page, cancel=self._cancel
+            ):
+                if found == self.limit:
+                    break
+                batch.append(n)
+                found += 1
+                if len(batch) >= self.BATCH_ROWS:
+                    self.signals.rows.emit(self.generation, batch)
+                    batch = array('Q')
+            else:
+                found = -1  # parcours complet : limite non atteinte
         except Exception as e:
-            from ..cstatic import logger
-            logger.debug(f"Erreur lors du rehighlight (document peut-être non initialisé): {e}")
-    
-    def highlightBlock(self, text):
-        """Applique le highlighting sur un bloc de texte"""
-        if self.regex and self.search_pattern:
-            try:
-                iterator = self.regex.globalMatch(text)
-                while iterator.hasNext():
-                    match = iterator.next()
-                    if match.isValid():
-                        self.setFormat(
-                            match.capturedStart(),
-                            match.capturedLength(),
-                            self.highlight_format
-                        )
-            except Exception as e:
-                from ..cstatic import logger
-                logger.debug(f"Erreur lors du highlighting: {e}")
+            logger.exception("Erreur lors du filtrage des logs: %s", e)
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        if batch and not self._cancel.is_set():
+            self.signals.rows.emit(self.generation, batch)
+        self.signals.finished.emit(self.generation, found == self.limit)
+
+
+class LogLineDelegate(QStyledItemDelegate):
+    """Dessine une ligne de log : couleur selon le niveau, termes recherchés surlignés."""
+
+    # Largeur annoncée d'une ligne (en caractères) : toutes les lignes ont la même
+    # taille (uniformItemSizes), la barre horizontale reste utilisable.
+    LINE_WIDTH_CHARS = 300
+    # niveau -> (couleur du texte, gras, fond)
+    LEVEL_STYLES = {
+        'DEBUG': (QColor(128, 128, 128), False, None),
+        'INFO': (QColor(0, 0, 255), False, None),
+        'WARNING': (QColor(255, 165, 0), True, None),
+        'ERROR': (QColor(255, 0, 0), True, None),
+        'CRITICAL': (QColor(139, 0, 0), True, QColor(255, 200, 200)),
+    }
+    DEFAULT_STYLE = (QColor(0, 0, 0), False, None)
+    HIGHLIGHT = QColor(255, 255, 0, 100)  # Jaune transparent
+
+    def __init__(self, parent=None):
+        QStyledItemDelegate.__init__(self, parent)
+        self.search_text = ""
+
+    def paint(self, painter, option, index):
+        text = index.data(Qt.ItemDataRole.DisplayRole) or ""
+        color, bold, background = self.LEVEL_STYLES.get(
+            index.data(LogListModel.LevelRole), self.DEFAULT_STYLE
+        )
+        rect = option.rect
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+            color = option.palette.highlightedText().color()
+        elif background is not None:
+            painter.fillRect(rect, background)
+
+        font = QFont(option.font)
+        font.setBold(bold)
+        painter.setFont(font)
+        text_rect = rect.adjusted(4, 0, 0, 0)
+        if self.search_text:
+            metrics = QFontMetrics(font)
+            lower = text.lower()
+            size = len(self.search_text)
+            pos = lower.find(self.search_text)
+            while pos >= 0:
+                left = metrics.horizontalAdvance(text[:pos])
+                width = metrics.horizontalAdvance(text[pos:pos + size])
+                painter.fillRect(
+                    QRect(text_rect.x() + left, rect.y(), width, rect.height()),
+                    self.HIGHLIGHT,
+                )
+                pos = lower.find(self.search_text, pos + size)
+        painter.setPen(color)
+        painter.drawText(
+            text_rect,
+            int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter),
+            text,
+        )
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        metrics = QFontMetrics(option.font)
+        return QSize(
+            metrics.horizontalAdvance("M") * self.LINE_WIDTH_CHARS,
+            metrics.height() + 2,
+        )
 
 
 class LogViewerWidget(QDialog, FWidget):
@@ -88,7 +268,12 @@ class LogViewerWidget(QDialog, FWidget):
     
     # Limite de lignes pour les gros fichiers (performance)
     MAX_LINES_DISPLAY = 10000
-    MAX_LINES_LOAD = 50000
+    # Lignes lues par page dans l'index pendant le filtrage
+    PAGE_LINES = 2000
+    # Intervalle de vérification du suivi en direct (ms)
+    TAIL_INTERVAL_MS = 1000
+    # Délai sans frappe avant de relancer la recherche (ms)
+    SEARCH_DEBOUNCE_MS = 250
     
     def __init__(self, parent=None, *args, **kwargs):
         QDialog.__init__(self, parent, *args, **kwargs)
@@ -100,18 +285,31 @@ class LogViewerWidget(QDialog, FWidget):
         
         # Variables d'état
         self.log_file_path = None
-        self.raw_logs = ""
-        self.all_log_lines = []
+        self.log_index = None
         self.log_stats = {}
         self.current_search_index = -1
         self.search_matches = []
         self.font_size = 9
+        self.filter_was_at_bottom = False
         self.max_lines_to_display = self.MAX_LINES_DISPLAY
         
         # Timer pour l'auto-refresh
         self.auto_refresh = False
         self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_logs)
+        self.refresh_timer.timeout.connect(self.tail_logs)
+        
+        # Filtrage en arrière-plan : une seule recherche à la fois, la
+        # précédente est annulée dès qu'une nouvelle est lancée
+        self.filter_pool = QThreadPool(self)
+        self.filter_pool.setMaxThreadCount(1)
+        # génération -> recherche encore en cours, annulée ou non : gardée
+        # jusqu'à son signal finished / failed
+        self.filter_jobs = {}
+        self.filter_generation = 0
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_logs)
         
         self.init_ui()
         self.load_log_file_path()
@@ -167,7 +365,7 @@ class LogViewerWidget(QDialog, FWidget):
         self.search_field.setPlaceholderText("Rechercher dans les logs...")
         self.search_field.setMinimumWidth(200)
         self.search_field.textChanged.connect(self.on_search_changed)
-        self.search_field.returnPressed.connect(self.search_next)
+        self.search_field.returnPressed.connect(self.on_search_return)
         toolbar.addWidget(self.search_field)
         
         # Navigation de recherche
@@ -226,8 +424,10 @@ class LogViewerWidget(QDialog, FWidget):
         toolbar.addStretch()
         
         # Auto-refresh
-        self.auto_refresh_cb = QCheckBox("⏱️ Auto (5s)")
-        self.auto_refresh_cb.setToolTip("Actualisation automatique toutes les 5 secondes")
+        self.auto_refresh_cb = QCheckBox("⏱️ Suivi en direct")
+        self.auto_refresh_cb.setToolTip(
+            "Affiche les nouvelles lignes au fur et à mesure de leur écriture"
+        )
         self.auto_refresh_cb.toggled.connect(self.toggle_auto_refresh)
         toolbar.addWidget(self.auto_refresh_cb)
         
@@ -262,18 +462,17 @@ class LogViewerWidget(QDialog, FWidget):
         main_layout.addWidget(stats_group)
         
         # ========== ZONE DE LOGS ==========
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setFont(QFont("Courier New", self.font_size))
-        self.log_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
-        
-        # Configuration des couleurs pour les niveaux de log
-        self.setup_text_formats()
-        
-        # Ajouter le highlighter
-        self.highlighter = LogHighlighter(self.log_text.document())
-        
-        main_layout.addWidget(self.log_text)
+        # Vue virtualisée : seules les lignes visibles sont lues et dessinées
+        self.log_model = LogListModel(self)
+        self.log_delegate = LogLineDelegate(self)
+        self.log_view = QListView()
+        self.log_view.setModel(self.log_model)
+        self.log_view.setItemDelegate(self.log_delegate)
+        self.log_view.setUniformItemSizes(True)
+        self.log_view.setFont(QFont("Courier New", self.font_size))
+        self.log_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        
+        main_layout.addWidget(self.log_view)
         
         # ========== BARRE DE STATUT ==========
         status_layout = QHBoxLayout()
@@ -310,35 +509,6 @@ class LogViewerWidget(QDialog, FWidget):
         }
         return f"padding: 5px 10px; border-radius: 5px; background-color: #f5f5f5; {colors.get(level, '')}"
     
-    def setup_text_formats(self):
-        """Configure les formats de texte pour colorer les logs"""
-        self.formats = {
-            'DEBUG': QTextCharFormat(),
-            'INFO': QTextCharFormat(),
-            'WARNING': QTextCharFormat(),
-            'ERROR': QTextCharFormat(),
-            'CRITICAL': QTextCharFormat(),
-        }
-        
-        # DEBUG - gris
-        self.formats['DEBUG'].setForeground(QColor(128, 128, 128))
-        
-        # INFO - bleu
-        self.formats['INFO'].setForeground(QColor(0, 0, 255))
-        
-        # WARNING - orange
-        self.formats['WARNING'].setForeground(QColor(255, 165, 0))
-        self.formats['WARNING'].setFontWeight(QFont.Weight.Bold)
-        
-        # ERROR - rouge
-        self.formats['ERROR'].setForeground(QColor(255, 0, 0))
-        self.formats['ERROR'].setFontWeight(QFont.Weight.Bold)
-        
-        # CRITICAL - rouge foncé
-        self.formats['CRITICAL'].setForeground(QColor(139, 0, 0))
-        self.formats['CRITICAL'].setFontWeight(QFont.Weight.Bold)
-        self.formats['CRITICAL'].setBackground(QColor(255, 200, 200))
-    
     def load_log_file_path(self):
         """Charge le chemin du fichier log"""
         try:
@@ -387,118 +557,109 @@ class LogViewerWidget(QDialog, FWidget):
     def refresh_logs(self):
         """Charge et affiche les logs avec gestion des gros fichiers"""
         if not self.log_file_path or not self.log_file_path.exists():
-            self.log_text.setPlainText(
-                f"❌ Fichier de log introuvable.\n\n"
-                f"Chemin recherché: {self.log_file_path if self.log_file_path else 'Non défini'}"
+            self.log_model.clear()
+            self.status_label.setText(
+                f"❌ Fichier de log introuvable: "
+                f"{self.log_file_path if self.log_file_path else 'Non défini'}"
             )
-            self.status_label.setText("❌ Fichier de log introuvable")
             self.update_stats({})
             return
         
         try:
-            file_size = self.log_file_path.stat().st_size
-            size_mb = file_size / (1024 * 1024)
-            
-            # Pour les gros fichiers, lire seulement les dernières lignes
-            if size_mb > 10:  # Plus de 10 MB
-                self.status_label.setText(
-                    f"⏳ Chargement du fichier volumineux ({size_mb:.1f} MB)..."
-                )
-                self.log_text.setPlainText("⏳ Chargement en cours...")
-                QTimer.singleShot(100, lambda: self.load_large_file())
-            else:
-                self.load_normal_file()
-                
+            # l'index va être prolongé : aucun filtrage ne doit le lire en même temps
+            self.cancel_filter(wait=True)
+            self.load_index()
         except PermissionError:
-            self.log_text.setPlainText("❌ Permission refusée pour lire le fichier de log.")
-            self.status_label.setText("❌ Permission refusée")
+            self.log_model.clear()
+            self.status_label.setText("❌ Permission refusée pour lire le fichier de log")
             self.update_stats({})
         except Exception as e:
-            error_msg = f"❌ Erreur lors de la lecture du fichier de log:\n{str(e)}"
-            self.log_text.setPlainText(error_msg)
-            self.status_label.setText(f"❌ Erreur: {str(e)}")
+            self.log_model.clear()
+            self.status_label.setText(f"❌ Erreur lors de la lecture du fichier de log: {str(e)}")
             logger.error(f"Erreur lors de la lecture des logs: {e}")
             self.update_stats({})
     
-    def load_normal_file(self):
-        """Charge un fichier de taille normale"""
+    def tail_logs(self):
+        """
+        Suivi en direct : seuls les octets ajoutés depuis le dernier passage sont
+        lus, et seules les nouvelles lignes sont ajoutées à la vue et aux compteurs.
+        Quand rien n'est écrit, un tick se limite à un ``stat`` du fichier.
+        """
+        if self.log_index is None or self.filter_jobs:
+            # index absent, ou une recherche (même annulée) le parcourt encore :
+            # tail() le modifierait sous elle ; tick suivant
+            return
+        if self.log_index.path != self.log_file_path:
+            self.refresh_logs()
+            return
+        if not self.log_index.poll():
+            return
+        
         try:
-            with open(self.log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            self.raw_logs = content
-            self.all_log_lines = content.split('\n')
-            
-            # Calculer les statistiques
-            self.calculate_stats()
-            
-            # Appliquer les filtres
-            self.filter_logs()
-            
-            # Mettre à jour le statut
-            self.update_status()
-            
+            change = self.log_index.tail()
         except Exception as e:
-            logger.error(f"Erreur lors du chargement normal: {e}")
-            self.log_text.setPlainText(f"❌ Erreur: {str(e)}")
-    
-    def load_large_file(self):
-        """Charge un gros fichier en lisant seulement les dernières lignes"""
-        try:
-            # Lire les dernières lignes du fichier
-            with open(self.log_file_path, 'rb') as f:
-                # Aller à la fin du fichier
-                f.seek(0, 2)  # 2 = fin du fichier
-                file_size = f.tell()
-                
-                # Lire les derniers X MB (ou tout si plus petit)
-                bytes_to_read = min(5 * 1024 * 1024, file_size)  # 5 MB max
-                f.seek(max(0, file_size - bytes_to_read))
-                
-                # Lire et décoder
-                raw_bytes = f.read()
-                content = raw_bytes.decode('utf-8', errors='ignore')
-                
-                # Prendre seulement les dernières lignes
-                lines = content.split('\n')
-                if len(lines) > self.MAX_LINES_LOAD:
-                    lines = lines[-self.MAX_LINES_LOAD:]
-                    content = '\n'.join(lines)
-            
-            self.raw_logs = content
-            self.all_log_lines = lines
-            
-            # Calculer les statistiques
+            logger.error(f"Erreur lors du suivi des logs: {e}")
+            return
+        if change is None:
+            # fichier tronqué ou réécrit : les numéros de ligne ont changé
             self.calculate_stats()
-            
-            # Appliquer les filtres
             self.filter_logs()
-            
-            # Mettre à jour le statut
-            self.update_status()
-            
-            self.status_label.setText(
-                f"⚠️ Fichier volumineux - Affichage des {len(lines)} dernières lignes"
+            return
+        first_new, dropped = change
+        if dropped:
+            # rotation : les fichiers les plus anciens ont disparu
+            self.log_model.shift_rows(dropped)
+        
+        scrollbar = self.log_view.verticalScrollBar()
+        was_at_bottom = scrollbar.value() >= scrollbar.maximum() - 10
+        
+        # Appliquer les filtres aux seules nouvelles lignes
+        level_code = LEVEL_CODES.get(self.level_filter.currentText())
+        start = max(first_new, self.log_index.first_line_since(self.date_filter.date().toPyDate()))
+        rows = array('Q', self.log_index.matching_lines(
+            start, level_code, self.log_delegate.search_text, page=self.PAGE_LINES
+        ))
+        self.log_model.append_rows(rows)
+        # fenêtre glissante : on garde les dernières lignes
+        self.log_model.remove_first_rows(
+            self.log_model.rowCount() - self.max_lines_to_display
+        )
+        
+        self.calculate_stats()
+        if self.search_field.text():
+            count = self.log_model.rowCount()
+            self.search_matches = range(count)
+            self.current_search_index = min(self.current_search_index, count - 1)
+            self.search_count_label.setText(f"{count} résultat{'s' if count != 1 else ''}")
+        if rows and was_at_bottom and self.auto_scroll_cb.isChecked():
+            self.log_view.scrollToBottom()
+        self.update_status()
+    
+    def load_index(self):
+        """
+        Ouvre (ou prolonge) l'index du fichier de log : seules les lignes
+        ajoutées depuis le dernier passage sont lues. Pour app.log, les
+        rotations app.log.N sont incluses et tout l'historique reste accessible.
+        """
+        if self.log_index is None or self.log_index.path != self.log_file_path:
+            if self.log_index is not None:
+                self.log_index.save()
+            self.log_index = LogIndex(
+                self.log_file_path,
+                siblings=self.log_file_path.name == 'app.log',
             )
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement du gros fichier: {e}")
-            self.log_text.setPlainText(f"❌ Erreur: {str(e)}")
+        self.log_index.refresh()
+        self.log_index.save()
+        
+        # Calculer les statistiques
+        self.calculate_stats()
+        
+        # Appliquer les filtres
+        self.filter_logs()
     
     def calculate_stats(self):
-        """Calcule les statistiques sur les logs"""
-        stats = Counter()
-        total = 0
-        
-        for line in self.all_log_lines:
-            total += 1
-            for level in ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG']:
-                if f" - {level} - " in line:
-                    stats[level] += 1
-                    break
-        
-        self.log_stats = dict(stats)
-        self.log_stats['TOTAL'] = total
+        """Statistiques tenues à jour par l'index (aucune relecture du fichier)"""
+        self.log_stats = self.log_index.stats() if self.log_index else {}
         self.update_stats(self.log_stats)
     
     def update_stats(self, stats):
@@ -520,7 +681,7 @@ class LogViewerWidget(QDialog, FWidget):
             size_mb = file_size / (1024 * 1024)
             last_modified = datetime.fromtimestamp(self.log_file_path.stat().st_mtime)
             
-            displayed_lines = len(self.log_text.toPlainText().split('\n'))
+            displayed_lines = self.log_model.rowCount()
             
             self.status_label.setText(
                 f"📋 {self.log_file_path.name} | "
@@ -533,129 +694,129 @@ class LogViewerWidget(QDialog, FWidget):
     
     def filter_logs(self):
         """Filtre les logs selon les critères sélectionnés"""
-        if not hasattr(self, 'all_log_lines') or not self.all_log_lines:
+        self.search_timer.stop()
+        self.cancel_filter()
+        if not self.log_index or not len(self.log_index):
             return
         
-        level_filter = self.level_filter.currentText()
+        level_code = LEVEL_CODES.get(self.level_filter.currentText())
         search_text = self.search_field.text().lower()
         filter_date = self.date_filter.date().toPyDate()
         
         # Obtenir la position de scroll actuelle
-        scrollbar = self.log_text.verticalScrollBar()
-        was_at_bottom = scrollbar.value() >= scrollbar.maximum() - 10
-        
-        # Vider le texte actuel
-        self.log_text.clear()
-        
-        filtered_count = 0
-        displayed_count = 0
-        
-        for line in self.all_log_lines:
-            # Filtrer par niveau
-            if level_filter != "Tous":
-                if f" - {level_filter} - " not in line:
-                    continue
-            
-            # Filtrer par date (extraire la date de la ligne de log)
-            try:
-                # Format attendu: "YYYY-MM-DD HH:MM:SS"
-                date_match = re.search(r'(\d{4}-\d{2}-\d{2})', line)
-                if date_match:
-                    line_date = datetime.strptime(date_match.group(1), '%Y-%m-%d').date()
-                    if line_date < filter_date:
-                        continue
-            except (ValueError, AttributeError):
-                pass  # Si on ne peut pas parser la date, on garde la ligne
-            
-            # Filtrer par recherche
-            if search_text and search_text not in line.lower():
-                continue
-            
-            filtered_count += 1
-            
-            # Limiter le nombre de lignes affichées
-            if displayed_count >= self.max_lines_to_display:
-                break
-            
-            # Ajouter la ligne avec le formatage approprié
-            self.append_log_line(line)
-            displayed_count += 1
+        scrollbar = self.log_view.verticalScrollBar()
+        self.filter_was_at_bottom = scrollbar.value() >= scrollbar.maximum() - 10
+        
+        # Filtrer par date : recherche dichotomique dans l'index (lignes triées)
+        start = self.log_index.first_line_since(filter_date)
+        limit = self.max_lines_to_display
+        self.log_delegate.search_text = search_text
+        if level_code is None and not search_text:
+            # aucun filtre ligne à ligne : plage de numéros, immédiate
+            self.log_model.set_rows(
+                self.log_index, range(start, min(len(self.log_index), start + limit))
+            )
+            self.on_filter_finished(
+                self.filter_generation, len(self.log_index) - start > limit
+            )
+            return
         
-        # Mettre à jour le highlighter
-        if search_text:
-            self.highlighter.set_search_pattern(search_text)
-        else:
-            self.highlighter.set_search_pattern(None)
+        # Niveau / texte : parcours dans un thread, résultats affichés au fil de l'eau
+        self.log_model.set_rows(self.log_index, array('Q'))
+        self.update_search_results()
+        self.status_label.setText("🔍 Filtrage en cours...")
+        job = LogFilterJob(
+            self.filter_generation, self.log_index, start, level_code,
+            search_text, limit, self.PAGE_LINES,
+        )
+        job.signals.rows.connect(self.on_filter_rows)
+        job.signals.finished.connect(self.on_filter_finished)
+        job.signals.failed.connect(self.on_filter_failed)
+        self.filter_jobs[self.filter_generation] = job
+        self.filter_pool.start(job)
+    
+    def cancel_filter(self, wait=False):
+        """Annule le filtrage en cours ; ses résultats tardifs seront ignorés"""
+        self.filter_generation += 1
+        for job in self.filter_jobs.values():
+            job.cancel()
+        if wait:
+            self.filter_pool.waitForDone()
+            self.filter_jobs.clear()
+    
+    def on_filter_rows(self, generation, rows):
+        """Lot de lignes trouvées par le filtrage en arrière-plan"""
+        if generation != self.filter_generation:
+            return
+        self.log_model.append_rows(rows)
+        if self.search_field.text():
+            count = self.log_model.rowCount()
+            self.search_matches = range(count)
+            self.search_count_label.setText(f"{count} résultat{'s' if count != 1 else ''}...")
+            self.search_prev_btn.setEnabled(True)
+            self.search_next_btn.setEnabled(True)
+            if self.current_search_index < 0:
+                self.search_next()  # Aller au premier résultat dès qu'il est connu
+    
+    def on_filter_finished(self, generation, limit_reached):
+        """Fin du filtrage : navigation, défilement et barre de statut"""
+        self.filter_jobs.pop(generation, None)
+        if generation != self.filter_generation:
+            return
+        current = self.current_search_index
+        self.update_search_results()
+        if 0 <= current < len(self.search_matches):
+            # garder le résultat déjà sélectionné pendant le filtrage
+            self.current_search_index = current
+            self.go_to_search_result()
         
         # Scroll vers le bas si c'était le cas avant
-        if was_at_bottom and self.auto_scroll_cb.isChecked():
-            cursor = self.log_text.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-            self.log_text.setTextCursor(cursor)
-            scrollbar.setValue(scrollbar.maximum())
+        if self.filter_was_at_bottom and self.auto_scroll_cb.isChecked():
+            self.log_view.scrollToBottom()
         
         # Mettre à jour le statut
-        if displayed_count >= self.max_lines_to_display:
+        if limit_reached:
             self.status_label.setText(
-                f"⚠️ Limite atteinte: {displayed_count} lignes affichées sur {filtered_count} correspondantes"
+                f"⚠️ Limite atteinte: {self.log_model.rowCount()} "
+                f"premières lignes correspondantes affichées"
             )
         else:
             self.update_status()
     
-    def append_log_line(self, line):
-        """Ajoute une ligne de log avec le formatage approprié"""
-        cursor = self.log_text.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        
-        # Déterminer le niveau de log
-        level = None
-        for log_level in ['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG']:
-            if f" - {log_level} - " in line:
-                level = log_level
-                break
-        
-        # Appliquer le formatage
-        if level and level in self.formats:
-            cursor.setCharFormat(self.formats[level])
-        else:
-            format_default = QTextCharFormat()
-            format_default.setForeground(QColor(0, 0, 0))
-            cursor.setCharFormat(format_default)
-        
-        # Ajouter la ligne
-        cursor.insertText(line + '\n')
+    def on_filter_failed(self, generation, message):
+        self.filter_jobs.pop(generation, None)
+        if generation != self.filter_generation:
+            return
+        self.status_label.setText(f"❌ Erreur lors du filtrage: {message}")
     
     def on_search_changed(self, text):
         """Appelé quand le texte de recherche change"""
+        # Re-filtrer quand la frappe s'interrompt, pas à chaque caractère
+        self.search_timer.start()
+    
+    def on_search_return(self):
+        """Entrée : lance tout de suite la recherche en attente, sinon résultat suivant"""
+        if self.search_timer.isActive():
+            self.filter_logs()
+        else:
+            self.search_next()
+    
+    def update_search_results(self):
+        """Chaque ligne affichée contient le texte recherché : navigation ligne à ligne"""
         self.current_search_index = -1
-        self.search_matches = []
-        
-        if text:
-            # Trouver toutes les occurrences
-            content = self.log_text.toPlainText()
-            pattern = re.compile(re.escape(text), re.IGNORECASE)
-            for match in pattern.finditer(content):
-                self.search_matches.append(match.start())
-            
-            # Mettre à jour le highlighter
-            self.highlighter.set_search_pattern(text)
-            
-            # Mettre à jour les boutons de navigation
-            count = len(self.search_matches)
+        if self.search_field.text():
+            count = self.log_model.rowCount()
+            self.search_matches = range(count)
             self.search_count_label.setText(f"{count} résultat{'s' if count != 1 else ''}")
             self.search_prev_btn.setEnabled(count > 0)
             self.search_next_btn.setEnabled(count > 0)
-            
             if count > 0:
                 self.search_next()  # Aller au premier résultat
         else:
-            self.highlighter.set_search_pattern(None)
+            self.search_matches = []
             self.search_count_label.setText("")
             self.search_prev_btn.setEnabled(False)
             self.search_next_btn.setEnabled(False)
-        
-        # Re-filtrer pour appliquer la recherche
-        self.filter_logs()
     
     def search_next(self):
         """Aller au résultat de recherche suivant"""
@@ -678,11 +839,10 @@ class LogViewerWidget(QDialog, FWidget):
         if not self.search_matches or self.current_search_index < 0:
             return
         
-        position = self.search_matches[self.current_search_index]
-        cursor = self.log_text.textCursor()
-        cursor.setPosition(position)
-        self.log_text.setTextCursor(cursor)
-        self.log_text.centerCursor()
+        row = self.search_matches[self.current_search_index]
+        index = self.log_model.index(row)
+        self.log_view.setCurrentIndex(index)
+        self.log_view.scrollTo(index, QListView.ScrollHint.PositionAtCenter)
         
         # Mettre à jour le compteur
         count = len(self.search_matches)
@@ -703,7 +863,7 @@ class LogViewerWidget(QDialog, FWidget):
     def update_font_size(self):
         """Met à jour la taille de police"""
         font = QFont("Courier New", self.font_size)
-        self.log_text.setFont(font)
+        self.log_view.setFont(font)
         self.zoom_label.setText(f"{self.font_size}pt")
     
     def on_max_lines_changed(self, value):
@@ -715,7 +875,10 @@ class LogViewerWidget(QDialog, FWidget):
         """Active ou désactive l'actualisation automatique"""
         self.auto_refresh = checked
         if checked:
-            self.refresh_timer.start(5000)  # 5 secondes
+            # un tick sans écriture ne coûte qu'un stat() : intervalle court
+            if self.log_index is not None:
+                self.log_index.poll()
+            self.refresh_timer.start(self.TAIL_INTERVAL_MS)
             self.refresh_btn.setText("🔄 Actualiser (auto)")
         else:
             self.refresh_timer.stop()
@@ -731,13 +894,13 @@ class LogViewerWidget(QDialog, FWidget):
             QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.log_text.clear()
+            self.log_model.clear()
             self.status_label.setText("📋 Affichage effacé")
             self.update_stats({})
     
     def export_logs(self):
         """Exporte les logs affichés dans un fichier"""
-        if not hasattr(self, 'raw_logs'):
+        if not self.log_index:
             QMessageBox.warning(self, "Export", "Aucun log à exporter")
             return
         
@@ -750,15 +913,18 @@ class LogViewerWidget(QDialog, FWidget):
         
         if file_path:
             try:
-                # Exporter les logs filtrés actuellement affichés
-                content = self.log_text.toPlainText()
+                # Exporter les logs filtrés actuellement affichés, page par page
+                count = self.log_model.rowCount()
+                step = LogListModel.PAGE_ROWS * 8
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                    for start in range(0, count, step):
+                        for _code, line in self.log_model.entries(start, start + step):
+                            f.write(line + '\n')
                 QMessageBox.information(
                     self,
                     "Export réussi",
                     f"Les logs ont été exportés vers:\n{file_path}\n\n"
-                    f"Lignes exportées: {len(content.split(chr(10)))}"
+                    f"Lignes exportées: {count}"
                 )
             except Exception as e:
                 QMessageBox.critical(self, "Erreur d'export", f"Erreur lors de l'export:\n{str(e)}")
@@ -768,4 +934,8 @@ class LogViewerWidget(QDialog, FWidget):
         """Arrête le timer lors de la fermeture"""
         if self.refresh_timer.isActive():
             self.refresh_timer.stop()
+        self.search_timer.stop()
+        self.cancel_filter(wait=True)
+        if self.log_index is not None:
+            self.log_index.save()
         event.accept()
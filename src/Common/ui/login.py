@@ -164,7 +164,7 @@ class LoginWidget(FDialog, FWidget):
         try:
             from ..models import Organization
 
-            org = Organization.get_or_none(Organization.id == 1)
+            org = Organization.cached_or_none()
             if org is not None:
                 name_orga = (getattr(org, "name_orga", None) or "").strip()
                 if name_orga:
@@ -190,7 +190,7 @@ class LoginWidget(FDialog, FWidget):
 
             from ..models import Organization
 
-            org = Organization.get_or_none(Organization.id == 1)
+            org = Organization.cached_or_none()
             if org is not None:
                 logo_b64 = getattr(org, "logo_orga", None)
                 if isinstance(logo_b64, str):
@@ -231,7 +231,7 @@ class LoginWidget(FDialog, FWidget):
         try:
             from ..models import Organization
 
-            org = Organization.get_or_none(Organization.id == 1)
+            org = Organization.cached_or_none()
             if org is not None:
                 org_address = (getattr(org, "adress_org", None) or "").strip()
                 org_phone = self._format_org_phone(getattr(org, "phone", None))
@@ -618,7 +618,7 @@ class LoginWidget(FDialog, FWidget):
                 return False
 
             owner.reset_login_attempts()
-            Owner.update(is_identified=False).where(Owner.is_identified).execute()
+            Owner.update(is_identified=False).where(Owner.is_identified == True).execute()
             owner.is_identified = True
             owner.last_login = datetime.datetime.now()
             owner.login_count += 1
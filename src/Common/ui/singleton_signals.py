@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Signal Qt des modifications des lignes uniques (Settings, Organization, Version).
+
+    singleton_signals().changed.connect(self.on_singleton_changed)
+
+Le slot reçoit la classe du modèle modifié ; une modification faite dans un
+thread de travail est délivrée sur le thread du receveur.
+"""
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class SingletonSignals(QObject):
+    changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from ..models import add_singleton_listener
+
+        add_singleton_listener(self.changed.emit)
+
+
+_signals = None
+
+
+def singleton_signals():
+    """Émetteur partagé, créé au premier appel."""
+    global _signals
+    if _signals is None:
+        _signals = SingletonSignals()
+    return _signals
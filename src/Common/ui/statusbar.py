@@ -6,12 +6,12 @@ import os
 import sys
 from threading import Event
 
-import requests
 from Common.ui.util import access_server, get_server_url, internet_on, is_valide_mac
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtGui import QIcon, QPixmap
 from PyQt6.QtWidgets import QLabel, QProgressBar, QPushButton, QStatusBar
 
+from ..connections import connection_for_thread
 from ..cstatic import logger
 from ..server import Network
 
@@ -127,6 +127,8 @@ class GStatusBar(QStatusBar):
 
         self.installer_name = f"{self.check_serv.data.get('app')}.exe"
         url = get_server_url(self.check_serv.data.get("setup_file_url"))
+        import requests  # import différé : inutile au démarrage
+
         response = requests.get(url, stream=True)
 
         if response.status_code == 200:
@@ -208,7 +210,8 @@ class TaskThreadDownload(QThread):
 
     def run(self):
         try:
-            self.parent.download_setup_file()
+            with connection_for_thread():
+                self.parent.download_setup_file()
             self.download_finish_signal.emit()
         except Exception as e:
             logger.error(f"Erreur lors du téléchargement: {e}")
@@ -229,28 +232,31 @@ class TaskThreadServer(QThread):
         from Common.models import Organization
 
         try:
-            while not self.stopped.wait(check_interval):
-                try:
-                    if Organization().select().count() > 0:
-                        orga_slug = Organization.get(id=1).slug
-                        if access_server():
-                            logger.info("Server access is OK")
-                            if not orga_slug:
-                                Network().get_or_inscribe_app()
+            # connexion propre au thread, fermée à sa sortie
+            with connection_for_thread():
+                while not self.stopped.wait(check_interval):
+                    try:
+                        orga = Organization.cached_or_none()
+                        if orga is not None:
+                            orga_slug = orga.slug
+                            if access_server():
+                                logger.info("Server access is OK")
+                                if not orga_slug:
+                                    Network().get_or_inscribe_app()
+                                else:
+                                    self.data = Network().update_version_checker()
+                                    check_interval = 150
+                                    if not self.data:
+                                        return
+                                    if not self.data.get("is_last"):
+                                        self.download_signal.emit()
                             else:
-                                self.data = Network().update_version_checker()
-                                check_interval = 150
-                                if not self.data:
-                                    return
-                                if not self.data.get("is_last"):
-                                    self.download_signal.emit()
-                        else:
-                            # logger.info("No server access")
-                            pass
-
-                        self.contact_server_signal.emit()
-                except Exception as e:
-                    logger.error(f"Erreur dans la boucle du thread serveur: {e}")
+                                # logger.info("No server access")
+                                pass
+
+                            self.contact_server_signal.emit()
+                    except Exception as e:
+                        logger.error(f"Erreur dans la boucle du thread serveur: {e}")
                     
         except Exception as e:
             logger.error(f"Erreur fatale dans le thread serveur: {e}")
@@ -1,514 +1,804 @@
-#!/usr/bin/env python
-# -*- coding: utf8 -*-
-# vim: ai ts=4 sts=4 et sw=4 nu
-# maintainer: Fad
-
-
-import datetime
-
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
-from PyQt6.QtWidgets import (
-    QAbstractItemView,
-    QLabel,
-    QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
-    QWidget,
-)
-
-from .util import formatted_number
-
-try:
-    basestring
-except NameError:
-    # Python 3
-    basestring = unicode = str
-try:
-    long
-except NameError:
-    long = int
-
-
-class FlexibleTable(QTableWidget):
-    pass
-
-
-class FTableWidget(QTableWidget):
-    SCROLL_WIDTH = 100
-
-    def __init__(self, parent):
-        QTableWidget.__init__(self, parent=parent)
-        self._data = []
-        self.hheaders = []  # horizontal headers
-        self.vheaders = []  # vertical headers
-
-        self._display_total = False
-        self._column_totals = {}
-        self._total_label = "TOTAL"
-
-        self.stretch_columns = []
-        self.display_hheaders = True
-        self.display_vheaders = True
-        self.align_map = {}
-        self.display_fixed = False
-        self.live_refresh = True
-        self.sorter = False
-
-        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.horizontalHeader().setStretchLastSection(True)
-
-        self.cellClicked.connect(self.click_item)
-        self.verticalHeader().setVisible(False)
-        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-
-        # Utiliser les couleurs de la palette système pour s'adapter au thème (clair/sombre)
-        # palette(text) s'adapte automatiquement au thème clair/sombre
-        self.setStyleSheet("color: palette(text);")
-        self.setAlternatingRowColors(True)
-        self.setAutoScroll(True)
-        self.wc = self.width()
-        self.hc = self.height()
-
-    def setColumnWidth(self, column, width):
-        """PyQt6 exige un int ; les calculs avec ``/`` en Python 3 produisent des float."""
-        return super().setColumnWidth(column, int(round(width)))
-
-    def dragMoveEvent(self, e):
-        e.accept()
-
-    def _display_fixed():
-        def fget(self):
-            return self._display_fixed
-
-        def fset(self, value):
-            self._display_fixed = value
-
-        return locals()
-
-    display_fixed = property(**_display_fixed())
-
-    def _live_refresh():
-        def fget(self):
-            return self._live_refresh
-
-        def fset(self, value):
-            self._live_refresh = value
-
-        return locals()
-
-    live_refresh = property(**_live_refresh())
-
-    def _sorter():
-        def fset(self, value):
-            self.setSortingEnabled(value)
-
-        return locals()
-
-    sorter = property(**_sorter())
-
-    def display_hheaders():
-        def fget(self):
-            return self._display_hheaders
-
-        def fset(self, value):
-            self._display_hheaders = value
-
-        def fdel(self):
-            del self._display_hheaders
-
-        return locals()
-
-    display_hheaders = property(**display_hheaders())
-
-    def display_vheaders():
-        def fget(self):
-            return self._display_vheaders
-
-        def fset(self, value):
-            self._display_vheaders = value
-
-        def fdel(self):
-            del self._display_vheaders
-
-        return locals()
-
-    display_vheaders = property(**display_vheaders())
-
-    def stretch_columns():
-        def fget(self):
-            return self._stretch_columns
-
-        def fset(self, value):
-            self._stretch_columns = value
-
-        def fdel(self):
-            del self._stretch_columns
-
-        return locals()
-
-    stretch_columns = property(**stretch_columns())
-
-    def data():
-        def fget(self):
-            return self._data
-
-        def fset(self, value):
-            self._data = value
-
-        def fdel(self):
-            del self._data
-
-        return locals()
-
-    data = property(**data())
-
-    def align_map():
-        def fget(self):
-            return self._align_map
-
-        def fset(self, value):
-            self._align_map = value
-
-        def fdel(self):
-            del self._align_map
-
-        return locals()
-
-    align_map = property(**align_map())
-
-    def _reset(self):
-        for index in range(self.rowCount(), -1, -1):
-            self.removeRow(index)
-
-    def resizeEvent(self, event):
-        """lancé à chaque redimensionnement de la fenêtre"""
-        # trouve les dimensions du container
-        self.wc = self.width()
-        self.hc = self.height()
-        if self.live_refresh:
-            self.refresh()
-
-    def refresh(self, resize=False):
-        if not self.data:
-            return
-
-        # increase rowCount by one if we have to display total row
-        rc = self.data.__len__()
-        if self._display_total:
-            rc += 1
-        self.setRowCount(len(self.data))
-        self.setColumnCount(len(self.hheaders))
-        # self.setHorizontalHeaderLabels(self.hheaders)
-        for col in range(len(self.hheaders)):
-            self.setHorizontalHeaderItem(col, QTableWidgetItem(self.hheaders[col]))
-        # self.setVerticalHeaderLabels(self.vheaders)
-        for row in range(len(self.vheaders)):
-            self.setVerticalHeaderItem(row, QTableWidgetItem(self.vheaders[row]))
-
-        rowid = 0
-        for row in self.data:
-            colid = 0
-            for item in row:
-                # item is already a QTableWidgetItem, display it
-                if isinstance(item, QTableWidgetItem):
-                    self.setItem(rowid, colid, item)
-                # item is QWidget, display it
-                elif isinstance(item, QWidget):
-                    self.setCellWidget(rowid, colid, item)
-                # item is not ready for display, try to format it
-                else:
-                    ui_item = self._item_for_data(rowid, colid, item, row)
-
-                    # new item is a QTableWidgetItem or QWidget
-                    if isinstance(ui_item, QTableWidgetItem):
-                        self.setItem(rowid, colid, ui_item)
-                    elif isinstance(ui_item, QWidget):
-                        self.setCellWidget(rowid, colid, ui_item)
-                    # something failed, let's build a QTableWidgetItem
-                    else:
-                        self.setItem(
-                            rowid,
-                            colid,
-                            QTableWidgetItem(
-                                "%s" % ui_item,
-                            ),
-                        )
-                colid += 1
-            rowid += 1
-
-        self._display_total_row()
-
-        self.extend_rows()
-        self.upd()
-
-        # apply resize rules
-        self.apply_resize_rules()
-
-        # only resize columns at initial refresh
-        if resize:
-            self.resizeColumnsToContents()
-
-    def apply_resize_rules(self):
-        if self.display_fixed:
-            return
-
-        # set headers visibility according to our prop
-        self.verticalHeader().setVisible(self.display_vheaders)
-        self.horizontalHeader().setVisible(self.display_hheaders)
-
-        self.max_width = self.wc
-
-        # Pour l'horizontal
-        # self.resize(self.max_width, self.size().height())
-
-        contented_width = 0
-        for ind in range(0, self.horizontalHeader().count()):
-            contented_width += self.horizontalHeader().sectionSize(ind)
-        self.verticalHeader().adjustSize()
-        # get content-sized with of header
-        if self.display_vheaders:
-            vheader_width = self.verticalHeader().width()
-        else:
-            vheader_width = 0
-        extra_width = self.max_width - contented_width - vheader_width
-
-        # space filled-up.
-        if extra_width:
-            remaining_width = extra_width - vheader_width
-            try:
-                to_stretch = self.stretch_columns
-                indiv_extra = int(remaining_width / len(to_stretch))
-            except ZeroDivisionError:
-                to_stretch = range(0, self.horizontalHeader().count())
-                indiv_extra = int(remaining_width / len(to_stretch))
-            except:
-                indiv_extra = 0
-
-            for colnum in to_stretch:
-                self.horizontalHeader().resizeSection(
-                    colnum, self.horizontalHeader().sectionSize(colnum) + indiv_extra
-                )
-
-        self.horizontalHeader().update()
-        self.update()
-        # HEIGHT
-        rows_with_widgets = []
-        for rowid in range(0, len(self.data)):
-            for colid in range(0, len(self.data[rowid])):
-                # if not isinstance(self.item(rowid, colid), QTableWidgetItem)
-                # and not rowid in rows_with_widgets:
-                if (
-                    isinstance(self.item(rowid, colid), (QPushButton, None.__class__))
-                    and not rowid in rows_with_widgets
-                ):
-                    rows_with_widgets.append(rowid)
-
-    def extend_rows(self):
-        """called after cells have been created/refresh.
-
-        Use for adding/editing cells"""
-        pass
-
-    def upd(self):
-        """called after cells have been created/refresh.
-
-        Use for adding/editing cells"""
-        pass
-
-    def data():
-        def fget(self):
-            return self._data
-
-        def fset(self, value):
-            self._data = value
-
-        def fdel(self):
-            del self._data
-
-        return locals()
-
-    data = property(**data())
-
-    def _item_for_data(self, row, column, data, context=None):
-        align = str(self.align_map.get(column, "")).lower()
-        if isinstance(data, basestring) and align == "r":
-            data = self._format_numeric_string(data)
-        if isinstance(data, (basestring, int, float)):
-            if column in self.align_map.keys():
-                widget = self.widget_from_align(self.align_map[column])
-            else:
-                widget = FlexibleReadOnlyWidget
-            return widget(self._format_for_table(data))
-        else:
-            return QTableWidgetItem(self._format_for_table(data))
-
-    def _item_for_data_(self, row, column, data, context=None):
-        """returns QTableWidgetItem or QWidget to add to a cell"""
-        return QTableWidgetItem(self._format_for_table(data))
-
-    def _format_numeric_string(self, value):
-        text = str(value).strip()
-        if not text:
-            return value
-
-        sign = ""
-        if text.startswith("-"):
-            sign = "-"
-            text = text[1:]
-
-        compact = text.replace(" ", "")
-        if compact.isdigit():
-            return formatted_number(int(sign + compact))
-
-        if "." in compact:
-            groups = compact.split(".")
-            if groups and groups[0].isdigit() and all(
-                len(group) == 3 and group.isdigit() for group in groups[1:]
-            ):
-                return formatted_number(int(sign + "".join(groups)))
-
-        return value
-
-    def widget_from_align(self, align):
-        if align.lower() == "l":
-            return FlexibleReadOnlyWidgetAL
-        elif align.lower() == "r":
-            return FlexibleReadOnlyWidgetAR
-        else:
-            return FlexibleReadOnlyWidget
-
-    def _display_total_row(self, row_num=None):
-        """adds the total row at end of table"""
-
-        # display total row at end of table
-        if self._display_total:
-            if not row_num:
-                row_num = self.data.__len__()
-
-            # spans columns up to first data one
-            # add label inside
-            label_item = QTableWidgetItem("%s" % self._total_label)
-            label_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.setItem(row_num, 0, label_item)
-            self.setSpan(row_num, 0, 1, list(self._column_totals.keys())[0])
-            # calculate total for each total column
-            # if desired
-            for index, total in self._column_totals.items():
-                if not total:
-                    total = sum([data[index] for data in self.data])
-                item = QTableWidgetItem(self._format_for_table(total))
-                self.setItem(row_num, index, item)
-
-    def setDisplayTotal(self, display=False, column_totals={}, label=None):
-        """ adds an additional row at end of table
-
-        display: bool wheter of not to display the total row
-        column_totals: an hash indexed by column number
-                       providing data to display as total or None
-                       to request automatic calculation
-        label: text of first cell (spaned up to first index)
-        Example call:
-            self.setDisplayTotal(True, \
-                                 column_totals={2: None, 3: None}, \
-                                 label="TOTALS") """
-
-        self._display_total = display
-        self._column_totals = column_totals
-        if label:
-            self._total_label = label
-
-    def _format_for_table(self, value):
-        """formats input value for string in table widget
-
-        override it to add more formats"""
-        if isinstance(value, basestring):
-            return value
-        if isinstance(value, (int, float, long)):
-            return formatted_number(value)
-        elif isinstance(value, datetime.datetime):
-            return value.strftime("%A %d/%m/%Y à %Hh:%Mmn")
-        elif isinstance(value, datetime.date):
-            return value.strftime("%A %d/%m/%Y")
-
-        if value == None:
-            return ""
-
-        return "%s" % value
-
-    def click_item(self, row, column, *args):
-        pass
-
-
-class FlexibleWidget(QTableWidgetItem):
-    def __init__(self, *args, **kwargs):
-        super(FlexibleWidget, self).__init__(*args, **kwargs)
-
-        self.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-
-        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-
-    def live_refresh(self):
-        pass
-
-    def replace(self, old, new):
-        try:
-            txt = self.text()
-        except Exception:
-            try:
-                txt = self.toPlainText()
-            except Exception:
-                txt = str(self)
-        return str(txt).replace(old, new)
-
-
-class TotalsWidget(QTableWidgetItem):
-    def __init__(self, *args, **kwargs):
-        super(TotalsWidget, self).__init__(*args, **kwargs)
-
-        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-
-        font = QFont()
-        font.setBold(True)
-        # font.setWeight(90)
-        self.setFont(font)
-
-        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-
-    def live_refresh(self):
-        pass
-
-
-class FlexibleReadOnlyWidget(FlexibleWidget):
-    def __init__(self, *args, **kwargs):
-        super(FlexibleReadOnlyWidget, self).__init__(*args, **kwargs)
-
-        self.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-
-        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-
-    def live_refresh(self):
-        pass
-
-
-class FlexibleReadOnlyWidgetAL(FlexibleReadOnlyWidget):
-    def __init__(self, *args, **kwargs):
-        super(FlexibleReadOnlyWidgetAL, self).__init__(*args, **kwargs)
-        self.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-
-
-class FlexibleReadOnlyWidgetAR(FlexibleReadOnlyWidget):
-    def __init__(self, *args, **kwargs):
-        super(FlexibleReadOnlyWidgetAR, self).__init__(*args, **kwargs)
-        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-
-
-class EnterDoesTab(QWidget):
-    def keyReleaseEvent(self, event):
-        super(EnterDoesTab, self).keyReleaseEvent(event)
-        if event.key() == Qt.Key.Key_Return:
-            self.focusNextChild()
-
-
-class EnterTabbedQLabel(QLabel, EnterDoesTab):
-    pass
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# vim: ai ts=4 sts=4 et sw=4 nu
+# maintainer: Fad
+
+
+import datetime
+from decimal import Decimal
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QLabel,
+    QTableView,
+    QTableWidget,
+    QTableWidgetItem,
+    QWidget,
+)
+
+from ..cstatic import logger
+from .util import formatted_number
+
+try:
+    basestring
+except NameError:
+    # Python 3
+    basestring = unicode = str
+try:
+    long
+except NameError:
+    long = int
+
+
+class FlexibleTable(QTableWidget):
+    pass
+
+
+class FTableBase(object):
+    """API commune aux tableaux Common (FTableWidget, FTableView).
+
+    hheaders / vheaders / data / align_map / stretch_columns, ligne de total
+    et formatage des valeurs ; la classe concrète fournit le widget Qt.
+    """
+
+    SCROLL_WIDTH = 100
+    # délai de regroupement des redimensionnements (ms)
+    RESIZE_DELAY = 40
+
+    def _init_table(self):
+        self._data = []
+        self.hheaders = []  # horizontal headers
+        self.vheaders = []  # vertical headers
+
+        self._display_total = False
+        self._column_totals = {}
+        self._total_label = "TOTAL"
+
+        self.stretch_columns = []
+        self.display_hheaders = True
+        self.display_vheaders = True
+        self.align_map = {}
+        self.display_fixed = False
+        self.live_refresh = True
+        self.sorter = False
+
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.horizontalHeader().setStretchLastSection(True)
+
+        self.verticalHeader().setVisible(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+
+        # Utiliser les couleurs de la palette système pour s'adapter au thème (clair/sombre)
+        # palette(text) s'adapte automatiquement au thème clair/sombre
+        self.setStyleSheet("color: palette(text);")
+        self.setAlternatingRowColors(True)
+        self.setAutoScroll(True)
+        self.wc = self.width()
+        self.hc = self.height()
+
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(self.RESIZE_DELAY)
+        self._resize_timer.timeout.connect(self.apply_resize_rules)
+
+    def resizeEvent(self, event):
+        """lancé à chaque redimensionnement de la fenêtre
+
+        Seules les largeurs de colonnes sont recalculées, une fois la rafale
+        d'événements terminée (déplacement de la bordure de la fenêtre)."""
+        super().resizeEvent(event)
+        # trouve les dimensions du container
+        self.wc = self.width()
+        self.hc = self.height()
+        if self.live_refresh:
+            self._resize_timer.start()
+
+    def setColumnWidth(self, column, width):
+        """PyQt6 exige un int ; les calculs avec ``/`` en Python 3 produisent des float."""
+        return super().setColumnWidth(column, int(round(width)))
+
+    def dragMoveEvent(self, e):
+        e.accept()
+
+    def _display_fixed():
+        def fget(self):
+            return self._display_fixed
+
+        def fset(self, value):
+            self._display_fixed = value
+
+        return locals()
+
+    display_fixed = property(**_display_fixed())
+
+    def _live_refresh():
+        def fget(self):
+            return self._live_refresh
+
+        def fset(self, value):
+            self._live_refresh = value
+
+        return locals()
+
+    live_refresh = property(**_live_refresh())
+
+    def _sorter():
+        def fset(self, value):
+            self.setSortingEnabled(value)
+
+        return locals()
+
+    sorter = property(**_sorter())
+
+    def display_hheaders():
+        def fget(self):
+            return self._display_hheaders
+
+        def fset(self, value):
+            self._display_hheaders = value
+
+        def fdel(self):
+            del self._display_hheaders
+
+        return locals()
+
+    display_hheaders = property(**display_hheaders())
+
+    def display_vheaders():
+        def fget(self):
+            return self._display_vheaders
+
+        def fset(self, value):
+            self._display_vheaders = value
+
+        def fdel(self):
+            del self._display_vheaders
+
+        return locals()
+
+    display_vheaders = property(**display_vheaders())
+
+    def stretch_columns():
+        def fget(self):
+            return self._stretch_columns
+
+        def fset(self, value):
+            self._stretch_columns = value
+
+        def fdel(self):
+            del self._stretch_columns
+
+        return locals()
+
+    stretch_columns = property(**stretch_columns())
+
+    def data():
+        def fget(self):
+            return self._data
+
+        def fset(self, value):
+            self._data = value
+
+        def fdel(self):
+            del self._data
+
+        return locals()
+
+    data = property(**data())
+
+    def align_map():
+        def fget(self):
+            return self._align_map
+
+        def fset(self, value):
+            self._align_map = value
+
+        def fdel(self):
+            del self._align_map
+
+        return locals()
+
+    align_map = property(**align_map())
+
+    def apply_resize_rules(self):
+        if self.display_fixed:
+            return
+
+        # set headers visibility according to our prop
+        self.verticalHeader().setVisible(self.display_vheaders)
+        self.horizontalHeader().setVisible(self.display_hheaders)
+
+        self.max_width = self.wc
+
+        # Pour l'horizontal
+        # self.resize(self.max_width, self.size().height())
+
+        contented_width = 0
+        for ind in range(0, self.horizontalHeader().count()):
+            contented_width += self.horizontalHeader().sectionSize(ind)
+        self.verticalHeader().adjustSize()
+        # get content-sized with of header
+        if self.display_vheaders:
+            vheader_width = self.verticalHeader().width()
+        else:
+            vheader_width = 0
+        extra_width = self.max_width - contented_width - vheader_width
+
+        # space filled-up.
+        if extra_width:
+            remaining_width = extra_width - vheader_width
+            try:
+                to_stretch = self.stretch_columns
+                indiv_extra = int(remaining_width / len(to_stretch))
+            except ZeroDivisionError:
+                to_stretch = range(0, self.horizontalHeader().count())
+                indiv_extra = int(remaining_width / len(to_stretch))
+            except:
+                indiv_extra = 0
+
+            for colnum in to_stretch:
+                self.horizontalHeader().resizeSection(
+                    colnum, self.horizontalHeader().sectionSize(colnum) + indiv_extra
+                )
+
+        self.horizontalHeader().update()
+        self.update()
+
+    def extend_rows(self):
+        """called after cells have been created/refresh.
+
+        Use for adding/editing cells"""
+        pass
+
+    def upd(self):
+        """called after cells have been created/refresh.
+
+        Use for adding/editing cells"""
+        pass
+
+    def _format_numeric_string(self, value):
+        text = str(value).strip()
+        if not text:
+            return value
+
+        sign = ""
+        if text.startswith("-"):
+            sign = "-"
+            text = text[1:]
+
+        compact = text.replace(" ", "")
+        if compact.isdigit():
+            return formatted_number(int(sign + compact))
+
+        if "." in compact:
+            groups = compact.split(".")
+            if groups and groups[0].isdigit() and all(
+                len(group) == 3 and group.isdigit() for group in groups[1:]
+            ):
+                return formatted_number(int(sign + "".join(groups)))
+
+        return value
+
+    def _total_for_column(self, index, total=None):
+        if not total:
+            total = sum([data[index] for data in self.data])
+        return total
+
+    def setDisplayTotal(self, display=False, column_totals={}, label=None):
+        """ adds an additional row at end of table
+
+        display: bool wheter of not to display the total row
+        column_totals: an hash indexed by column number
+                       providing data to display as total or None
+                       to request automatic calculation
+        label: text of first cell (spaned up to first index)
+        Example call:
+            self.setDisplayTotal(True, \\
+                                 column_totals={2: None, 3: None}, \\
+                                 label="TOTALS") """
+
+        self._display_total = display
+        self._column_totals = column_totals
+        if label:
+            self._total_label = label
+
+    def _format_for_table(self, value):
+        """formats input value for string in table widget
+
+        override it to add more formats"""
+        if isinstance(value, basestring):
+            return value
+        if isinstance(value, (int, float, long)):
+            return formatted_number(value)
+        elif isinstance(value, datetime.datetime):
+            return value.strftime("%A %d/%m/%Y à %Hh:%Mmn")
+        elif isinstance(value, datetime.date):
+            return value.strftime("%A %d/%m/%Y")
+
+        if value == None:
+            return ""
+
+        return "%s" % value
+
+    def click_item(self, row, column, *args):
+        pass
+
+
+class FTableWidget(FTableBase, QTableWidget):
+    def __init__(self, parent):
+        QTableWidget.__init__(self, parent=parent)
+        self._init_table()
+        # Mode différentiel : fonction ligne -> clé unique (voir refresh)
+        self.row_key = None
+        self._rendered = None
+        self.cellClicked.connect(self.click_item)
+
+    def _reset(self):
+        # en mode différentiel, refresh() ne touche que les lignes modifiées
+        if self.row_key is not None and self._rendered is not None:
+            return
+        self.setRowCount(0)
+        self._rendered = None
+
+    def refresh(self, resize=False):
+        if not self.data:
+            if self._rendered:
+                self.setRowCount(0)
+                self._rendered = None
+            return
+
+        self.setColumnCount(len(self.hheaders))
+        # self.setHorizontalHeaderLabels(self.hheaders)
+        for col in range(len(self.hheaders)):
+            self.setHorizontalHeaderItem(col, QTableWidgetItem(self.hheaders[col]))
+        # self.setVerticalHeaderLabels(self.vheaders)
+        for row in range(len(self.vheaders)):
+            self.setVerticalHeaderItem(row, QTableWidgetItem(self.vheaders[row]))
+
+        keys = self._row_keys()
+        if keys is not None and self._rendered is not None:
+            self._refresh_changed_rows(keys)
+        else:
+            self.setRowCount(len(self.data))
+            rowid = 0
+            for row in self.data:
+                colid = 0
+                for item in row:
+                    self._set_cell(rowid, colid, item, row)
+                    colid += 1
+                rowid += 1
+            if keys is not None:
+                self._rendered = [(key, tuple(row)) for key, row in zip(keys, self.data)]
+            else:
+                self._rendered = None
+
+        self._display_total_row()
+
+        self.extend_rows()
+        self.upd()
+
+        # apply resize rules
+        self.apply_resize_rules()
+
+        # only resize columns at initial refresh
+        if resize:
+            self.resizeColumnsToContents()
+
+    def _row_keys(self):
+        """Clés des lignes de data, ou None si le mode différentiel ne s'applique pas.
+
+        Le tri interactif réordonne les lignes côté Qt : on reconstruit alors
+        tout le tableau, comme pour des clés en double ou non hachables.
+        """
+        if self.row_key is None or self.isSortingEnabled():
+            return None
+        keys = [self.row_key(row) for row in self.data]
+        try:
+            unique = len(set(keys)) == len(keys)
+        except TypeError:
+            unique = False
+        if not unique:
+            logger.debug("FTableWidget: clés de lignes en double, rafraîchissement complet")
+            return None
+        return keys
+
+    def _refresh_changed_rows(self, keys):
+        """Applique à la table la différence entre le dernier rendu et data.
+
+        Les lignes inchangées gardent leurs items (sélection, défilement,
+        cases cochées) ; seules les cellules insérées, supprimées ou dont la
+        valeur a changé sont recréées.
+        """
+        wanted = set(keys)
+        current = []
+        snapshots = {}
+        # suppression depuis le bas pour garder des indices valides
+        for rowid in range(len(self._rendered) - 1, -1, -1):
+            key, snapshot = self._rendered[rowid]
+            if key in wanted:
+                current.append(key)
+                snapshots[key] = snapshot
+            else:
+                self.removeRow(rowid)
+        current.reverse()
+
+        for rowid, (key, row) in enumerate(zip(keys, self.data)):
+            new_values = tuple(row)
+            if rowid < len(current) and current[rowid] == key:
+                old_values = snapshots[key]
+                for colid, item in enumerate(new_values):
+                    if colid >= len(old_values) or old_values[colid] != item:
+                        self._replace_cell(rowid, colid, item, row)
+                for colid in range(len(new_values), len(old_values)):
+                    self._replace_cell(rowid, colid, None, row)
+                continue
+            if key in snapshots:
+                # ligne déplacée : supprimée puis réinsérée à sa place
+                self.removeRow(current.index(key, rowid))
+                current.remove(key)
+            self.insertRow(rowid)
+            current.insert(rowid, key)
+            for colid, item in enumerate(new_values):
+                self._set_cell(rowid, colid, item, row)
+
+        self._rendered = [(key, tuple(row)) for key, row in zip(keys, self.data)]
+
+    def _replace_cell(self, rowid, colid, item, row):
+        if self.cellWidget(rowid, colid) is not None:
+            self.removeCellWidget(rowid, colid)
+        if item is None:
+            self.takeItem(rowid, colid)
+        self._set_cell(rowid, colid, item, row)
+
+    def _set_cell(self, rowid, colid, item, row):
+        # item is already a QTableWidgetItem, display it
+        if isinstance(item, QTableWidgetItem):
+            self.setItem(rowid, colid, item)
+        # item is QWidget, display it
+        elif isinstance(item, QWidget):
+            self.setCellWidget(rowid, colid, item)
+        # item is not ready for display, try to format it
+        else:
+            ui_item = self._item_for_data(rowid, colid, item, row)
+
+            # new item is a QTableWidgetItem or QWidget
+            if isinstance(ui_item, QTableWidgetItem):
+                self.setItem(rowid, colid, ui_item)
+            elif isinstance(ui_item, QWidget):
+                self.setCellWidget(rowid, colid, ui_item)
+            # something failed, let's build a QTableWidgetItem
+            else:
+                self.setItem(
+                    rowid,
+                    colid,
+                    QTableWidgetItem(
+                        "%s" % ui_item,
+                    ),
+                )
+
+    def _item_for_data(self, row, column, data, context=None):
+        align = str(self.align_map.get(column, "")).lower()
+        if isinstance(data, basestring) and align == "r":
+            data = self._format_numeric_string(data)
+        if isinstance(data, (basestring, int, float)):
+            if column in self.align_map.keys():
+                widget = self.widget_from_align(self.align_map[column])
+            else:
+                widget = FlexibleReadOnlyWidget
+            return widget(self._format_for_table(data))
+        else:
+            return QTableWidgetItem(self._format_for_table(data))
+
+    def _item_for_data_(self, row, column, data, context=None):
+        """returns QTableWidgetItem or QWidget to add to a cell"""
+        return QTableWidgetItem(self._format_for_table(data))
+
+    def widget_from_align(self, align):
+        if align.lower() == "l":
+            return FlexibleReadOnlyWidgetAL
+        elif align.lower() == "r":
+            return FlexibleReadOnlyWidgetAR
+        else:
+            return FlexibleReadOnlyWidget
+
+    def _display_total_row(self, row_num=None):
+        """adds the total row at end of table"""
+
+        # display total row at end of table
+        if self._display_total:
+            if not row_num:
+                row_num = self.data.__len__()
+
+            # spans columns up to first data one
+            # add label inside
+            label_item = QTableWidgetItem("%s" % self._total_label)
+            label_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.setItem(row_num, 0, label_item)
+            self.setSpan(row_num, 0, 1, list(self._column_totals.keys())[0])
+            # calculate total for each total column
+            # if desired
+            for index, total in self._column_totals.items():
+                total = self._total_for_column(index, total)
+                item = QTableWidgetItem(self._format_for_table(total))
+                self.setItem(row_num, index, item)
+
+
+class FTableModel(QAbstractTableModel):
+    """Modèle Qt de FTableView : les cellules sont formatées à l'affichage.
+
+    Aucune donnée n'est copiée ; seules les lignes visibles passent par
+    ``data()``, donc par ``_format_for_table`` de la vue.
+    """
+
+    ALIGNMENTS = {
+        "l": Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+        "r": Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+    }
+    DEFAULT_ALIGNMENT = Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter
+    OTHER_ALIGNMENT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+
+    def __init__(self, table):
+        QAbstractTableModel.__init__(self, parent=table)
+        self.table = table
+        self._rows = []
+        self._totals = {}
+
+    def reset_rows(self, rows):
+        self.beginResetModel()
+        self._rows = rows
+        self._totals = {}
+        if self.table._display_total:
+            for index, total in self.table._column_totals.items():
+                self._totals[index] = self.table._total_for_column(index, total)
+        self.endResetModel()
+
+    def has_total_row(self):
+        # pas de ligne de total seule dans un tableau vide
+        return bool(self.table._display_total and self._rows)
+
+    def is_total_row(self, row):
+        return self.has_total_row() and row == len(self._rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) + (1 if self.has_total_row() else 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.table.hheaders)
+
+    def value(self, row, column):
+        """Valeur brute d'une cellule (None hors des données)."""
+        if self.is_total_row(row):
+            if column == 0:
+                return self.table._total_label
+            return self._totals.get(column)
+        try:
+            return self._rows[row][column]
+        except IndexError:
+            return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.table._display_for_data(row, column, self.value(row, column))
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if self.is_total_row(row):
+                if column == 0:
+                    return self.ALIGNMENTS["r"]
+                return self.OTHER_ALIGNMENT
+            return self._alignment(column, self.value(row, column))
+        if role == Qt.ItemDataRole.UserRole:
+            return self.value(row, column)
+        return None
+
+    def _alignment(self, column, value):
+        if not isinstance(value, (basestring, int, float)):
+            return self.OTHER_ALIGNMENT
+        align = str(self.table.align_map.get(column, "")).lower()
+        return self.ALIGNMENTS.get(align, self.DEFAULT_ALIGNMENT)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            headers = self.table.hheaders
+        else:
+            headers = self.table.vheaders
+        if section < len(headers):
+            return "%s" % headers[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        def key(row):
+            try:
+                value = row[column]
+            except IndexError:
+                value = None
+            # None en premier, puis les nombres (int et float ensemble),
+            # puis le reste comparé en texte
+            if value is None:
+                return (0, 0, 0)
+            if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+                return (1, 0, value)
+            return (1, 1, str(value))
+
+        self.layoutAboutToBeChanged.emit()
+        rows = self._rows
+        self._rows = sorted(
+            rows,
+            key=key,
+            reverse=order == Qt.SortOrder.DescendingOrder,
+        )
+        # click_item(row, …) et les sous-classes lisent table.data[row] :
+        # même ordre que l'affichage
+        if self.table.data is rows:
+            self.table.data = self._rows
+        self.layoutChanged.emit()
+
+
+class FTableView(FTableBase, QTableView):
+    """Variante virtuelle de FTableWidget (QTableView + FTableModel).
+
+    Même API (hheaders, data, align_map, setDisplayTotal, _format_for_table),
+    mais aucune QTableWidgetItem n'est créée : le texte des cellules est
+    calculé par le modèle pour les seules lignes affichées. À utiliser pour
+    les grands tableaux (journaux, grands livres) ; les cellules doivent
+    contenir des valeurs simples et non des widgets.
+    """
+
+    def __init__(self, parent):
+        QTableView.__init__(self, parent=parent)
+        self._init_table()
+        self._model = FTableModel(self)
+        self.setModel(self._model)
+        self.clicked.connect(self._on_clicked)
+
+    def _on_clicked(self, index):
+        self.click_item(index.row(), index.column())
+
+    def rowCount(self):
+        return self._model.rowCount()
+
+    def columnCount(self):
+        return self._model.columnCount()
+
+    def value(self, row, column):
+        return self._model.value(row, column)
+
+    def _reset(self):
+        self.clearSpans()
+        self._model.reset_rows([])
+
+    def refresh(self, resize=False):
+        if not self.data:
+            # plus aucune ligne : ne pas laisser les anciennes à l'écran
+            self._reset()
+            return
+
+        self.clearSpans()
+        self._model.reset_rows(self.data)
+        if self._display_total and self._column_totals:
+            span = list(self._column_totals.keys())[0]
+            if span > 1:
+                self.setSpan(len(self.data), 0, 1, span)
+
+        self.extend_rows()
+        self.upd()
+
+        # apply resize rules
+        self.apply_resize_rules()
+
+        # only resize columns at initial refresh
+        if resize:
+            self._resize_to_contents()
+
+    def _resize_to_contents(self):
+        # Qt ne mesure que les lignes visibles (précision 0) si la vue est
+        # affichée ; sinon il parcourrait tout le modèle : on attend showEvent.
+        if not self.isVisible():
+            self._resize_pending = True
+            return
+        self._resize_pending = False
+        self.horizontalHeader().setResizeContentsPrecision(0)
+        self.resizeColumnsToContents()
+        self.apply_resize_rules()
+
+    def showEvent(self, event):
+        QTableView.showEvent(self, event)
+        if getattr(self, "_resize_pending", False):
+            self._resize_to_contents()
+
+    def _display_for_data(self, row, column, data):
+        """Texte affiché pour une cellule (rôle DisplayRole du modèle)."""
+        if isinstance(data, QTableWidgetItem):
+            return data.text()
+        align = str(self.align_map.get(column, "")).lower()
+        if isinstance(data, basestring) and align == "r":
+            data = self._format_numeric_string(data)
+        return self._format_for_table(data)
+
+
+class FlexibleWidget(QTableWidgetItem):
+    def __init__(self, *args, **kwargs):
+        super(FlexibleWidget, self).__init__(*args, **kwargs)
+
+        self.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+
+        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
+
+    def live_refresh(self):
+        pass
+
+    def replace(self, old, new):
+        try:
+            txt = self.text()
+        except Exception:
+            try:
+                txt = self.toPlainText()
+            except Exception:
+                txt = str(self)
+        return str(txt).replace(old, new)
+
+
+class TotalsWidget(QTableWidgetItem):
+    def __init__(self, *args, **kwargs):
+        super(TotalsWidget, self).__init__(*args, **kwargs)
+
+        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+        font = QFont()
+        font.setBold(True)
+        # font.setWeight(90)
+        self.setFont(font)
+
+        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
+
+    def live_refresh(self):
+        pass
+
+
+class FlexibleReadOnlyWidget(FlexibleWidget):
+    def __init__(self, *args, **kwargs):
+        super(FlexibleReadOnlyWidget, self).__init__(*args, **kwargs)
+
+        self.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+
+        self.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
+
+    def live_refresh(self):
+        pass
+
+
+class FlexibleReadOnlyWidgetAL(FlexibleReadOnlyWidget):
+    def __init__(self, *args, **kwargs):
+        super(FlexibleReadOnlyWidgetAL, self).__init__(*args, **kwargs)
+        self.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+
+
+class FlexibleReadOnlyWidgetAR(FlexibleReadOnlyWidget):
+    def __init__(self, *args, **kwargs):
+        super(FlexibleReadOnlyWidgetAR, self).__init__(*args, **kwargs)
+        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+
+class EnterDoesTab(QWidget):
+    def keyReleaseEvent(self, event):
+        super(EnterDoesTab, self).keyReleaseEvent(event)
+        if event.key() == Qt.Key.Key_Return:
+            self.focusNextChild()
+
+
+class EnterTabbedQLabel(QLabel, EnterDoesTab):
+    pass
@@ -107,7 +107,7 @@ def _restore_font_scale_qss(app) -> None:
 
         if dbh is not None and dbh.is_closed():
             dbh.connect()
-        sttg = Settings.get_or_none(Settings.id == 1)
+        sttg = Settings.cached_or_none()
         if sttg is None:
             return
         apply_font_scale(app, float(getattr(sttg, "font_scale", 1.0) or 1.0), save_to_settings=False)
@@ -135,7 +135,7 @@ def attach_system_theme_listener(app) -> None:
                     return
                 if dbh.is_closed():
                     dbh.connect()
-                st = Settings.get_or_none(Settings.id == 1)
+                st = Settings.cached_or_none()
                 raw = (getattr(st, "theme", "") or "").strip().lower()
                 if raw in _THEME_ALIASES_SYSTEM:
                     raw = THEME_SYSTEM
@@ -13,7 +13,6 @@ import sys
 from pathlib import Path
 import tempfile
 from datetime import datetime
-from time import mktime, strptime
 from urllib.request import URLError, urlopen
 from uuid import getnode
 
@@ -21,9 +20,20 @@ from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QCursor, QIcon
 from PyQt6.QtWidgets import QMessageBox, QSystemTrayIcon, QTextEdit
 
+from .. import helpers as _helpers
 from ..cstatic import CConstants, license_required, logger
 from .window import FWindow
 
+# réexportés : helpers sans Qt, importables par models
+copy_file = _helpers.copy_file
+date_to_str = _helpers.date_to_str
+datetime_to_str = _helpers.datetime_to_str
+get_path = _helpers.get_path
+rename_file = _helpers.rename_file
+slug_mane_file = _helpers.slug_mane_file
+to_jstimestamp = _helpers.to_jstimestamp
+to_timestamp = _helpers.to_timestamp
+
 try:
     unicode
 except NameError:
@@ -42,19 +52,14 @@ def internet_on():
 
 
 def access_server():
+    """Serveur joignable ? État en cache, rafraîchi en arrière-plan (voir server.connectivity)."""
     if not CConstants.SERV:
         logger.info("Not server mode")
         return False
 
-    if not internet_on():
-        return
-    try:
-        urlopen(get_server_url(""), timeout=1)
-        return True
-    except URLError as err:
-        return False
-    except Exception as e:
-        logger.debug(e)
+    from ..server import connectivity
+
+    return connectivity().is_online()
 
 
 def device_amount(value, dvs=None):
@@ -197,28 +202,23 @@ def raise_success(title, message):
     box.exec()
 
 
-def formatted_number(number, sep=" ", aftergam=None):
-    """Format a number with a stable thousands separator.
-
-    Locale grouping is not reliable on every desktop install; use Python's
-    grouping and replace the separator so tables always show readable amounts.
-    """
-
-    if isinstance(number, bool):
-        return str(number)
-
+def _decimal_places(aftergam=None):
+    """Nombre de décimales : argument explicite ou Settings.after_cam (en cache)."""
     if aftergam is None:
         try:
             from Common.models import Settings
 
-            aftergam = int(Settings.select().get().after_cam)
+            aftergam = int(Settings.cached().after_cam)
         except Exception:
             aftergam = 0
     else:
         aftergam = int(aftergam)
     if aftergam < 0:
         aftergam = 0
+    return aftergam
+
 
+def _format_number(number, sep, aftergam):
     try:
         if isinstance(number, int):
             return f"{number:,}".replace(",", sep)
@@ -229,6 +229,32 @@ def formatted_number(number, sep=" ", aftergam=None):
     return str(number)
 
 
+def formatted_number(number, sep=" ", aftergam=None):
+    """Format a number with a stable thousands separator.
+
+    Locale grouping is not reliable on every desktop install; use Python's
+    grouping and replace the separator so tables always show readable amounts.
+    """
+
+    if isinstance(number, bool):
+        return str(number)
+    if isinstance(number, int):
+        return _format_number(number, sep, 0)
+    return _format_number(number, sep, _decimal_places(aftergam))
+
+
+def format_numbers(numbers, sep=" ", aftergam=None):
+    """Version colonne de formatted_number : une liste de chaînes.
+
+    Le nombre de décimales est résolu une seule fois pour tout l'itérable.
+    """
+    aftergam = _decimal_places(aftergam)
+    return [
+        str(number) if isinstance(number, bool) else _format_number(number, sep, aftergam)
+        for number in numbers
+    ]
+
+
 def format_number_table_no_round(number):
     """Affichage tableau : pas d’arrondi imposé, uniquement suppression des zéros de fin.
 
@@ -350,18 +376,6 @@ def parse_integer(value):
     return result
 
 
-def date_to_str(date):
-    if not date:
-        return None
-    if isinstance(date, str):
-        d, m, y = date.split("/")
-        if len(y) == 4:
-            return "{}-{}-{}".format(y, m, d)
-        else:
-            return date.replace("/", "-")
-    return date.strftime("%Y-%m-%d")
-
-
 def alerte():
     pass
 
@@ -372,59 +386,10 @@ def format_date(dat):
     return "-".join([year, month, day])
 
 
-def datetime_to_str(date):
-    return mktime(strptime(date.strftime("%Y-%m-%d %H:%M:%S"), "%Y-%m-%d %H:%M:%S"))
-
-
-def to_jstimestamp(adate):
-    if not adate:
-        return int(to_timestamp(adate)) * 1000
-
-
-def to_timestamp(dt):
-    """
-    Return a timestamp for the given datetime object.
-    """
-    if not dt:
-        return (dt - datetime(1970, 1, 1)).total_seconds()
-
-
-def copy_file(dest, path_filename):
-    """Copy the file, rename file in banc and return new name of the doc
-    created folder banc doc if not existe
-    """
-    import shutil
-
-    dest = os.path.join(os.path.dirname(os.path.abspath("__file__")), dest)
-    filename = os.path.basename(path_filename)
-    if not os.path.exists(dest):
-        os.makedirs(dest)
-    shutil.copyfile(path_filename, get_path(dest, filename))
-
-    return rename_file(dest, filename, slug_mane_file(filename))
-
-
-def rename_file(path, old_filename, new_filename):
-    """Rename file in banc docs  params: old_filename, new_filename
-    return newname"""
-    os.rename(get_path(path, old_filename), get_path(path, new_filename))
-    return new_filename
-
-
-def get_path(path, filename):
-    return os.path.join(path, filename)
-
-
 def get_server_url(sub_url):
     from Common.models import Settings
 
-    return "{}/{}".format(Settings.get(id=1).url, sub_url)
-
-
-def slug_mane_file(file_name):
-    return "{timestamp}_{fname}".format(
-        fname=file_name.replace(" ", "_"), timestamp=to_jstimestamp(datetime.now())
-    )
+    return "{}/{}".format(Settings.cached().url, sub_url)
 
 
 def normalize(s):
@@ -7,11 +7,97 @@ from threading import Event
 
 from PyQt6.QtCore import QObject, QThread, pyqtSignal
 
+from .connections import connection_for_thread
 from .cstatic import CConstants, logger
 from .models import Organization
-from .server import Network
+from .server import BatchNotSupported, Network
 from .ui.util import access_server, is_valide_mac
 
+# Lignes envoyées par requête de synchronisation
+SYNC_PAGE_ROWS = 500
+
+
+def _sync_pages(model, page_rows=SYNC_PAGE_ROWS):
+    """
+    Lignes à synchroniser de ``model``, par pages, dans l'ordre des id.
+
+    ``is_syncro`` faux = à envoyer (``save_()``), vrai = acquittée par le
+    serveur (``updated()`` / ``bulk_mark_synced``). L'ancienne version
+    sélectionnait ``is_syncro == True``, c'est-à-dire les lignes déjà envoyées,
+    à chaque cycle. Le sens des valeurs stockées n'a pas changé : après mise à jour, les
+    lignes jamais envoyées (faux) partent une fois, les autres ne sont pas
+    renvoyées ; aucune migration n'est nécessaire.
+    """
+    last_id = 0
+    while True:
+        page = list(
+            model.select()
+            .where(model.is_syncro == False, model.id > last_id)
+            .order_by(model.id)
+            .limit(page_rows)
+        )
+        if not page:
+            return
+        yield page
+        last_id = page[-1].id
+
+
+def sync_model(network, orga_slug, model, page_rows=SYNC_PAGE_ROWS, stopped=None):
+    """
+    Envoie les lignes à synchroniser de ``model`` par pages de ``page_rows``
+    (une requête gzip par page) et acquitte en un UPDATE les id acceptés
+    (``is_syncro`` vrai) : une ligne acquittée n'est plus renvoyée, une ligne
+    modifiée depuis la lecture de sa page reste à synchroniser.
+    Si le serveur ne connaît pas l'envoi groupé, repli ligne par ligne.
+    Retourne le nombre de lignes acquittées.
+    """
+    synced = 0
+    name = model.__name__
+    for page in _sync_pages(model, page_rows):
+        if stopped is not None and stopped.is_set():
+            break
+        try:
+            resp = network.submit_batch(
+                "update-data-batch",
+                {
+                    "slug": orga_slug,
+                    "model": name,
+                    "rows": [{"id": d.id, "data": d.data()} for d in page],
+                },
+            )
+        except BatchNotSupported:
+            return synced + _sync_rows_one_by_one(network, orga_slug, model, stopped)
+        if resp is None:
+            break  # serveur injoignable : reprise au prochain cycle
+        if resp.get("save"):
+            ids = [d.id for d in page]
+        else:
+            ids = [i for i in resp.get("saved", ()) if isinstance(i, int)]
+        if ids:
+            # acquitte la version envoyée, pas une version écrite depuis
+            model.bulk_mark_synced(ids, {d.id: d.last_update_date for d in page})
+        synced += len(ids)
+    return synced
+
+
+def _sync_rows_one_by_one(network, orga_slug, model, stopped=None):
+    """Ancien protocole (une requête par ligne), sur la session HTTP partagée."""
+    ids = []
+    sent = {}
+    for d in model.select().where(model.is_syncro == False):
+        if stopped is not None and stopped.is_set():
+            break
+        resp = network.submit(
+            "update-data",
+            {"slug": orga_slug, "model": type(d).__name__, "data": d.data()},
+        )
+        if resp and resp.get("save"):
+            ids.append(d.id)
+            sent[d.id] = d.last_update_date
+    if ids:
+        model.bulk_mark_synced(ids, sent)
+    return len(ids)
+
 
 class UpdaterInit(QObject):
     contact_server_signal = pyqtSignal()
@@ -21,7 +107,6 @@ class UpdaterInit(QObject):
 
         self.stopFlag = Event()
         self.check = TaskThreadUpdater(self)
-        self.check.contact_server_signal.connect(self.contact_server)
 
         try:
             self.check.start()
@@ -47,16 +132,13 @@ class UpdaterInit(QObject):
             logger.error(f"Erreur lors du nettoyage des threads updater: {e}")
 
     def contact_server(self):
+        """Demande une synchronisation au prochain cycle du thread (jamais sur le thread GUI)."""
         logger.info("Contacting server for updates")
-        orga_slug = self.get_organization_slug()
-
-        if orga_slug:
-            self.check.update_data(orga_slug)
+        self.check.sync_requested.set()
 
     def get_organization_slug(self):
-        if Organization.select().count() > 0:
-            return Organization.get(id=1).slug
-        return None
+        orga = Organization.cached_or_none()
+        return orga.slug if orga is not None else None
 
 
 class TaskThreadUpdater(QThread):
@@ -66,47 +148,53 @@ class TaskThreadUpdater(QThread):
         super().__init__(parent)
         self.parent = parent
         self.stopped = parent.stopFlag
+        self.sync_requested = Event()
 
     def run(self):
         check_interval_without_server = 5
         check_interval_with_server = 50
 
         try:
-            while not self.stopped.wait(check_interval_without_server):
-                try:
-                    if access_server():
-                        orga_slug = self.get_organization_slug()
-
-                        if not orga_slug or orga_slug == "-":
-                            Network().get_or_inscribe_app()
-                        else:
-                            lcse = is_valide_mac()[0]
-                            if lcse is None:
-                                check_interval_without_server = check_interval_with_server
-                                continue
-                            resp = Network().submit(
-                                "check_org", {"orga_slug": orga_slug, "lcse": lcse.code}
-                            )
-                            if (
-                                not resp.get("force_kill")
-                                or resp.get("can_use") != CConstants.IS_EXPIRED
-                            ):
-                                lcse.expiration_date = datetime.fromtimestamp(
-                                    resp.get("expiration_date")
-                                )
-                                lcse.save()
+            # connexion propre au thread, fermée à sa sortie
+            with connection_for_thread():
+                while not self.stopped.wait(check_interval_without_server):
+                    try:
+                        if access_server():
+                            orga_slug = self.get_organization_slug()
+
+                            if not orga_slug or orga_slug == "-":
+                                Network().get_or_inscribe_app()
                             else:
-                                lcse.remove_activation()
-
-                            if resp.get("is_syncro"):
-                                self.contact_server_signal.emit()
+                                lcse = is_valide_mac()[0]
+                                if lcse is None:
+                                    check_interval_without_server = check_interval_with_server
+                                    continue
+                                resp = Network().submit(
+                                    "check_org", {"orga_slug": orga_slug, "lcse": lcse.code}
+                                )
+                                if (
+                                    not resp.get("force_kill")
+                                    or resp.get("can_use") != CConstants.IS_EXPIRED
+                                ):
+                                    lcse.expiration_date = datetime.fromtimestamp(
+                                        resp.get("expiration_date")
+                                    )
+                                    lcse.save()
+                                else:
+                                    lcse.remove_activation()
+
+                                if resp.get("is_syncro") or self.sync_requested.is_set():
+                                    self.sync_requested.clear()
+                                    # sur ce thread, avec sa connexion : l'interface n'attend pas
+                                    self.update_data(orga_slug)
+                                    self.contact_server_signal.emit()
 
-                            check_interval_without_server = check_interval_with_server
-                    else:
-                        # logger.info("No server access")
-                        pass
-                except Exception as e:
-                    logger.error(f"Erreur dans la boucle du thread updater: {e}")
+                                check_interval_without_server = check_interval_with_server
+                        else:
+                            # logger.info("No server access")
+                            pass
+                    except Exception as e:
+                        logger.error(f"Erreur dans la boucle du thread updater: {e}")
                     
         except Exception as e:
             logger.error(f"Erreur fatale dans le thread updater: {e}")
@@ -120,14 +208,9 @@ class TaskThreadUpdater(QThread):
         logger.info("Updating data")
         from .cdatabase import AdminDatabase
 
-        self.contact_server_signal.emit()
-
         setup = AdminDatabase()
+        network = Network()
         for m in setup.LIST_CREAT:
-            for d in m.select().where(m.is_syncro == True):
-                resp = Network().submit(
-                    "update-data",
-                    {"slug": orga_slug, "model": type(d).__name__, "data": d.data()},
-                )
-                if resp.get("save"):
-                    d.updated()
+            count = sync_model(network, orga_slug, m, stopped=self.stopped)
+            if count:
+                logger.info(f"Synchronisation {m.__name__}: {count} ligne(s)")
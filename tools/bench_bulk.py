@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Insertion de N lignes : boucle de ``save()`` contre ``BaseModel.bulk_save``.
+
+Base SQLite temporaire avec les mêmes pragmas que l'application.
+
+    python tools/bench_bulk.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import peewee  # noqa: E402
+
+from Common.models import BaseModel  # noqa: E402
+
+PRAGMAS = {
+    "journal_mode": "wal",
+    "cache_size": -64 * 1000,
+    "foreign_keys": 1,
+    "synchronous": 0,
+    "temp_store": 2,
+}
+
+
+def _timed(label, rows, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:22} {rows} lignes en {elapsed:7.2f} s -> {rows / elapsed:>10,.0f} lignes/s")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="mbench_bulk_")
+    os.close(fd)
+    db = peewee.SqliteDatabase(path, pragmas=PRAGMAS)
+
+    class BulkRow(BaseModel):
+        label = peewee.CharField()
+        amount = peewee.IntegerField()
+        code = peewee.CharField(unique=True)
+
+        class Meta:
+            database = db
+
+    rows = [{"label": f"ligne {i}", "amount": i, "code": f"C{i}"} for i in range(args.rows)]
+    try:
+        db.create_tables([BulkRow])
+
+        def save_loop():
+            for row in rows:
+                BulkRow(**row).save()
+
+        loop = _timed("boucle save()", len(rows), save_loop)
+        BulkRow.bulk_delete(BulkRow.select())
+
+        bulk = _timed("bulk_save", len(rows), lambda: BulkRow.bulk_save(rows))
+        _timed(
+            "bulk_upsert (conflits)",
+            len(rows),
+            lambda: BulkRow.bulk_upsert(
+                [dict(row, amount=row["amount"] + 1) for row in rows],
+                conflict_target=[BulkRow.code],
+            ),
+        )
+        ids = [r.id for r in BulkRow.select(BulkRow.id)]
+        _timed("bulk_mark_synced", len(ids), lambda: BulkRow.bulk_mark_synced(ids))
+        _timed("bulk_delete", len(ids), lambda: BulkRow.bulk_delete(ids))
+        print(f"\nbulk_save {loop / bulk:.0f}x plus rapide que la boucle save()")
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(path + suffix)
+            except OSError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
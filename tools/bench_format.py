@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Formatage des cellules numériques : avant / après le cache de Settings.
+
+Avant, ``formatted_number`` relisait ``Settings`` (une requête SQLite) pour
+chaque cellule ; il lit maintenant ``Settings.cached()``, et ``format_numbers``
+formate une colonne entière. Base SQLite temporaire avec les mêmes pragmas que
+l'application ; durées ramenées à 100 000 cellules.
+
+    python tools/bench_format.py --cells 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import peewee  # noqa: E402
+
+from Common.models import Settings  # noqa: E402
+from Common.ui.util import format_numbers, formatted_number  # noqa: E402
+
+PRAGMAS = {
+    "journal_mode": "wal",
+    "cache_size": -64 * 1000,
+    "foreign_keys": 1,
+    "synchronous": 0,
+    "temp_store": 2,
+}
+
+PER_CELLS = 100000
+
+
+def legacy_formatted_number(number, sep=" "):
+    """formatted_number tel qu'il était : une lecture de Settings par appel."""
+    if isinstance(number, bool):
+        return str(number)
+    try:
+        aftergam = max(int(Settings.select().get().after_cam), 0)
+    except Exception:
+        aftergam = 0
+    if isinstance(number, int):
+        return f"{number:,}".replace(",", sep)
+    if isinstance(number, float):
+        return f"{number:,.{aftergam}f}".replace(",", sep)
+    return str(number)
+
+
+def _timed(label, cells, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    per = elapsed * PER_CELLS / cells
+    print(f"{label:32} {cells} cellules en {elapsed:7.3f} s -> {per:7.3f} s / 100k cellules")
+    return per
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="mbench_format_")
+    os.close(fd)
+    db = peewee.SqliteDatabase(path, pragmas=PRAGMAS)
+    rng = random.Random(0)
+    cells = [
+        rng.randint(0, 10**9) if i % 2 else rng.uniform(0, 10**7) for i in range(args.cells)
+    ]
+    try:
+        with Settings.bind_ctx(db, bind_refs=False, bind_backrefs=False):
+            db.create_tables([Settings])
+            Settings.insert(id=Settings.SINGLETON_ID, after_cam=2).execute()
+            Settings.clear_cache()
+
+            before = _timed(
+                "avant (requête par cellule)",
+                len(cells),
+                lambda: [legacy_formatted_number(n) for n in cells],
+            )
+            after = _timed(
+                "formatted_number (cache)", len(cells), lambda: [formatted_number(n) for n in cells]
+            )
+            column = _timed("format_numbers (colonne)", len(cells), lambda: format_numbers(cells))
+            Settings.clear_cache()
+        print(
+            f"\nformatted_number {before / after:.0f}x, "
+            f"format_numbers {before / column:.0f}x plus rapides qu'avant"
+        )
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(path + suffix)
+            except OSError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
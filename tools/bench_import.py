@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Mesure le temps d'import de ``Common`` (démarrage à froid de l'exe).
+
+Lance ``python -X importtime -c "import Common"`` dans un processus neuf et
+affiche les modules les plus coûteux. Avec ``--budget-ms``, le code de sortie
+vaut 1 si le total dépasse le budget (utilisable en CI avant un build).
+
+    python tools/bench_import.py
+    python tools/bench_import.py --fast --budget-ms 400 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def measure(module="Common", fast=False, runs=3):
+    """Liste ``(cumulé µs, propre µs, module)`` de l'import le plus rapide sur ``runs`` essais."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    if fast:
+        env["COMMON_FAST_STARTUP"] = "1"
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            fields = line[len("import time:"):].split("|")
+            try:
+                own, cumulative = int(fields[0]), int(fields[1])
+            except ValueError:
+                continue  # ligne d'en-tête
+            rows.append((cumulative, own, fields[2].strip()))
+        if not rows:
+            raise RuntimeError(proc.stderr.strip() or f"import {module} : aucune mesure")
+        total = next(c for c, _own, name in reversed(rows) if name == module)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="Common")
+    parser.add_argument("--fast", action="store_true", help="mode démarrage rapide (COMMON_FAST_STARTUP=1)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    total, rows = measure(args.module, args.fast, args.runs)
+    print(f"{'cumulé ms':>10} {'propre ms':>10}  module")
+    for cumulative, own, name in sorted(rows, key=lambda r: r[1], reverse=True)[: args.top]:
+        print(f"{cumulative / 1000:10.1f} {own / 1000:10.1f}  {name}")
+    print(f"\nimport {args.module} : {total / 1000:.1f} ms")
+
+    if args.budget_ms is not None and total / 1000 > args.budget_ms:
+        print(f"Budget dépassé ({args.budget_ms:.0f} ms)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# maintainer: Fadiga
+
+"""Débit de la synchronisation (lignes/s) contre un serveur local factice.
+
+Le serveur factice (http.server, thread) accepte l'envoi groupé gzip
+``update-data-batch`` et l'ancien envoi ligne par ligne ``update-data`` et
+acquitte tout. Les lignes viennent d'une base SQLite temporaire, comme en
+production.
+
+    python tools/bench_sync.py --rows 20000
+    python tools/bench_sync.py --rows 2000 --legacy   # compare avec l'ancien protocole
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import peewee  # noqa: E402
+
+from Common.models import BaseModel  # noqa: E402
+from Common.server import http_session, post_json  # noqa: E402
+from Common.updater import sync_model  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return json.loads(raw or b"{}")
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        data = self._body()
+        self._reply({"saved": [row["id"] for row in data.get("rows", ())]})
+
+    def do_GET(self):
+        self._body()
+        self._reply({"save": True})
+
+    def log_message(self, *args):
+        pass
+
+
+class _LocalNetwork:
+    """Même interface que Network, vers le serveur factice."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def submit_batch(self, url, data):
+        return post_json(f"{self.base_url}/{url}", data)
+
+    def submit(self, url, data):
+        response = http_session().get(f"{self.base_url}/{url}", data=json.dumps(data))
+        return response.json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=500)
+    parser.add_argument("--legacy", action="store_true", help="mesurer aussi l'envoi ligne par ligne")
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="mbench_sync_")
+    os.close(fd)
+    db = peewee.SqliteDatabase(path, pragmas={"journal_mode": "wal"})
+
+    class SyncRow(BaseModel):
+        label = peewee.CharField()
+        amount = peewee.IntegerField()
+
+        class Meta:
+            database = db
+
+        def data(self):
+            data = super().data()
+            data.update({"label": self.label, "amount": self.amount})
+            return data
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    network = _LocalNetwork(f"http://127.0.0.1:{server.server_port}")
+
+    try:
+        db.create_tables([SyncRow])
+        with db.atomic():
+            SyncRow.insert_many(
+                [{"label": f"ligne {i}", "amount": i, "is_syncro": False} for i in range(args.rows)]
+            ).execute()
+
+        started = time.perf_counter()
+        count = sync_model(network, "bench", SyncRow, page_rows=args.page)
+        elapsed = time.perf_counter() - started
+        print(f"groupé    : {count} lignes en {elapsed:.2f} s -> {count / elapsed:,.0f} lignes/s")
+        # lignes acquittées : plus rien à envoyer au cycle suivant
+        print(f"2e passe  : {sync_model(network, 'bench', SyncRow, page_rows=args.page)} ligne(s)")
+
+        if args.legacy:
+            from Common.updater import _sync_rows_one_by_one
+
+            SyncRow.update(is_syncro=False).execute()
+            started = time.perf_counter()
+            count = _sync_rows_one_by_one(network, "bench", SyncRow)
+            elapsed = time.perf_counter() - started
+            print(f"par ligne : {count} lignes en {elapsed:.2f} s -> {count / elapsed:,.0f} lignes/s")
+    finally:
+        server.shutdown()
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(path + suffix)
+            except OSError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())